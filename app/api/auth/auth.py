@@ -4,7 +4,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.dependencies.auth import get_current_user
 from app.schemas.auth import TokenData, Token
 from app.schemas.users import UserCreate
-from app.services.auth import create_access_token, create_refresh_token, authenticate_user
+from app.services.auth import create_access_token, create_refresh_token, authenticate_user, get_token_claims
 from app.services.users import create_user, fetch_user_by_email
 
 router = APIRouter()
@@ -12,7 +12,7 @@ router = APIRouter()
 
 @router.get("/me")
 def read_me(current_user: TokenData = Depends(get_current_user)):
-    return {"email": current_user.email}
+    return {"id": current_user.id, "email": current_user.email}
 
 
 @router.post("/token", response_model=Token)
@@ -25,16 +25,17 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token({"sub": user.email})
-    refresh_token = create_refresh_token({"sub": user.email})
+    access_token = create_access_token(get_token_claims(user))
+    refresh_token = create_refresh_token(get_token_claims(user))
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(current_user: TokenData = Depends(get_current_user)):
     # Create new access and refresh tokens
-    access_token = create_access_token({"sub": current_user.email})
-    refresh_token = create_refresh_token({"sub": current_user.email})
+    claims = {"sub": current_user.email, "uid": current_user.id}
+    access_token = create_access_token(claims)
+    refresh_token = create_refresh_token(claims)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 
@@ -56,8 +57,8 @@ async def signup(user_data: UserCreate):
         user = await create_user(user_data)
 
         # Generate tokens for the new user
-        access_token = create_access_token({"sub": user.email})
-        refresh_token = create_refresh_token({"sub": user.email})
+        access_token = create_access_token(get_token_claims(user))
+        refresh_token = create_refresh_token(get_token_claims(user))
 
         # Return tokens for immediate authentication
         return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Request
+
+from app.dependencies.auth import get_current_user
+from app.schemas.auth import TokenData
+from app.schemas.batch import BatchRequest, BatchResult
+from app.services.batch import run_batch
+
+router = APIRouter()
+
+
+@router.post(path="")
+async def post_batch(batch: BatchRequest, request: Request,
+                     current_user: TokenData = Depends(get_current_user)) -> list[BatchResult]:
+    """
+    Exécute plusieurs opérations de l'API v1 en une seule requête, en parallèle,
+    et retourne leurs résultats (code HTTP et corps) dans l'ordre.
+    """
+    return await run_batch(request.app, request.scope, batch.operations)
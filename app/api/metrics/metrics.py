@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_prometheus
+
+router = APIRouter()
+
+
+@router.get(path="", response_class=PlainTextResponse)
+async def get_metrics() -> str:
+    """
+    Expose les métriques de l'application au format Prometheus.
+    """
+    return render_prometheus()
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends
 
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import get_page_params
 from app.schemas.auth import TokenData
 from app.schemas.documents import Document, DocumentCreate
+from app.schemas.pagination import Page, PageParams
 from app.services.documents import fetch_documents_by_group, fetch_document_by_id, create_document, \
     remove_document, fetch_documents_by_user
-from app.services.users import fetch_user_by_email
 
 router = APIRouter()
 
@@ -18,20 +19,20 @@ async def get_document_by_id(document_id: str) -> Document | None:
     return await fetch_document_by_id(document_id)
 
 
-@router.get(path="/{group_id}")
-async def get_documents_by_group(group_id: str) -> list[Document]:
+@router.get(path="/group/{group_id}")
+async def get_documents_by_group(group_id: str, page: PageParams = Depends(get_page_params)) -> Page[Document]:
     """
-    Affiche les documents par groupe stockés dans la BDD.
+    Affiche les documents par groupe stockés dans la BDD, paginés par curseur.
     """
-    return await fetch_documents_by_group(group_id)
+    return await fetch_documents_by_group(group_id, page)
 
 
-@router.get(path="/{user_id}")
-async def get_documents_by_user(user_id: str) -> list[Document]:
+@router.get(path="/user/{user_id}")
+async def get_documents_by_user(user_id: str, page: PageParams = Depends(get_page_params)) -> Page[Document]:
     """
-    Affiche les documents par utilisateur stockés dans la BDD.
+    Affiche les documents par utilisateur stockés dans la BDD, paginés par curseur.
     """
-    return await fetch_documents_by_user(user_id)
+    return await fetch_documents_by_user(user_id, page)
 
 
 @router.post(path="/")
@@ -40,8 +41,7 @@ async def post_document(document: DocumentCreate,
     """
     Crée un document dans la BDD.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    document.owner_id = owner.id
+    document.owner_id = current_user.id
     return await create_document(document)
 
 
@@ -1,25 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core.fx import UnknownCurrencyError
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import get_page_params
 from app.schemas.auth import TokenData
 from app.schemas.groups import Group, GroupCreate, GroupInvitation
+from app.schemas.pagination import Page, PageParams
+from app.schemas.settlements import GroupSettlement
+from app.schemas.stats import GroupStats, StatsPeriod
 
 from app.schemas.users import User
 from app.services.groups import (
     remove_group, fetch_group_by_id, create_group, edit_group,
     create_group_invitation, validate_group_invitation, join_group_by_invitation, fetch_group_members,
-    fetch_groups_for_user,
+    fetch_groups_for_user, export_group_ledger,
 )
+from app.services.settlements import fetch_group_settlement
+from app.services.stats import fetch_group_stats
+from app.utils.exports import ExportFormat, export_response, is_parquet_available
 
 router = APIRouter()
 
 
 @router.get(path="/me")
-async def get_my_groups(current_user: TokenData = Depends(get_current_user)) -> list[Group]:
+async def get_my_groups(page: PageParams = Depends(get_page_params),
+                        current_user: TokenData = Depends(get_current_user)) -> Page[Group]:
     """
-    Récupère tous les groupes dont l'utilisateur courant est membre.
+    Récupère les groupes dont l'utilisateur courant est membre, paginés par curseur.
     """
-    return await fetch_groups_for_user(current_user)
+    return await fetch_groups_for_user(current_user, page)
 
 
 @router.get(path="/{group_id}")
@@ -38,12 +51,37 @@ async def get_group_members(group_id: str) -> list[User]:
     return await fetch_group_members(group_id)
 
 
+@router.get('/{group_id}/settlement')
+async def get_group_settlement(group_id: str, current_user: TokenData = Depends(get_current_user)) -> GroupSettlement:
+    """
+    Calcule le solde net de chaque membre et les virements qui soldent toutes les dettes du groupe.
+    """
+    try:
+        return await fetch_group_settlement(group_id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
 @router.post('/')
 async def post_group(group: GroupCreate, current_user: TokenData = Depends(get_current_user)) -> Group:
     """
     Crée un groupe dans la BDD et y ajoute automatiquement le créateur.
     """
-    return await create_group(group, current_user)
+    try:
+        return await create_group(group, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.patch('/{group_id}')
@@ -51,7 +89,13 @@ async def patch_group(group_id: str, group: GroupCreate) -> Group:
     """
     Modifie un groupe dans la BDD.
     """
-    return await edit_group(group_id, group)
+    try:
+        return await edit_group(group_id, group)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.delete('/{group_id}')
@@ -102,3 +146,50 @@ async def join_group(invitation_code: str, current_user: TokenData = Depends(get
             detail=f"Invalid or expired invitation code: {invitation_code}"
         )
     return group
+
+
+@router.get('/{group_id}/export', response_class=StreamingResponse)
+async def export_group(group_id: str, export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+                       current_user: TokenData = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Télécharge le grand livre complet d'un groupe (dépenses, remboursements et membres) en CSV ou Parquet.
+    """
+    if export_format == ExportFormat.PARQUET and not is_parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow, install the parquet extra"
+        )
+    try:
+        content = await export_group_ledger(group_id, export_format)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return export_response(content, export_format, f"ledger-{group_id}")
+
+
+@router.get('/{group_id}/stats')
+async def get_group_stats(group_id: str, period: StatsPeriod = Query(StatsPeriod.MONTH),
+                          since: Optional[date] = Query(None), until: Optional[date] = Query(None),
+                          current_user: TokenData = Depends(get_current_user)) -> GroupStats:
+    """
+    Affiche les dépenses d'un groupe par période, par payeur et par catégorie.
+    """
+    try:
+        return await fetch_group_stats(group_id, period, since, until)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
 
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.core.fx import UnknownCurrencyError
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import get_page_params
 from app.schemas.auth import TokenData
-from app.schemas.reimbursements import SpendingReimbursement, SpendingReimbursementCreate, ReimbursementSummary
+from app.schemas.pagination import Page, PageParams
+from app.schemas.reimbursements import SpendingReimbursement, SpendingReimbursementCreate, ReimbursementSummary, \
+    SettleUpRequest, SettleUpResult
 from app.services.reimbursements import (
     fetch_reimbursements_by_spending, fetch_reimbursements_by_user,
     create_reimbursement, remove_reimbursement,
     fetch_total_reimbursements_owed_by_user, fetch_total_reimbursements_owed_to_user,
-    fetch_reimbursement_summary
+    fetch_reimbursement_summary, fetch_reimbursements_stream_by_user, settle_up
 )
+from app.utils.streaming import StreamFormat, STREAM_CHUNK_SIZE, stream_models
 
 router = APIRouter()
 
@@ -23,12 +31,23 @@ async def get_reimbursements_by_spending(spending_id: str) -> list[
 
 
 @router.get(path="/me")
-async def get_my_reimbursements_by_user(current_user: TokenData = Depends(get_current_user)) -> list[
+async def get_my_reimbursements_by_user(page: PageParams = Depends(get_page_params),
+                                        current_user: TokenData = Depends(get_current_user)) -> Page[
     SpendingReimbursement]:
     """
-    Affiche ses remboursements.
+    Affiche ses remboursements, paginés par curseur.
+    """
+    return await fetch_reimbursements_by_user(current_user, page)
+
+
+@router.get(path="/me/stream", response_class=StreamingResponse)
+async def stream_my_reimbursements(stream_format: StreamFormat = Query(StreamFormat.NDJSON, alias="format"),
+                                   current_user: TokenData = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Exporte tous ses remboursements en streaming (NDJSON ou tableau JSON).
     """
-    return await fetch_reimbursements_by_user(current_user)
+    return stream_models(fetch_reimbursements_stream_by_user(current_user, STREAM_CHUNK_SIZE), stream_format)
+
 
 @router.get(path="/me/unpaid")
 async def get_my_unpaid_reimbursements(current_user: TokenData = Depends(get_current_user)) -> list[SpendingReimbursement]:
@@ -50,6 +69,22 @@ async def pay_reimbursement(spending_id: str, user_id: str, current_user: TokenD
     return {"status": "paid"}
 
 
+@router.post(path="/settle")
+async def post_settle_up(settlement: SettleUpRequest,
+                         current_user: TokenData = Depends(get_current_user)) -> SettleUpResult:
+    """
+    Règle en une fois toutes les parts non payées entre deux membres d'un groupe,
+    ou celles d'une liste de dépenses, et retourne les totaux réglés.
+    """
+    try:
+        return await settle_up(settlement, datetime.now(timezone.utc))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.delete(path="/{spending_id}/{user_id}")
 async def delete_reimbursement(spending_id: str, user_id: str,) -> str:
     """
@@ -59,37 +94,61 @@ async def delete_reimbursement(spending_id: str, user_id: str,) -> str:
 
 
 @router.get(path="/me/total-owed-by")
-async def get_total_reimbursements_owed_by_user(current_user: TokenData = Depends(get_current_user)) -> float:
+async def get_total_reimbursements_owed_by_user(current_user: TokenData = Depends(get_current_user)) -> int:
     """
     Calcule le montant total des remboursements dus par l'utilisateur courant.
     """
-    return await fetch_total_reimbursements_owed_by_user(current_user.id)
+    try:
+        return await fetch_total_reimbursements_owed_by_user(current_user.id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
 
 
 @router.get(path="/me/total-owed-to")
-async def get_total_reimbursements_owed_to_user(current_user: TokenData = Depends(get_current_user)) -> float:
+async def get_total_reimbursements_owed_to_user(current_user: TokenData = Depends(get_current_user)) -> int:
     """
     Calcule le montant total des remboursements dus à l'utilisateur courant.
     """
-    return await fetch_total_reimbursements_owed_to_user(current_user.id)
+    try:
+        return await fetch_total_reimbursements_owed_to_user(current_user.id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
 
 
 @router.get(path="/user/{user_id}/total-owed-by")
-async def get_total_reimbursements_owed_by_specific_user(user_id: str) -> float:
+async def get_total_reimbursements_owed_by_specific_user(user_id: str) -> int:
     """
     Calcule le montant total des remboursements dus par un utilisateur spécifique.
     """
-    return await fetch_total_reimbursements_owed_by_user(user_id)
+    try:
+        return await fetch_total_reimbursements_owed_by_user(user_id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
 
 
 @router.get(path="/user/{user_id}/total-owed-to")
 async def get_total_reimbursements_owed_to_specific_user(
         user_id: str, current_user: TokenData = Depends(get_current_user)
-) -> float:
+) -> int:
     """
     Calcule le montant total des remboursements dus à un utilisateur spécifique.
     """
-    return await fetch_total_reimbursements_owed_to_user(user_id)
+    try:
+        return await fetch_total_reimbursements_owed_to_user(user_id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
 
 
 @router.get(path="/me/summary")
@@ -99,7 +158,13 @@ async def get_reimbursement_summary(current_user: TokenData = Depends(get_curren
     Inclut le montant total dû par l'utilisateur, le montant total dû à l'utilisateur,
     et le solde net (positif si l'utilisateur est créditeur, négatif s'il est débiteur).
     """
-    summary = await fetch_reimbursement_summary(current_user)
+    try:
+        summary = await fetch_reimbursement_summary(current_user.id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     return ReimbursementSummary(**summary)
 
 
@@ -112,5 +177,11 @@ async def get_reimbursement_summary_for_specific_user(
     Inclut le montant total dû par l'utilisateur, le montant total dû à l'utilisateur,
     et le solde net (positif si l'utilisateur est créditeur, négatif s'il est débiteur).
     """
-    summary = await fetch_reimbursement_summary(user_id)
+    try:
+        summary = await fetch_reimbursement_summary(user_id)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     return ReimbursementSummary(**summary)
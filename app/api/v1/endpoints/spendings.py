@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
 
 from app.dependencies.auth import get_current_user
+from app.dependencies.pagination import get_page_params
 from app.schemas.auth import TokenData
-from app.schemas.spendings import Spending, SpendingCreate
+from app.schemas.pagination import Page, PageParams
+from app.schemas.spendings import Spending, SpendingCreate, SpendingWithReimbursements, SpendingImportReport
 from app.services.spendings import fetch_spendings_by_group, fetch_spending_by_id, create_spending, edit_spending, \
-    fetch_spendings_by_user_id
+    fetch_spendings_by_user_id, fetch_spendings_stream_by_group, import_spendings
+from app.utils.imports import detect_import_format
+from app.utils.streaming import StreamFormat, STREAM_CHUNK_SIZE, stream_models
 
 router = APIRouter()
 
@@ -26,19 +31,59 @@ async def get_my_spendings(current_user: TokenData = Depends(get_current_user))
 
 
 @router.get(path="/group/{group_id}")
-async def get_spendings_by_group(group_id: str, current_user: TokenData = Depends(get_current_user)) -> list[Spending]:
+async def get_spendings_by_group(group_id: str, page: PageParams = Depends(get_page_params),
+                                 current_user: TokenData = Depends(get_current_user)) -> Page[Spending]:
     """
-    Affiche les dépenses stockées par groupe dans la BDD.
+    Affiche les dépenses stockées par groupe dans la BDD, paginées par curseur.
     """
-    return await fetch_spendings_by_group(group_id)
+    return await fetch_spendings_by_group(group_id, page)
+
+
+@router.get(path="/group/{group_id}/stream", response_class=StreamingResponse)
+async def stream_spendings_by_group(group_id: str,
+                                    stream_format: StreamFormat = Query(StreamFormat.NDJSON, alias="format"),
+                                    current_user: TokenData = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Exporte toutes les dépenses d'un groupe en streaming (NDJSON ou tableau JSON).
+    """
+    return stream_models(fetch_spendings_stream_by_group(group_id, STREAM_CHUNK_SIZE), stream_format)
 
 
 @router.post(path="/")
-async def post_spending(spending: SpendingCreate, current_user: TokenData = Depends(get_current_user)) -> Spending:
+async def post_spending(spending: SpendingCreate,
+                        current_user: TokenData = Depends(get_current_user)) -> SpendingWithReimbursements:
+    """
+    Crée une dépense dans la BDD avec ses remboursements.
+    """
+    try:
+        return await create_spending(spending, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post(path="/import")
+async def post_spendings_import(file: UploadFile = File(...),
+                                current_user: TokenData = Depends(get_current_user)) -> SpendingImportReport:
     """
-    Crée une dépense dans la BDD.
+    Importe en masse des dépenses depuis un fichier CSV (avec en-tête) ou NDJSON,
+    et génère leurs remboursements. Retourne les lignes rejetées avec leurs erreurs.
     """
-    return await create_spending(spending, current_user)
+    import_format = detect_import_format(file.filename, file.content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported file format, expected a .csv or .ndjson file"
+        )
+    try:
+        return await import_spendings(file.file, import_format, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.patch(path="/{spending_id}")
@@ -47,4 +92,10 @@ async def patch_spending(spending_id: str, spending: SpendingCreate,
     """
     Modifie une dépense dans la BDD.
     """
-    return await edit_spending(spending_id, spending)
+    try:
+        return await edit_spending(spending_id, spending)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,14 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from app.core.fx import UnknownCurrencyError
 from app.dependencies.auth import get_current_user
 from app.schemas.auth import TokenData
+from app.schemas.dashboard import Dashboard
 from app.schemas.users import User, UserCreate
+from app.services.dashboard import fetch_dashboard
 from app.services.users import fetch_user_by_id, create_user, edit_user, \
     fetch_user_by_email
 
 router = APIRouter()
 
 
+# Declared before /{user_id}, which would otherwise capture "me"
+@router.get(path="/me")
+async def get_my_user(current_user: TokenData = Depends(get_current_user)) -> User:
+    """
+    Affiche les données de l'utilisateur connecté.
+    """
+    return await fetch_user_by_id(current_user.id)
+
+
 @router.get(path="/{user_id}")
 async def get_user(user_id: str) -> User:
     """
@@ -17,12 +29,24 @@ async def get_user(user_id: str) -> User:
     return await fetch_user_by_id(user_id)
 
 
-@router.get(path="/me")
-async def get_my_user(current_user: TokenData = Depends(get_current_user)) -> User:
+@router.get(path="/me/dashboard")
+async def get_my_dashboard(current_user: TokenData = Depends(get_current_user)) -> Dashboard:
     """
-    Affiche les données de l'utilisateur connecté.
+    Affiche en une seule réponse l'écran d'accueil de l'utilisateur connecté : ses données, ses groupes,
+    ses remboursements non payés, son résumé par groupe et les dernières dépenses.
     """
-    return await fetch_user_by_id(current_user.id)
+    try:
+        return await fetch_dashboard(current_user)
+    except UnknownCurrencyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
 
 
 @router.post('/')
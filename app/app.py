@@ -1,11 +1,17 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 
 from app.api.v1.endpoints import users, documents, groups, spendings, reimbursements
 from app.api.auth import auth
-from app.core.config import Settings
-from app.db.settings import initialize_postgres_pool, close_postgres_pool
+from app.api.batch import batch
+from app.api.metrics import metrics
+from app.core.config import Settings, SettingsCache
+from app.core.fx import load_fx_rates, close_fx_rates
+from app.dependencies.db import get_db_transaction
+from app.db.settings import initialize_postgres_pool, close_postgres_pool, report_postgres_pool_stats, \
+    listen_cache_invalidations
 
 app = FastAPI()
 
@@ -15,8 +21,22 @@ async def lifespan(app: FastAPI):
     """
     Lifespan event handler for the FastAPI application.
     """
+    conf = Settings()
     await initialize_postgres_pool()
+    await load_fx_rates()
+    stats_task = None
+    if conf.POOL_STATS_INTERVAL > 0:
+        stats_task = asyncio.create_task(report_postgres_pool_stats(conf.POOL_STATS_INTERVAL))
+    invalidation_task = None
+    if SettingsCache().INVALIDATION_LISTEN:
+        invalidation_task = asyncio.create_task(listen_cache_invalidations())
     yield
+    for task in (stats_task, invalidation_task):
+        if task:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    await close_fx_rates()
     await close_postgres_pool()
 
 
@@ -27,11 +47,20 @@ def make_app() -> FastAPI:
     conf = Settings()
 
     app: FastAPI = FastAPI(title="Cooloc", lifespan=lifespan)
-    app.include_router(auth.router, prefix="/auth", tags=["Auth"])
-    app.include_router(users.router, prefix="/users", tags=["Users"])
-    app.include_router(documents.router, prefix="/documents", tags=["Documents"])
-    app.include_router(groups.router, prefix="/groups", tags=["Groups"])
-    app.include_router(spendings.router, prefix="/spendings", tags=["Spendings"])
-    app.include_router(reimbursements.router, prefix="/reimbursements", tags=["Reimbursements"])
+    app.include_router(auth.router, prefix="/auth", tags=["Auth"],
+                       dependencies=[Depends(get_db_transaction)])
+    app.include_router(users.router, prefix="/users", tags=["Users"],
+                       dependencies=[Depends(get_db_transaction)])
+    app.include_router(documents.router, prefix="/documents", tags=["Documents"],
+                       dependencies=[Depends(get_db_transaction)])
+    app.include_router(groups.router, prefix="/groups", tags=["Groups"],
+                       dependencies=[Depends(get_db_transaction)])
+    app.include_router(spendings.router, prefix="/spendings", tags=["Spendings"],
+                       dependencies=[Depends(get_db_transaction)])
+    app.include_router(reimbursements.router, prefix="/reimbursements", tags=["Reimbursements"],
+                       dependencies=[Depends(get_db_transaction)])
+    # Each operation of a batch opens its own transaction through the routes above
+    app.include_router(batch.router, prefix="/batch", tags=["Batch"])
+    app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
     return app
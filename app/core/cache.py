@@ -1,10 +1,111 @@
 """
-Simple in-memory cache for storing invitation codes.
+Simple in-memory caches: invitation codes and a generic LRU cache with per-entry TTL,
+kept coherent across workers by invalidation messages (see app.db.settings.listen_cache_invalidations).
 """
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import random
 import string
-from typing import Dict, Optional, Tuple
+import time
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from app.core import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache bounded by entry count, whose entries expire after a TTL.
+
+    Hits, misses and evictions are exposed on /metrics as `cache_<name>_*`.
+    A disabled cache stores nothing, so every lookup goes to the database.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, enabled: bool = True):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.entries: OrderedDict[K, Tuple[V, float]] = OrderedDict()
+        self.hits = metrics.counter(f"cache_{name}_hits_total", f"Lookups served by the {name} cache")
+        self.misses = metrics.counter(f"cache_{name}_misses_total", f"Lookups missed by the {name} cache")
+        self.evictions = metrics.counter(f"cache_{name}_evictions_total",
+                                         f"Entries evicted from the {name} cache to stay under its size")
+        metrics.gauge(f"cache_{name}_entries", f"Entries held by the {name} cache", lambda: len(self.entries))
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Return the cached value of a key, or None if it is missing or expired.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses.inc()
+            return None
+        self.entries.move_to_end(key)
+        self.hits.inc()
+        return entry[0]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Cache a value for `ttl` seconds (the cache TTL by default), evicting the least recently used entries.
+        """
+        if not self.enabled:
+            return
+        self.entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions.inc()
+
+    def delete(self, key: K) -> None:
+        """
+        Remove a key from the cache, if present.
+        """
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache.
+        """
+        self.entries.clear()
+
+
+# Caches keyed by entity id, evicted by invalidation messages: {entity: [cache]}
+_invalidation_targets: Dict[str, List[TTLCache]] = {}
+
+invalidations_received = metrics.counter("cache_invalidations_received_total",
+                                         "Cache invalidation messages received from PostgreSQL")
+
+
+def register_invalidation(entity: str, cache: TTLCache) -> None:
+    """
+    Evict entries of `cache`, keyed by entity id, when an `<entity>:<id>` invalidation message is received.
+    """
+    _invalidation_targets.setdefault(entity, []).append(cache)
+
+
+def apply_invalidation(payload: str) -> None:
+    """
+    Evict the entity named by an invalidation message (`user:<id>`, `group:<id>`) from its caches.
+    """
+    invalidations_received.inc()
+    entity, _, entity_id = payload.partition(":")
+    for cache in _invalidation_targets.get(entity, []):
+        cache.delete(entity_id)
+
+
+def clear_invalidation_targets() -> None:
+    """
+    Empty every cache fed by invalidation messages, when some messages may have been missed.
+    """
+    for caches in _invalidation_targets.values():
+        for cache in caches:
+            cache.clear()
+
 
 # In-memory cache for invitation codes: {invitation_code: (group_id, expires_at)}
 invitation_cache: Dict[str, Tuple[str, datetime]] = {}
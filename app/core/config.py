@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Callable
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
@@ -8,6 +11,14 @@ class Settings(BaseSettings):
     HOST: str
     PORT: str
     DB_NAME: str
+    DRIVER: str = "aiopg"
+    POOL_MIN_SIZE: int = 2
+    POOL_MAX_SIZE: int = 20
+    POOL_RECYCLE: float = 1800
+    POOL_TIMEOUT: float = 30
+    POOL_WARMUP: bool = True
+    POOL_STATS_INTERVAL: float = 60
+    STATEMENT_TIMEOUT_MS: int = 0
 
     class Config:
         env_prefix = 'POSTGRES_'
@@ -22,4 +33,61 @@ class SettingsAuth(BaseSettings):
         env_prefix = 'JWT_'
 
 
+class SettingsFx(BaseSettings):
+    SOURCE: str = ""
+    TTL: float = 3600
+    REFERENCE_CURRENCY: str = "EUR"
+
+    class Config:
+        env_prefix = 'FX_'
+
+
+class SettingsPassword(BaseSettings):
+    BCRYPT_ROUNDS: int = 12
+    HASH_CONCURRENCY: int = 4
+
+    class Config:
+        env_prefix = 'PASSWORD_'
+
+
+class SettingsCache(BaseSettings):
+    DASHBOARD_TTL: float = 5
+    DASHBOARD_MAX_ENTRIES: int = 10_000
+    TOKENS_MAX_ENTRIES: int = 10_000
+    ENTITY_ENABLED: bool = True
+    ENTITY_TTL: float = 300
+    ENTITY_MAX_ENTRIES: int = 10_000
+    INVALIDATION_LISTEN: bool = True
+
+    class Config:
+        env_prefix = 'CACHE_'
+
+
 settings = Settings()
+
+# Called after the settings are reloaded, to drop state derived from the previous values
+_reload_hooks: list[Callable[[], None]] = []
+
+
+@lru_cache(maxsize=1)
+def get_settings_auth() -> SettingsAuth:
+    """
+    Réglages JWT, lus une seule fois par processus.
+    """
+    return SettingsAuth()
+
+
+def on_settings_reload(hook: Callable[[], None]) -> None:
+    """
+    Enregistre une fonction appelée à chaque rechargement des réglages.
+    """
+    _reload_hooks.append(hook)
+
+
+def reload_settings() -> None:
+    """
+    Relit les réglages depuis l'environnement (rotation de la clé JWT, tests) et prévient les abonnés.
+    """
+    get_settings_auth.cache_clear()
+    for hook in _reload_hooks:
+        hook()
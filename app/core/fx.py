@@ -0,0 +1,144 @@
+"""
+In-process FX rate table used to convert amounts between currencies.
+
+Rates are loaded from a JSON file or URL (`FX_SOURCE`) shaped like
+`{"base": "EUR", "rates": {"USD": 1.0842, "GBP": 0.8571}}`, where each rate is the number of
+units of the currency for one unit of the base. The table is kept in memory and refreshed in the
+background once its TTL has expired, so that a conversion never waits on I/O.
+"""
+import asyncio
+import json
+import logging
+import time
+import urllib.request
+from contextlib import suppress
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import SettingsFx
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownCurrencyError(ValueError):
+    """
+    Devise sans taux dans la table de change.
+    """
+
+
+def normalize_currencies(currencies: Sequence[str] | np.ndarray) -> np.ndarray:
+    """
+    Met les codes devise sous leur forme ISO (`" eur"` -> `"EUR"`) : les devises ont longtemps été du texte libre.
+    """
+    return np.char.upper(np.char.strip(np.asarray(currencies, dtype=str)))
+
+
+class FxRates:
+    """
+    Table de taux de change figée, convertible en une passe vectorisée.
+    `reference` est la devise des totaux qui couvrent plusieurs groupes.
+    """
+
+    def __init__(self, base: str, rates: dict[str, float], reference: str, expires_at: float):
+        base, reference = str(normalize_currencies([base])[0]), str(normalize_currencies([reference])[0])
+        rates = {**dict(zip(normalize_currencies(list(rates)).tolist(), rates.values())), base: 1.0}
+        self.base = base
+        self.reference = reference
+        self.currencies = np.array(sorted(rates), dtype=str)
+        self.rates = np.array([rates[currency] for currency in self.currencies], dtype=np.float64)
+        self.expires_at = expires_at
+
+    def _positions(self, currencies: np.ndarray) -> np.ndarray:
+        currencies = normalize_currencies(currencies)
+        positions = np.searchsorted(self.currencies, currencies).clip(max=len(self.currencies) - 1)
+        unknown = self.currencies[positions] != currencies
+        if unknown.any():
+            raise UnknownCurrencyError(f"No FX rate for {', '.join(sorted(set(currencies[unknown].tolist())))}")
+        return positions
+
+    def check_currency(self, currency: str) -> str:
+        """
+        Retourne le code normalisé de la devise, ou lève une UnknownCurrencyError si elle n'a pas de taux.
+        """
+        code = str(normalize_currencies([currency])[0])
+        self._positions(np.array([code], dtype=str))
+        return code
+
+    def convert(self, amounts: Sequence[int], currencies: Sequence[str], targets: Sequence[str] | str) -> np.ndarray:
+        """
+        Convertit des montants en centimes de leur devise vers la devise cible de chaque ligne (ou une seule
+        devise cible pour toutes), arrondis au centime. Chaque devise distincte n'est recherchée qu'une fois.
+        """
+        amounts = np.asarray(amounts, dtype=np.int64)
+        sources, source_indices = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        targets, target_indices = np.unique(np.broadcast_to(np.asarray(targets, dtype=str), amounts.shape),
+                                            return_inverse=True)
+        source_rates = self.rates[self._positions(sources)]
+        target_rates = self.rates[self._positions(targets)]
+        factors = target_rates[target_indices] / source_rates[source_indices]
+        return np.rint(amounts * factors).astype(np.int64)
+
+
+_fx_rates: Optional[FxRates] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _read_source(source: str) -> dict:
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=10) as response:
+            return json.load(response)
+    return json.loads(Path(source).read_text())
+
+
+async def load_fx_rates() -> FxRates:
+    """
+    Charge la table des taux depuis sa source (sans bloquer la boucle) et la met en cache.
+    Sans source configurée, seule la devise de référence est connue.
+    """
+    global _fx_rates
+    conf = SettingsFx()
+    expires_at = time.monotonic() + conf.TTL
+    if conf.SOURCE:
+        data = await asyncio.to_thread(_read_source, conf.SOURCE)
+        _fx_rates = FxRates(data["base"], {currency: float(rate) for currency, rate in data["rates"].items()},
+                            conf.REFERENCE_CURRENCY, expires_at)
+    else:
+        _fx_rates = FxRates(conf.REFERENCE_CURRENCY, {}, conf.REFERENCE_CURRENCY, expires_at)
+    logger.info("Taux de change chargés: %s devises", len(_fx_rates.currencies))
+    return _fx_rates
+
+
+async def _refresh_fx_rates() -> None:
+    global _refresh_task
+    try:
+        await load_fx_rates()
+    except Exception:
+        logger.exception("Échec du rafraîchissement des taux de change, les taux précédents sont conservés")
+        _fx_rates.expires_at = time.monotonic() + SettingsFx().TTL
+    finally:
+        _refresh_task = None
+
+
+def get_fx_rates() -> FxRates:
+    """
+    Retourne la table des taux en cache. Une fois son TTL dépassé, elle reste servie
+    pendant qu'une tâche de fond la recharge.
+    """
+    global _refresh_task
+    if _fx_rates is None:
+        raise RuntimeError("FX rates are not loaded")
+    if time.monotonic() > _fx_rates.expires_at and _refresh_task is None:
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_fx_rates())
+    return _fx_rates
+
+
+async def close_fx_rates() -> None:
+    """
+    Annule un éventuel rafraîchissement en cours.
+    """
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await _refresh_task
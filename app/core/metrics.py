@@ -0,0 +1,135 @@
+"""
+Simple in-process metrics registry (counters, gauges and histograms).
+
+Metrics are exposed in the Prometheus text format by the /metrics endpoint.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, Optional, Tuple, Union
+
+# Default buckets, in seconds, for latency histograms
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """
+    Compteur monotone.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def samples(self) -> Dict[str, float]:
+        return {self.name: self.value}
+
+
+class Gauge:
+    """
+    Valeur instantanée, fixée à la main ou calculée à la lecture par une fonction.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, func: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def get(self) -> float:
+        return self.func() if self.func is not None else self.value
+
+    def samples(self) -> Dict[str, float]:
+        return {self.name: self.get()}
+
+
+class Histogram:
+    """
+    Histogramme à buckets cumulés.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self) -> Dict[str, float]:
+        samples = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            samples[f'{self.name}_bucket{{le="{bound}"}}'] = cumulative
+        samples[f'{self.name}_bucket{{le="+Inf"}}'] = self.count
+        samples[f"{self.name}_sum"] = self.sum
+        samples[f"{self.name}_count"] = self.count
+        return samples
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+# Registry of all metrics: {name: metric}
+registry: Dict[str, Metric] = {}
+
+
+def _register(metric: Metric) -> Metric:
+    existing = registry.get(metric.name)
+    if existing is not None:
+        return existing
+    registry[metric.name] = metric
+    return metric
+
+
+def counter(name: str, description: str) -> Counter:
+    """
+    Récupère ou crée un compteur.
+    """
+    return _register(Counter(name, description))
+
+
+def gauge(name: str, description: str, func: Optional[Callable[[], float]] = None) -> Gauge:
+    """
+    Récupère ou crée une jauge.
+    """
+    return _register(Gauge(name, description, func))
+
+
+def histogram(name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    """
+    Récupère ou crée un histogramme.
+    """
+    return _register(Histogram(name, description, buckets))
+
+
+def render_prometheus() -> str:
+    """
+    Sérialise toutes les métriques au format texte Prometheus.
+    """
+    lines = []
+    for metric in registry.values():
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for sample, value in metric.samples().items():
+            lines.append(f"{sample} {value}")
+    return "\n".join(lines) + "\n"
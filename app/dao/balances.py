@@ -0,0 +1,126 @@
+from pydantic_extra_types.ulid import ULID
+
+from app.db.drivers import Row
+from app.db.settings import connection_async
+from app.db.statements import execute_prepared
+from app.utils.schemas import get_ulid_to_string
+
+# Soldes recalculés depuis les remboursements non payés des dépenses non supprimées
+EXPECTED_BALANCES_SQL = """
+                        SELECT s.group_id,
+                               sr.user_id                 AS debtor_id,
+                               s.owner_id                 AS creditor_id,
+                               s.currency                 AS currency,
+                               SUM(sr.reimbursement_amount) AS amount
+                        FROM spending_reimbursements sr
+                        JOIN spendings s ON s.id = sr.spending_id
+                        WHERE sr.reimbursed_at IS NULL AND s.deleted_at IS NULL
+                        GROUP BY s.group_id, sr.user_id, s.owner_id, s.currency
+                        """
+
+
+async def select_balances_by_user(user_id: ULID) -> list[Row]:
+    """
+    Récupère, groupe par groupe et devise par devise, ce que doit un utilisateur et ce qui lui est dû,
+    avec la devise de référence de chaque groupe.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT b.group_id,
+                         g.base_currency,
+                         b.currency,
+                         COALESCE(SUM(b.amount) FILTER (WHERE b.debtor_id = $1), 0)::bigint   AS owed_by,
+                         COALESCE(SUM(b.amount) FILTER (WHERE b.creditor_id = $1), 0)::bigint AS owed_to
+                  FROM balances b
+                  JOIN groups g ON g.id = b.group_id
+                  WHERE b.debtor_id = $1 OR b.creditor_id = $1
+                  GROUP BY b.group_id, g.base_currency, b.currency
+                  ORDER BY b.group_id
+                  """
+            await execute_prepared(cur, "select_balances_by_user", sql, (get_ulid_to_string(user_id),))
+            return await cur.fetchall()
+
+
+async def select_total_owed_by_user(user_id: ULID) -> list[Row]:
+    """
+    Récupère, par devise, le montant total que doit un utilisateur.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT currency, SUM(amount)::bigint AS total_owed
+                  FROM balances
+                  WHERE debtor_id = $1
+                  GROUP BY currency
+                  """
+            await execute_prepared(cur, "select_total_owed_by_user", sql, (get_ulid_to_string(user_id),))
+            return await cur.fetchall()
+
+
+async def select_total_owed_to_user(user_id: ULID) -> list[Row]:
+    """
+    Récupère, par devise, le montant total dû à un utilisateur.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT currency, SUM(amount)::bigint AS total_owed
+                  FROM balances
+                  WHERE creditor_id = $1
+                  GROUP BY currency
+                  """
+            await execute_prepared(cur, "select_total_owed_to_user", sql, (get_ulid_to_string(user_id),))
+            return await cur.fetchall()
+
+
+async def select_balance_drift() -> list[Row]:
+    """
+    Compare la table balances aux soldes recalculés depuis zéro et retourne les écarts.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = f"""
+                  SELECT group_id,
+                         debtor_id,
+                         creditor_id,
+                         currency,
+                         COALESCE(e.amount, 0) AS expected_amount,
+                         COALESCE(b.amount, 0) AS stored_amount
+                  FROM ({EXPECTED_BALANCES_SQL}) e
+                  FULL JOIN balances b USING (group_id, debtor_id, creditor_id, currency)
+                  WHERE COALESCE(e.amount, 0) <> COALESCE(b.amount, 0)
+                  ORDER BY group_id, debtor_id, creditor_id, currency
+                  """
+            await cur.execute(sql)
+            return await cur.fetchall()
+
+
+async def rebuild_balances() -> None:
+    """
+    Recalcule entièrement la table balances. Doit être appelé dans une transaction.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            # Writers block on their balance update until the rebuild commits, then apply their delta on top
+            await cur.execute("LOCK TABLE balances IN EXCLUSIVE MODE")
+            await cur.execute("DELETE FROM balances")
+            await cur.execute(f"""
+                              INSERT INTO balances (group_id, debtor_id, creditor_id, currency, amount)
+                              {EXPECTED_BALANCES_SQL}
+                              """)
+
+
+async def select_balances_by_group(group_id: str) -> list[Row]:
+    """
+    Récupère les dettes non soldées entre les membres d'un groupe.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT debtor_id, creditor_id, currency, amount
+                  FROM balances
+                  WHERE group_id = $1 AND amount <> 0
+                  """
+            await execute_prepared(cur, "select_balances_by_group", sql, (group_id,))
+            return await cur.fetchall()
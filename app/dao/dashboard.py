@@ -0,0 +1,54 @@
+from app.db.drivers import Row
+from app.db.settings import connection_async
+from app.db.statements import execute_prepared
+
+
+async def select_dashboard_by_user_id(user_id: str, limit: int) -> Row:
+    """
+    Récupère en une seule requête tout l'écran d'accueil d'un utilisateur : ses données, ses groupes,
+    ses remboursements non payés, ses soldes par groupe et devise et les dernières dépenses de ses groupes.
+    Chaque liste est agrégée en JSON et bornée par `limit`.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT u.*,
+                         COALESCE((SELECT json_agg(g ORDER BY g.id DESC)
+                                   FROM (SELECT g.*
+                                         FROM groups g
+                                         JOIN users_groups ug ON ug.group_id = g.id
+                                         WHERE ug.user_id = u.id AND g.deleted_at IS NULL
+                                         ORDER BY g.id DESC
+                                         LIMIT $2) g), '[]'::json) AS groups,
+                         COALESCE((SELECT json_agg(sr ORDER BY sr.spending_id DESC)
+                                   FROM (SELECT sr.*
+                                         FROM spending_reimbursements sr
+                                         JOIN spendings s ON s.id = sr.spending_id
+                                         WHERE sr.user_id = u.id AND sr.reimbursed_at IS NULL
+                                           AND s.deleted_at IS NULL
+                                         ORDER BY sr.spending_id DESC
+                                         LIMIT $2) sr), '[]'::json) AS unpaid_reimbursements,
+                         COALESCE((SELECT json_agg(b)
+                                   FROM (SELECT b.group_id,
+                                                g.base_currency,
+                                                b.currency,
+                                                COALESCE(SUM(b.amount) FILTER (WHERE b.debtor_id = u.id), 0)
+                                                    AS owed_by,
+                                                COALESCE(SUM(b.amount) FILTER (WHERE b.creditor_id = u.id), 0)
+                                                    AS owed_to
+                                         FROM balances b
+                                         JOIN groups g ON g.id = b.group_id
+                                         WHERE b.debtor_id = u.id OR b.creditor_id = u.id
+                                         GROUP BY b.group_id, g.base_currency, b.currency) b), '[]'::json) AS balances,
+                         COALESCE((SELECT json_agg(s ORDER BY s.id DESC)
+                                   FROM (SELECT s.*
+                                         FROM spendings s
+                                         JOIN users_groups ug ON ug.group_id = s.group_id
+                                         WHERE ug.user_id = u.id AND s.deleted_at IS NULL
+                                         ORDER BY s.id DESC
+                                         LIMIT $2) s), '[]'::json) AS recent_spendings
+                  FROM users u
+                  WHERE u.id = $1
+                  """
+            await execute_prepared(cur, "select_dashboard_by_user_id", sql, (user_id, limit))
+            return await cur.fetchone()
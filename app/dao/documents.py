@@ -1,44 +1,56 @@
-from psycopg2.extras import RealDictRow
-
+from app.db.drivers import Row
 from app.db.settings import connection_async
+from app.db.statements import execute_prepared
 from app.schemas.documents import DocumentCreate
 from app.utils.schemas import get_ulid_to_string
 
 
-async def select_document_by_id(document_id: str) -> RealDictRow:
+async def select_document_by_id(document_id: str) -> Row:
     """
     Affiche un document stocké dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM documents WHERE id = %s"
-            await cur.execute(sql, (document_id,))
+            sql = "SELECT * FROM documents WHERE id = $1"
+            await execute_prepared(cur, "select_document_by_id", sql, (document_id,))
             return await cur.fetchone()
 
 
-async def select_documents_by_group(group_id: str) -> list[RealDictRow]:
+async def select_documents_by_group(group_id: str, after: str, limit: int) -> list[Row]:
     """
-    Affiche les documents par groupe stockés dans la BDD.
+    Affiche les documents par groupe stockés dans la BDD, du plus récent au plus ancien,
+    à partir du curseur `after`.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM documents WHERE group_id = %s"
-            await cur.execute(sql, (group_id,))
+            sql = """
+                  SELECT * FROM documents
+                  WHERE group_id = $1 AND id < $2
+                  ORDER BY id DESC
+                  LIMIT $3
+                  """
+            await execute_prepared(cur, "select_documents_by_group", sql, (group_id, after, limit))
             return await cur.fetchall()
 
 
-async def select_documents_by_user(user_id: str) -> list[RealDictRow]:
+async def select_documents_by_user(user_id: str, after: str, limit: int) -> list[Row]:
     """
-    Affiche les documents par utilisateur stockés dans la BDD.
+    Affiche les documents par utilisateur stockés dans la BDD, du plus récent au plus ancien,
+    à partir du curseur `after`.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM documents WHERE owner_id = %s"
-            await cur.execute(sql, (user_id,))
+            sql = """
+                  SELECT * FROM documents
+                  WHERE owner_id = $1 AND id < $2
+                  ORDER BY id DESC
+                  LIMIT $3
+                  """
+            await execute_prepared(cur, "select_documents_by_user", sql, (user_id, after, limit))
             return await cur.fetchall()
 
 
-async def insert_document(document: DocumentCreate) -> RealDictRow:
+async def insert_document(document: DocumentCreate) -> Row:
     """
     Crée un document dans la BDD.
     """
@@ -1,24 +1,27 @@
+from typing import AsyncIterator
+
 from fastapi import APIRouter
-from psycopg2.extras import RealDictRow
 
-from app.db.settings import connection_async
+from app.db.drivers import Row
+from app.db.settings import connection_async, detached_transaction_async
+from app.db.statements import execute_prepared
 from app.schemas.groups import GroupCreate
 
 router = APIRouter()
 
 
-async def select_group_by_id(group_id: str) -> RealDictRow:
+async def select_group_by_id(group_id: str) -> Row:
     """
     Affiche un groupe stocké dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM groups WHERE id = %s"
-            await cur.execute(sql, (group_id,))
+            sql = "SELECT * FROM groups WHERE id = $1"
+            await execute_prepared(cur, "select_group_by_id", sql, (group_id,))
             return await cur.fetchone()
 
 
-async def insert_group(group: GroupCreate) -> RealDictRow:
+async def insert_group(group: GroupCreate) -> Row:
     """
     Crée un groupe dans la BDD.
     """
@@ -35,7 +38,8 @@ async def insert_group(group: GroupCreate) -> RealDictRow:
                                       agency_email,
                                       agency_phone,
                                       starting_at,
-                                      ending_at)
+                                      ending_at,
+                                      base_currency)
                   VALUES (%(name)s,
                           %(description)s,
                           %(city)s,
@@ -46,7 +50,8 @@ async def insert_group(group: GroupCreate) -> RealDictRow:
                           %(agency_email)s,
                           %(agency_phone)s,
                           %(starting_at)s,
-                          %(ending_at)s) RETURNING *
+                          %(ending_at)s,
+                          %(base_currency)s) RETURNING *
                   """
             params = {
                 "name": group.name,
@@ -59,13 +64,14 @@ async def insert_group(group: GroupCreate) -> RealDictRow:
                 "agency_email": group.agency_email,
                 "agency_phone": group.agency_phone,
                 "starting_at": group.starting_at,
-                "ending_at": group.ending_at
+                "ending_at": group.ending_at,
+                "base_currency": group.base_currency
             }
             await cur.execute(sql, params)
             return await cur.fetchone()
 
 
-async def update_group(group_id: str, group: GroupCreate) -> RealDictRow:
+async def update_group(group_id: str, group: GroupCreate) -> Row:
     """
     Modifie un groupe dans la BDD.
     """
@@ -84,6 +90,7 @@ async def update_group(group_id: str, group: GroupCreate) -> RealDictRow:
                       agency_phone  = %(agency_phone)s,
                       starting_at   = %(starting_at)s,
                       ending_at     = %(ending_at)s,
+                      base_currency = %(base_currency)s,
                       updated_at    = NOW()
                   WHERE id = %(id)s RETURNING *
                   """
@@ -99,6 +106,7 @@ async def update_group(group_id: str, group: GroupCreate) -> RealDictRow:
                 "agency_phone": group.agency_phone,
                 "starting_at": group.starting_at,
                 "ending_at": group.ending_at,
+                "base_currency": group.base_currency,
                 "id": group_id
             }
             await cur.execute(sql, params)
@@ -113,3 +121,73 @@ async def soft_delete_group(group_id: str):
         async with conn.cursor() as cur:
             sql = "UPDATE groups SET deleted_at = NOW() WHERE id = %s"
             await cur.execute(sql, (group_id,))
+
+
+async def select_group_currencies(group_id: str) -> list[str]:
+    """
+    Récupère les devises des dépenses non supprimées d'un groupe.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = "SELECT DISTINCT currency FROM spendings WHERE group_id = $1 AND deleted_at IS NULL"
+            await execute_prepared(cur, "select_group_currencies", sql, (group_id,))
+            return [row["currency"] for row in await cur.fetchall()]
+
+
+# Une ligne par part de dépense : la dépense, son propriétaire et le membre qui lui doit sa part,
+# avec les montants convertis dans la devise du groupe selon les taux passés en paramètres
+# (toutes les devises du groupe doivent y figurer, voir export_group_ledger)
+GROUP_LEDGER_SQL = """
+                   SELECT s.id                                AS spending_id,
+                          s.name                              AS spending_name,
+                          s.description                       AS spending_description,
+                          s.amount                            AS amount,
+                          s.currency                          AS currency,
+                          s.is_reimbursed                     AS is_reimbursed,
+                          s.updated_at                        AS spending_updated_at,
+                          s.owner_id                          AS owner_id,
+                          owner.firstname || ' ' || owner.lastname AS owner_name,
+                          owner.email                         AS owner_email,
+                          sr.user_id                          AS debtor_id,
+                          debtor.firstname || ' ' || debtor.lastname AS debtor_name,
+                          debtor.email                        AS debtor_email,
+                          sr.reimbursement_amount             AS reimbursement_amount,
+                          sr.reimbursed_at                    AS reimbursed_at,
+                          g.base_currency                     AS base_currency,
+                          round(s.amount * target.rate / source.rate)::bigint AS base_amount,
+                          round(sr.reimbursement_amount * target.rate / source.rate)::bigint
+                                                              AS base_reimbursement_amount
+                   FROM spendings s
+                   JOIN groups g ON g.id = s.group_id
+                   JOIN unnest(%(fx_currencies)s::text[], %(fx_rates)s::float8[]) AS source(currency, rate)
+                       ON source.currency = upper(btrim(s.currency))
+                   JOIN unnest(%(fx_currencies)s::text[], %(fx_rates)s::float8[]) AS target(currency, rate)
+                       ON target.currency = upper(btrim(g.base_currency))
+                   LEFT JOIN users owner ON owner.id = s.owner_id
+                   LEFT JOIN spending_reimbursements sr ON sr.spending_id = s.id
+                   LEFT JOIN users debtor ON debtor.id = sr.user_id
+                   WHERE s.group_id = %(group_id)s AND s.deleted_at IS NULL
+                   ORDER BY s.id, sr.user_id
+                   """
+
+
+async def stream_group_ledger(group_id: str, fx_currencies: list[str], fx_rates: list[float],
+                              chunk_size: int) -> AsyncIterator[list[Row]]:
+    """
+    Parcourt le grand livre d'un groupe (dépenses, parts et membres) par lots, via un curseur côté serveur.
+    """
+    params = {"group_id": group_id, "fx_currencies": fx_currencies, "fx_rates": fx_rates}
+    async with detached_transaction_async() as conn:
+        async for rows in conn.stream(GROUP_LEDGER_SQL, params, chunk_size):
+            yield rows
+
+
+async def copy_group_ledger_csv(group_id: str, fx_currencies: list[str], fx_rates: list[float],
+                                chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    Exporte le grand livre d'un groupe en CSV via COPY TO STDOUT, par morceaux.
+    """
+    params = {"group_id": group_id, "fx_currencies": fx_currencies, "fx_rates": fx_rates}
+    async with detached_transaction_async() as conn:
+        async for chunk in conn.copy_to_csv(GROUP_LEDGER_SQL, params, chunk_size):
+            yield chunk
@@ -1,6 +1,8 @@
-from psycopg2.extras import RealDictRow
+from typing import AsyncIterator
 
-from app.db.settings import connection_async
+from app.db.drivers import Row
+from app.db.settings import connection_async, detached_transaction_async
+from app.db.statements import execute_prepared
 from app.dao.spendings import select_spending_by_id
 from app.dao.users_groups import get_users_in_group
 from app.schemas.reimbursements import SpendingReimbursementCreate
@@ -8,31 +10,46 @@ from app.utils.schemas import get_ulid_to_string
 from pydantic_extra_types.ulid import ULID
 
 
-async def select_reimbursements_by_spending(spending_id: str) -> list[RealDictRow]:
+async def select_reimbursements_by_spending(spending_id: str) -> list[Row]:
     """
     Affiche les remboursements pour une dépense.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM spending_reimbursements WHERE spending_id = %(spending_id)s"
-            params = {"spending_id": spending_id}
-            await cur.execute(sql, params)
+            sql = "SELECT * FROM spending_reimbursements WHERE spending_id = $1"
+            await execute_prepared(cur, "select_reimbursements_by_spending", sql, (spending_id,))
             return await cur.fetchall()
 
 
-async def select_reimbursements_by_user(user_id: ULID) -> list[RealDictRow]:
+async def select_reimbursements_by_user(user_id: ULID, after: str, limit: int) -> list[Row]:
     """
-    Affiche les remboursements pour un utilisateur.
+    Affiche les remboursements d'un utilisateur, de la dépense la plus récente à la plus ancienne,
+    à partir du curseur `after`.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM spending_reimbursements WHERE user_id = %(user_id)s"
-            params = {"user_id": get_ulid_to_string(user_id)}
-            await cur.execute(sql, params)
+            sql = """
+                  SELECT * FROM spending_reimbursements
+                  WHERE user_id = $1 AND spending_id < $2
+                  ORDER BY spending_id DESC
+                  LIMIT $3
+                  """
+            await execute_prepared(cur, "select_reimbursements_by_user", sql,
+                                   (get_ulid_to_string(user_id), after, limit))
             return await cur.fetchall()
 
 
-async def insert_reimbursement(spending_id: str, user_id: ULID, reimbursement_amount: float) -> RealDictRow:
+async def stream_reimbursements_by_user(user_id: ULID, chunk_size: int) -> AsyncIterator[list[Row]]:
+    """
+    Parcourt tous les remboursements d'un utilisateur par lots, via un curseur côté serveur.
+    """
+    async with detached_transaction_async() as conn:
+        sql = "SELECT * FROM spending_reimbursements WHERE user_id = %(user_id)s ORDER BY spending_id DESC"
+        async for rows in conn.stream(sql, {"user_id": get_ulid_to_string(user_id)}, chunk_size):
+            yield rows
+
+
+async def insert_reimbursement(spending_id: str, user_id: ULID, reimbursement_amount: int) -> Row:
     """
     Crée un remboursement dans la BDD avec le montant spécifié.
     """
@@ -57,9 +74,37 @@ async def insert_reimbursement(spending_id: str, user_id: ULID, reimbursement_am
             return await cur.fetchone()
 
 
+async def insert_reimbursements(allocations: list[tuple[str, str, int]]) -> list[Row]:
+    """
+    Crée en une seule requête les remboursements calculés par le moteur de répartition
+    (dépense, membre, montant).
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  INSERT INTO spending_reimbursements (spending_id,
+                                                       user_id,
+                                                       reimbursement_amount,
+                                                       reimbursed_at)
+                  SELECT spending_id, user_id, amount, NULL
+                  FROM unnest(%(spending_ids)s::ulid[], %(user_ids)s::ulid[], %(amounts)s::bigint[])
+                           AS allocation(spending_id, user_id, amount)
+                  RETURNING *
+                  """
+            spending_ids, user_ids, amounts = zip(*allocations) if allocations else ((), (), ())
+            params = {
+                "spending_ids": list(spending_ids),
+                "user_ids": list(user_ids),
+                "amounts": list(amounts)
+            }
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+
 async def delete_reimbursement(spending_id: str, user_id: str) -> None:
     """
     Supprime un remboursement de la BDD.
+    Le statut remboursé de la dépense est recalculé par le trigger unpaid_count.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
@@ -75,17 +120,11 @@ async def delete_reimbursement(spending_id: str, user_id: str) -> None:
             }
             await cur.execute(sql, params)
 
-            sql_update = """
-                         UPDATE Spendings
-                         SET is_reimbursed = FALSE
-                         WHERE id = %(spending_id)s
-                         """
-            await cur.execute(sql_update, {"spending_id": spending_id})
-
 
 async def update_reimbursement_paid_at(spending_id: str, user_id: str, paid_at) -> None:
     """
     Met à jour la date de paiement d'un remboursement.
+    La dépense passe à remboursée dans la même requête, quand sa dernière part est payée (trigger unpaid_count).
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
@@ -101,27 +140,8 @@ async def update_reimbursement_paid_at(spending_id: str, user_id: str, paid_at)
             }
             await cur.execute(sql, params)
 
-        async with conn.cursor() as cur:
-            sql = "SELECT * FROM spending_reimbursements WHERE spending_id = %(spending_id)s"
-            params = {"spending_id": spending_id}
-            await cur.execute(sql, params)
-            all_reimboursements = await cur.fetchall()
-            full_reimbursements = True
-            for reimbursement in all_reimboursements:
-                if reimbursement["reimbursed_at"] is None:
-                    full_reimbursements = False
-
-        if  full_reimbursements:
-            async with conn.cursor() as cur:
-                sql_update = """
-                             UPDATE spendings
-                             SET is_reimbursed = TRUE
-                             WHERE id = %(spending_id)s \
-                             """
-                await cur.execute(sql_update, {"spending_id": spending_id})
 
-
-async def select_unpaid_reimbursements_by_user(user_id: ULID) -> list[RealDictRow]:
+async def select_unpaid_reimbursements_by_user(user_id: ULID) -> list[Row]:
     """
     Récupère tous les remboursements non payés pour un utilisateur.
     """
@@ -129,43 +149,182 @@ async def select_unpaid_reimbursements_by_user(user_id: ULID) -> list[RealDictRo
         async with conn.cursor() as cur:
             sql = """
                   SELECT * FROM spending_reimbursements
-                  WHERE user_id = %(user_id)s AND reimbursed_at IS NULL
+                  WHERE user_id = $1 AND reimbursed_at IS NULL
                   """
-            params = {"user_id": get_ulid_to_string(user_id)}
-            await cur.execute(sql, params)
+            await execute_prepared(cur, "select_unpaid_reimbursements_by_user", sql, (get_ulid_to_string(user_id),))
             return await cur.fetchall()
 
 
-async def select_total_reimbursements_owed_by_user(user_id: ULID) -> float:
+async def update_reimbursements_paid_between_users(group_id: str, debtor_id: str, creditor_id: str,
+                                                   paid_at) -> Row:
     """
-    Calcule le montant total des remboursements dus par un utilisateur.
+    Marque comme payées en une seule requête toutes les parts non payées que doit un utilisateur
+    à un autre dans un groupe, et retourne les totaux réglés (montants par devise).
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
             sql = """
-                  SELECT COALESCE(SUM(reimbursement_amount), 0) as total_owed
-                  FROM spending_reimbursements
-                  WHERE user_id = %(user_id)s
+                  WITH settled AS (
+                      UPDATE spending_reimbursements sr
+                      SET reimbursed_at = %(reimbursed_at)s
+                      FROM spendings s
+                      WHERE s.id = sr.spending_id
+                        AND s.group_id = %(group_id)s
+                        AND s.owner_id = %(creditor_id)s
+                        AND s.deleted_at IS NULL
+                        AND sr.user_id = %(debtor_id)s
+                        AND sr.reimbursed_at IS NULL
+                      RETURNING sr.spending_id, sr.reimbursement_amount, s.currency
+                  ),
+                  totals AS (
+                      SELECT currency, SUM(reimbursement_amount)::bigint AS amount FROM settled GROUP BY currency
+                  )
+                  SELECT (SELECT COUNT(*) FROM settled)                    AS reimbursements_count,
+                         (SELECT COUNT(DISTINCT spending_id) FROM settled) AS spendings_count,
+                         ARRAY(SELECT currency::text FROM totals ORDER BY currency) AS currencies,
+                         ARRAY(SELECT amount FROM totals ORDER BY currency)         AS amounts
                   """
-            params = {"user_id": get_ulid_to_string(user_id)}
+            params = {
+                "group_id": group_id,
+                "debtor_id": debtor_id,
+                "creditor_id": creditor_id,
+                "reimbursed_at": paid_at
+            }
             await cur.execute(sql, params)
-            result = await cur.fetchone()
-            return float(result["total_owed"]) if result else 0.0
+            return await cur.fetchone()
+
+
+async def update_reimbursements_paid_for_spendings(spending_ids: list[str], paid_at) -> Row:
+    """
+    Marque comme payées en une seule requête toutes les parts non payées des dépenses données
+    (hors dépenses supprimées), et retourne les totaux réglés (montants par devise).
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  WITH settled AS (
+                      UPDATE spending_reimbursements sr
+                      SET reimbursed_at = %(reimbursed_at)s
+                      FROM spendings s
+                      WHERE s.id = sr.spending_id
+                        AND sr.spending_id = ANY(%(spending_ids)s::ulid[])
+                        AND s.deleted_at IS NULL
+                        AND sr.reimbursed_at IS NULL
+                      RETURNING sr.spending_id, sr.reimbursement_amount, s.currency
+                  ),
+                  totals AS (
+                      SELECT currency, SUM(reimbursement_amount)::bigint AS amount FROM settled GROUP BY currency
+                  )
+                  SELECT (SELECT COUNT(*) FROM settled)                    AS reimbursements_count,
+                         (SELECT COUNT(DISTINCT spending_id) FROM settled) AS spendings_count,
+                         ARRAY(SELECT currency::text FROM totals ORDER BY currency) AS currencies,
+                         ARRAY(SELECT amount FROM totals ORDER BY currency)         AS amounts
+                  """
+            params = {
+                "spending_ids": spending_ids,
+                "reimbursed_at": paid_at
+            }
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+
+# Ce dont le moteur de répartition a besoin pour calculer les parts d'une dépense
+SPLIT_CONTEXT_SQL = """
+                    SELECT s.id,
+                           s.owner_id,
+                           s.amount,
+                           s.split_strategy,
+                           s.split_values,
+                           ARRAY(SELECT ug.user_id::text
+                                 FROM users_groups ug
+                                 WHERE ug.group_id = s.group_id
+                                 ORDER BY ug.user_id) AS member_ids,
+                           ARRAY(SELECT sr.user_id::text
+                                 FROM spending_reimbursements sr
+                                 WHERE sr.spending_id = s.id AND sr.reimbursed_at IS NOT NULL) AS paid_user_ids,
+                           (SELECT COALESCE(SUM(sr.reimbursement_amount), 0)
+                            FROM spending_reimbursements sr
+                            WHERE sr.spending_id = s.id AND sr.reimbursed_at IS NOT NULL)::bigint AS paid_amount
+                    FROM spendings s
+                    """
+
 
+async def select_split_context_by_spending(spending_id: str) -> list[Row]:
+    """
+    Récupère la répartition, les membres du groupe et les parts déjà payées d'une dépense non supprimée.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = SPLIT_CONTEXT_SQL + "WHERE s.id = %(spending_id)s AND s.deleted_at IS NULL"
+            await cur.execute(sql, {"spending_id": spending_id})
+            return await cur.fetchall()
 
-async def select_total_reimbursements_owed_to_user(user_id: ULID) -> float:
+
+async def select_split_context_by_group(group_id: str) -> list[Row]:
     """
-    Calcule le montant total des remboursements dus à un utilisateur.
+    Récupère la répartition, les membres et les parts déjà payées de toutes les dépenses
+    non remboursées d'un groupe, y compris celles qui n'ont encore aucune part.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            # A spending without any share is flagged as reimbursed (e.g. created while its owner was alone
+            # in the group): it still has to be split once members join
+            sql = SPLIT_CONTEXT_SQL + """
+                  WHERE s.group_id = %(group_id)s
+                    AND s.deleted_at IS NULL
+                    AND (NOT s.is_reimbursed
+                         OR NOT EXISTS (SELECT 1 FROM spending_reimbursements sr WHERE sr.spending_id = s.id))
+                  """
+            await cur.execute(sql, {"group_id": group_id})
+            return await cur.fetchall()
+
+
+async def update_reimbursements_split(spending_ids: list[str], allocations: list[tuple[str, str, int]]) -> Row:
+    """
+    Applique en une seule requête une nouvelle répartition des dépenses données : seules les parts non payées
+    qui changent sont écrites, celles qui ne font plus partie de la répartition sont supprimées
+    et les parts déjà payées restent figées. Retourne le nombre de parts écrites et supprimées.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
             sql = """
-                  SELECT COALESCE(SUM(sr.reimbursement_amount), 0) as total_owed
-                  FROM spending_reimbursements sr
-                  JOIN spendings s ON sr.spending_id = s.id
-                  WHERE s.owner_id = %(user_id)s
+                  WITH target AS (
+                      SELECT *
+                      FROM unnest(%(target_spending_ids)s::ulid[], %(user_ids)s::ulid[], %(amounts)s::bigint[])
+                               AS allocation(spending_id, user_id, amount)
+                  ),
+                  upserted AS (
+                      INSERT INTO spending_reimbursements (spending_id,
+                                                           user_id,
+                                                           reimbursement_amount,
+                                                           reimbursed_at)
+                      SELECT spending_id, user_id, amount, NULL
+                      FROM target
+                      ON CONFLICT (spending_id, user_id) DO UPDATE
+                      SET reimbursement_amount = EXCLUDED.reimbursement_amount
+                      WHERE spending_reimbursements.reimbursed_at IS NULL
+                        AND spending_reimbursements.reimbursement_amount <> EXCLUDED.reimbursement_amount
+                      RETURNING spending_id
+                  ),
+                  removed AS (
+                      DELETE FROM spending_reimbursements sr
+                      WHERE sr.spending_id = ANY(%(spending_ids)s::ulid[])
+                        AND sr.reimbursed_at IS NULL
+                        AND NOT EXISTS (SELECT 1
+                                        FROM target t
+                                        WHERE t.spending_id = sr.spending_id
+                                          AND t.user_id = sr.user_id)
+                      RETURNING sr.spending_id
+                  )
+                  SELECT (SELECT COUNT(*) FROM upserted) AS upserted_count,
+                         (SELECT COUNT(*) FROM removed)  AS removed_count
                   """
-            params = {"user_id": get_ulid_to_string(user_id)}
+            target_spending_ids, user_ids, amounts = zip(*allocations) if allocations else ((), (), ())
+            params = {
+                "spending_ids": spending_ids,
+                "target_spending_ids": list(target_spending_ids),
+                "user_ids": list(user_ids),
+                "amounts": list(amounts)
+            }
             await cur.execute(sql, params)
-            result = await cur.fetchone()
-            return float(result["total_owed"]) if result else 0.0
+            return await cur.fetchone()
@@ -1,48 +1,72 @@
-from psycopg2.extras import RealDictRow
+import json
+from typing import AsyncIterator, Optional
 
-from app.db.settings import connection_async
+from app.db.drivers import Row
+from app.db.settings import connection_async, detached_transaction_async
+from app.db.statements import execute_prepared
 from app.schemas.spendings import SpendingCreate
-from app.utils.schemas import get_ulid_to_string
+from app.utils.schemas import get_ulid_to_string, get_ulid_keys_to_string
 from pydantic_extra_types.ulid import ULID
 
 
-async def select_spending_by_id(spending_id: str) -> RealDictRow:
+def get_split_values_to_json(split_values: Optional[dict[ULID, float]]) -> Optional[str]:
+    """
+    Sérialise les valeurs de répartition d'une dépense pour la colonne JSONB split_values.
+    """
+    if split_values is None:
+        return None
+    return json.dumps(get_ulid_keys_to_string(split_values))
+
+
+async def select_spending_by_id(spending_id: str) -> Row:
     """
     Affiche une dépense stockée dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM Spendings WHERE id = %(id)s"
-            params = {"id": spending_id}
-            await cur.execute(sql, params)
+            sql = "SELECT * FROM Spendings WHERE id = $1"
+            await execute_prepared(cur, "select_spending_by_id", sql, (spending_id,))
             return await cur.fetchone()
 
 
-async def select_spendings_by_group(group_id: str) -> list[RealDictRow]:
+async def select_spendings_by_group(group_id: str, after: str, limit: int) -> list[Row]:
     """
-    Affiche les dépenses stockées dans la BDD.
+    Affiche les dépenses d'un groupe, de la plus récente à la plus ancienne, à partir du curseur `after`.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM Spendings WHERE group_id = %(group_id)s"
-            params = {"group_id": group_id}
-            await cur.execute(sql, params)
+            sql = """
+                  SELECT * FROM Spendings
+                  WHERE group_id = $1 AND id < $2
+                  ORDER BY id DESC
+                  LIMIT $3
+                  """
+            await execute_prepared(cur, "select_spendings_by_group", sql, (group_id, after, limit))
             return await cur.fetchall()
 
 
-async def select_spendings_by_user(owner_id: ULID) -> list[RealDictRow]:
+async def stream_spendings_by_group(group_id: str, chunk_size: int) -> AsyncIterator[list[Row]]:
+    """
+    Parcourt toutes les dépenses d'un groupe par lots, via un curseur côté serveur.
+    """
+    async with detached_transaction_async() as conn:
+        sql = "SELECT * FROM Spendings WHERE group_id = %(group_id)s ORDER BY id DESC"
+        async for rows in conn.stream(sql, {"group_id": group_id}, chunk_size):
+            yield rows
+
+
+async def select_spendings_by_user(owner_id: ULID) -> list[Row]:
     """
     Affiche les dépenses stockées dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM Spendings WHERE owner_id = %(owner_id)s"
-            params = {"owner_id": get_ulid_to_string(owner_id)}
-            await cur.execute(sql, params)
+            sql = "SELECT * FROM Spendings WHERE owner_id = $1"
+            await execute_prepared(cur, "select_spendings_by_user", sql, (get_ulid_to_string(owner_id),))
             return await cur.fetchall()
 
 
-async def insert_spending(spending: SpendingCreate, owner_id: ULID) -> RealDictRow:
+async def insert_spending(spending: SpendingCreate, owner_id: ULID) -> Row:
     """
     Crée une dépense dans la BDD.
     """
@@ -53,14 +77,12 @@ async def insert_spending(spending: SpendingCreate, owner_id: ULID) -> RealDictR
                                          description,
                                          amount,
                                          currency,
-                                         is_reimbursed,
                                          owner_id,
                                          group_id)
                   VALUES (%(name)s,
                           %(description)s,
                           %(amount)s,
                           %(currency)s,
-                          %(is_reimbursed)s,
                           %(owner_id)s,
                           %(group_id)s) RETURNING * \
                   """
@@ -69,7 +91,6 @@ async def insert_spending(spending: SpendingCreate, owner_id: ULID) -> RealDictR
                 "description": spending.description,
                 "amount": spending.amount,
                 "currency": spending.currency,
-                "is_reimbursed": spending.is_reimbursed,
                 "owner_id": get_ulid_to_string(owner_id),
                 "group_id": get_ulid_to_string(spending.group_id),
             }
@@ -77,21 +98,23 @@ async def insert_spending(spending: SpendingCreate, owner_id: ULID) -> RealDictR
             return await cur.fetchone()
 
 
-async def update_spending_by_id(spending_id: str, spending: SpendingCreate) -> RealDictRow:
+async def update_spending_by_id(spending_id: str, spending: SpendingCreate) -> Row:
     """
-    Met à jour une dépense dans la BDD.
+    Met à jour une dépense dans la BDD. Le propriétaire de la dépense ne change pas.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
             sql = """
                   UPDATE Spendings
-                  SET name          = %(name)s,
-                      description   = %(description)s,
-                      amount        = %(amount)s,
-                      currency      = %(currency)s,
-                      is_reimbursed = %(is_reimbursed)s,
-                      owner_id      = %(owner_id)s,
-                      group_id      = %(group_id)s
+                  SET name           = %(name)s,
+                      description    = %(description)s,
+                      amount         = %(amount)s,
+                      currency       = %(currency)s,
+                      group_id       = %(group_id)s,
+                      split_strategy = %(split_strategy)s,
+                      split_values   = %(split_values)s::text::jsonb,
+                      category       = %(category)s,
+                      spent_at       = COALESCE(%(spent_at)s, spent_at)
                   WHERE id = %(id)s RETURNING *
                   """
             params = {
@@ -99,10 +122,182 @@ async def update_spending_by_id(spending_id: str, spending: SpendingCreate) -> R
                 "description": spending.description,
                 "amount": spending.amount,
                 "currency": spending.currency,
-                "is_reimbursed": spending.is_reimbursed,
-                "owner_id": get_ulid_to_string(spending.owner_id),
                 "group_id": get_ulid_to_string(spending.group_id),
+                "split_strategy": spending.split_strategy.value,
+                "split_values": get_split_values_to_json(spending.split_values),
+                "category": spending.category,
+                "spent_at": spending.spent_at,
                 "id": spending_id
             }
             await cur.execute(sql, params)
             return await cur.fetchone()
+
+
+async def insert_spending_with_reimbursements(spending: SpendingCreate, owner_id: ULID,
+                                              allocations: list[tuple[str, int]]) -> Row:
+    """
+    Crée une dépense et ses remboursements en une seule requête, à partir des parts
+    (membre, montant) calculées par le moteur de répartition.
+    La ligne retournée contient la dépense et ses remboursements dans la colonne `reimbursements`.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  WITH new_spending AS (
+                      INSERT INTO spendings (name,
+                                             description,
+                                             amount,
+                                             currency,
+                                             is_reimbursed,
+                                             owner_id,
+                                             group_id,
+                                             split_strategy,
+                                             split_values,
+                                             category,
+                                             spent_at)
+                      VALUES (%(name)s,
+                              %(description)s,
+                              %(amount)s,
+                              %(currency)s,
+                              %(is_reimbursed)s,
+                              %(owner_id)s,
+                              %(group_id)s,
+                              %(split_strategy)s,
+                              %(split_values)s::text::jsonb,
+                              %(category)s,
+                              COALESCE(%(spent_at)s, CURRENT_TIMESTAMP)) RETURNING *
+                  ),
+                  new_reimbursements AS (
+                      INSERT INTO spending_reimbursements (spending_id,
+                                                          user_id,
+                                                          reimbursement_amount,
+                                                          reimbursed_at)
+                      SELECT ns.id, allocation.user_id, allocation.amount, NULL
+                      FROM new_spending ns,
+                           unnest(%(user_ids)s::ulid[], %(amounts)s::bigint[]) AS allocation(user_id, amount)
+                      RETURNING *
+                  )
+                  SELECT ns.*,
+                         COALESCE((SELECT json_agg(nr) FROM new_reimbursements nr), '[]'::json) AS reimbursements
+                  FROM new_spending ns
+                  """
+            params = {
+                "name": spending.name,
+                "description": spending.description,
+                "amount": spending.amount,
+                "currency": spending.currency,
+                # Same value as the unpaid_count trigger sets, so that RETURNING is already up to date
+                "is_reimbursed": not allocations,
+                "owner_id": get_ulid_to_string(owner_id),
+                "group_id": get_ulid_to_string(spending.group_id),
+                "split_strategy": spending.split_strategy.value,
+                "split_values": get_split_values_to_json(spending.split_values),
+                "category": spending.category,
+                "spent_at": spending.spent_at,
+                "user_ids": [user_id for user_id, _ in allocations],
+                "amounts": [amount for _, amount in allocations],
+            }
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+
+SPENDINGS_IMPORT_COLUMNS = ("row_number", "name", "description", "amount", "currency", "category", "spent_at",
+                            "group_id")
+
+
+async def create_spendings_import_table() -> None:
+    """
+    Crée la table temporaire de chargement des dépenses importées, supprimée à la fin de la transaction.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  CREATE TEMPORARY TABLE IF NOT EXISTS spendings_import (
+                      row_number INT PRIMARY KEY,
+                      name VARCHAR(255) NOT NULL,
+                      description TEXT,
+                      amount BIGINT NOT NULL,
+                      currency VARCHAR(3) NOT NULL,
+                      category VARCHAR(50) NOT NULL,
+                      spent_at TIMESTAMP,
+                      group_id TEXT NOT NULL
+                  ) ON COMMIT DROP
+                  """
+            await cur.execute(sql)
+
+
+async def copy_spendings_to_import_table(records: list[tuple]) -> None:
+    """
+    Charge en masse (COPY) un lot de dépenses validées dans la table temporaire d'import.
+    """
+    async with connection_async() as conn:
+        await conn.copy_records("spendings_import", SPENDINGS_IMPORT_COLUMNS, records)
+
+
+async def delete_imported_spendings_with_unknown_group() -> list[Row]:
+    """
+    Retire de la table d'import les dépenses dont le groupe n'existe pas et retourne leurs numéros de ligne.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  DELETE FROM spendings_import si
+                  WHERE NOT EXISTS (SELECT 1 FROM groups g WHERE g.id = si.group_id::ulid)
+                  RETURNING si.row_number, si.group_id
+                  """
+            await cur.execute(sql)
+            return await cur.fetchall()
+
+
+async def insert_spendings_from_import_table(owner_id: ULID) -> Row:
+    """
+    Crée en une seule requête toutes les dépenses de la table d'import et leurs remboursements
+    (à parts égales en centimes entre les membres de chaque groupe, hors propriétaire).
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  WITH new_spendings AS (
+                      INSERT INTO spendings (name,
+                                             description,
+                                             amount,
+                                             currency,
+                                             owner_id,
+                                             group_id,
+                                             category,
+                                             spent_at)
+                      SELECT name, description, amount, currency, %(owner_id)s, group_id::ulid,
+                             category, COALESCE(spent_at, CURRENT_TIMESTAMP)
+                      FROM spendings_import
+                      ORDER BY row_number
+                      RETURNING id, amount, owner_id, group_id
+                  ),
+                  members AS (
+                      SELECT group_id,
+                             user_id,
+                             COUNT(*) OVER (PARTITION BY group_id)                        AS members_count,
+                             ROW_NUMBER() OVER (PARTITION BY group_id ORDER BY user_id) AS member_rank
+                      FROM users_groups
+                      WHERE group_id IN (SELECT DISTINCT group_id::ulid FROM spendings_import)
+                  ),
+                  new_reimbursements AS (
+                      INSERT INTO spending_reimbursements (spending_id,
+                                                          user_id,
+                                                          reimbursement_amount,
+                                                          reimbursed_at)
+                      -- Largest remainder on equal parts: the first members by id take the leftover cents.
+                      -- mod() rather than %: psycopg2 would read a bare % as a placeholder
+                      SELECT ns.id,
+                             m.user_id,
+                             ns.amount / m.members_count
+                                 + CASE WHEN m.member_rank <= mod(ns.amount, m.members_count) THEN 1 ELSE 0 END,
+                             NULL
+                      FROM new_spendings ns
+                      JOIN members m ON m.group_id = ns.group_id AND m.user_id <> ns.owner_id
+                      RETURNING spending_id
+                  )
+                  SELECT (SELECT COUNT(*) FROM new_spendings)      AS spendings_count,
+                         (SELECT COUNT(*) FROM new_reimbursements) AS reimbursements_count
+                  """
+            await cur.execute(sql, {"owner_id": get_ulid_to_string(owner_id)})
+            return await cur.fetchone()
@@ -0,0 +1,80 @@
+from datetime import date
+from typing import Optional
+
+from app.db.drivers import Row
+from app.db.settings import connection_async
+from app.db.statements import execute_prepared
+
+# Agrégats recalculés depuis les dépenses non supprimées, par jour et par mois
+EXPECTED_SPENDING_ROLLUPS_SQL = """
+                                SELECT s.group_id,
+                                       p.period,
+                                       date_trunc(p.period, s.spent_at)::date AS bucket,
+                                       s.owner_id,
+                                       s.category,
+                                       s.currency,
+                                       SUM(s.amount)                         AS amount,
+                                       COUNT(*)                              AS spendings_count
+                                FROM spendings s
+                                CROSS JOIN (VALUES ('day'), ('month')) AS p(period)
+                                WHERE s.deleted_at IS NULL
+                                  AND (%(group_id)s::ulid IS NULL OR s.group_id = %(group_id)s::ulid)
+                                GROUP BY 1, 2, 3, 4, 5, 6
+                                """
+
+
+async def select_group_stats(group_id: str, period: str, since: Optional[date], until: Optional[date]) -> list[Row]:
+    """
+    Récupère les totaux d'un groupe par période, par payeur et par catégorie (et par devise),
+    en une seule lecture des agrégats : le coût dépend du nombre de périodes, pas du nombre de dépenses.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = """
+                  SELECT CASE
+                             WHEN GROUPING(bucket) = 0 THEN 'period'
+                             WHEN GROUPING(owner_id) = 0 THEN 'member'
+                             ELSE 'category'
+                         END                           AS dimension,
+                         bucket,
+                         owner_id,
+                         category,
+                         currency,
+                         SUM(amount)::bigint           AS amount,
+                         SUM(spendings_count)::bigint AS spendings_count
+                  FROM spending_rollups
+                  WHERE group_id = $1
+                    AND period = $2
+                    AND ($3::date IS NULL OR bucket >= $3::date)
+                    AND ($4::date IS NULL OR bucket <= $4::date)
+                    AND spendings_count <> 0
+                  GROUP BY GROUPING SETS ((bucket, currency), (owner_id, currency), (category, currency))
+                  """
+            await execute_prepared(cur, "select_group_stats", sql, (group_id, period, since, until))
+            return await cur.fetchall()
+
+
+async def rebuild_spending_rollups(group_id: Optional[str] = None) -> int:
+    """
+    Recalcule les agrégats de dépenses de tous les groupes, ou d'un seul, et retourne le nombre de lignes écrites.
+    Doit être appelé dans une transaction.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            # Writers block on their rollup update until the rebuild commits, then apply their delta on top
+            await cur.execute("LOCK TABLE spending_rollups IN EXCLUSIVE MODE")
+            await cur.execute("""
+                              DELETE FROM spending_rollups
+                              WHERE %(group_id)s::ulid IS NULL OR group_id = %(group_id)s::ulid
+                              """, {"group_id": group_id})
+            await cur.execute(f"""
+                              WITH inserted AS (
+                                  INSERT INTO spending_rollups (group_id, period, bucket, owner_id, category, currency,
+                                                                amount, spendings_count)
+                                  {EXPECTED_SPENDING_ROLLUPS_SQL}
+                                  RETURNING 1
+                              )
+                              SELECT COUNT(*) AS rows_count FROM inserted
+                              """, {"group_id": group_id})
+            result = await cur.fetchone()
+            return result["rows_count"]
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from psycopg2.extras import RealDictRow
 
+from app.db.drivers import Row
 from app.db.settings import connection_async
+from app.db.statements import execute_prepared
 from app.schemas.users import UserCreate
 from app.utils.schemas import get_ulid_to_string
 from pydantic_extra_types.ulid import ULID
@@ -9,40 +10,40 @@ from pydantic_extra_types.ulid import ULID
 router = APIRouter()
 
 
-async def select_user_by_id(user_id: str) -> RealDictRow:
+async def select_user_by_id(user_id: str) -> Row:
     """
     Affiche un utilisateur stocké dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM users WHERE id = %s"
-            await cur.execute(sql, (user_id,))
+            sql = "SELECT * FROM users WHERE id = $1"
+            await execute_prepared(cur, "select_user_by_id", sql, (user_id,))
             return await cur.fetchone()
 
 
-async def select_user_by_email(email: str) -> RealDictRow:
+async def select_user_by_email(email: str) -> Row:
     """
     Affiche un utilisateur stocké dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM users WHERE email = %(email)s"
-            await cur.execute(sql, {"email": email})
+            sql = "SELECT * FROM users WHERE email = $1"
+            await execute_prepared(cur, "select_user_by_email", sql, (email,))
             return await cur.fetchone()
 
 
-async def select_users_by_group(group_id: ULID) -> list[RealDictRow]:
+async def select_users_by_group(group_id: ULID) -> list[Row]:
     """
     Affiche tout les utilisateurs d'un groupe stockés dans la BDD.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
-            sql = "SELECT * FROM users_groups WHERE group_id = %(group_id)s"
-            await cur.execute(sql, {"group_id": get_ulid_to_string(group_id)})
+            sql = "SELECT * FROM users_groups WHERE group_id = $1"
+            await execute_prepared(cur, "select_users_by_group", sql, (get_ulid_to_string(group_id),))
             return await cur.fetchall()
 
 
-async def insert_user(user: UserCreate) -> RealDictRow:
+async def insert_user(user: UserCreate) -> Row:
     """
     Crée un utilisateur dans la BDD.
     """
@@ -71,7 +72,7 @@ async def insert_user(user: UserCreate) -> RealDictRow:
             return await cur.fetchone()
 
 
-async def update_user(user_id: str, user: UserCreate) -> RealDictRow:
+async def update_user(user_id: str, user: UserCreate) -> Row:
     """
     Modifie un utilisateur dans la BDD.
     """
@@ -92,7 +93,7 @@ async def update_user(user_id: str, user: UserCreate) -> RealDictRow:
                 "firstname": user.firstname,
                 "lastname": user.lastname,
                 "password": user.password.get_secret_value(),
-                "date_of_birth": user.date_of_birth,
+                "year_of_birth": user.year_of_birth,
                 "address": user.address,
                 "phone_number": user.phone_number,
                 "email": user.email,
@@ -100,3 +101,13 @@ async def update_user(user_id: str, user: UserCreate) -> RealDictRow:
             }
             await cur.execute(sql, params)
             return await cur.fetchone()
+
+
+async def update_user_password(user_id: str, password: str) -> None:
+    """
+    Remplace le hash du mot de passe d'un utilisateur.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = "UPDATE users SET password = $2 WHERE id = $1"
+            await execute_prepared(cur, "update_user_password", sql, (user_id, password))
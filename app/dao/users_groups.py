@@ -1,12 +1,12 @@
-from psycopg2.extras import RealDictRow
-
+from app.db.drivers import Row
 from app.db.settings import connection_async
+from app.db.statements import execute_prepared
 from pydantic_extra_types.ulid import ULID
 
 from app.utils.schemas import get_ulid_to_string
 
 
-async def add_user_to_group(user_id: ULID, group_id: str) -> RealDictRow:
+async def add_user_to_group(user_id: ULID, group_id: str) -> Row:
     """
     Ajoute un utilisateur à un groupe.
     """
@@ -63,18 +63,14 @@ async def is_user_in_group(user_id: str, group_id: str) -> bool:
         async with conn.cursor() as cur:
             sql = """
                 SELECT 1 FROM users_groups
-                WHERE user_id = %(user_id)s AND group_id = %(group_id)s
+                WHERE user_id = $1 AND group_id = $2
             """
-            params = {
-                "user_id": user_id,
-                "group_id": group_id
-            }
-            await cur.execute(sql, params)
+            await execute_prepared(cur, "is_user_in_group", sql, (user_id, group_id))
             result = await cur.fetchone()
             return result is not None
 
 
-async def get_users_in_group(group_id: str) -> list[RealDictRow]:
+async def get_users_in_group(group_id: str) -> list[Row]:
     """
     Récupère tous les utilisateurs membres d'un groupe.
     """
@@ -83,28 +79,36 @@ async def get_users_in_group(group_id: str) -> list[RealDictRow]:
             sql = """
                 SELECT u.* FROM users u
                 JOIN users_groups ug ON u.id = ug.user_id
-                WHERE ug.group_id = %(group_id)s
+                WHERE ug.group_id = $1
             """
-            params = {
-                "group_id": group_id
-            }
-            await cur.execute(sql, params)
+            await execute_prepared(cur, "get_users_in_group", sql, (group_id,))
             return await cur.fetchall()
 
 
-async def get_groups_for_user(user_id: ULID) -> list[RealDictRow]:
+async def get_groups_for_user(user_id: ULID, after: str, limit: int) -> list[Row]:
     """
-    Récupère tous les groupes dont un utilisateur est membre.
+    Récupère les groupes dont un utilisateur est membre, du plus récent au plus ancien,
+    à partir du curseur `after`.
     """
     async with connection_async() as conn:
         async with conn.cursor() as cur:
             sql = """
                 SELECT g.* FROM groups g
                 JOIN users_groups ug ON g.id = ug.group_id
-                WHERE ug.user_id = %(user_id)s
+                WHERE ug.user_id = $1 AND ug.group_id < $2
+                ORDER BY ug.group_id DESC
+                LIMIT $3
             """
-            params = {
-                "user_id": get_ulid_to_string(user_id)
-            }
-            await cur.execute(sql, params)
-            return await cur.fetchall()
\ No newline at end of file
+            await execute_prepared(cur, "get_groups_for_user", sql, (get_ulid_to_string(user_id), after, limit))
+            return await cur.fetchall()
+
+
+async def select_group_member_ids(group_id: str) -> list[str]:
+    """
+    Récupère les identifiants des membres d'un groupe, triés.
+    """
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            sql = "SELECT user_id::text AS user_id FROM users_groups WHERE group_id = $1 ORDER BY user_id"
+            await execute_prepared(cur, "select_group_member_ids", sql, (group_id,))
+            return [row["user_id"] for row in await cur.fetchall()]
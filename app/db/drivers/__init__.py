@@ -0,0 +1,22 @@
+from importlib import import_module
+
+from app.db.drivers.base import Driver, DriverConnection, DriverCursor, Row
+
+# Available drivers: {name: (module, class)}, imported lazily so that only the selected one is required
+DRIVERS = {
+    "aiopg": ("app.db.drivers.aiopg_driver", "AiopgDriver"),
+    "asyncpg": ("app.db.drivers.asyncpg_driver", "AsyncpgDriver"),
+}
+
+
+def get_driver_class(name: str) -> type[Driver]:
+    """
+    Retourne la classe du driver de base de données configuré.
+    """
+    if name not in DRIVERS:
+        raise ValueError(f"Unknown database driver {name!r}, expected one of {', '.join(DRIVERS)}")
+    module_name, class_name = DRIVERS[name]
+    return getattr(import_module(module_name), class_name)
+
+
+__all__ = ["Driver", "DriverConnection", "DriverCursor", "Row", "get_driver_class"]
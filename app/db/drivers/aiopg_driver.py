@@ -0,0 +1,190 @@
+"""
+aiopg (psycopg2) implementation of the database driver.
+"""
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from itertools import count
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, Sequence, Set
+from weakref import WeakKeyDictionary
+
+import aiopg
+from psycopg2.extras import RealDictCursor
+
+from app.core.config import Settings
+from app.db.drivers.base import Driver, DriverConnection, DriverCursor, Row
+from app.db.statements import prepared_hits, prepared_misses
+
+# Statements already prepared on each connection: {connection: {name}}
+_prepared: "WeakKeyDictionary[aiopg.Connection, Set[str]]" = WeakKeyDictionary()
+
+# Suffixes of server-side cursor names
+_cursor_ids = count()
+
+
+def _csv_value(value: Any) -> Any:
+    # Booleans are written the way PostgreSQL's COPY writes them
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+class AiopgCursor(DriverCursor):
+
+    def __init__(self, cur: aiopg.Cursor):
+        self.raw = cur
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]] = None) -> None:
+        await self.raw.execute(sql, params)
+
+    async def execute_prepared(self, name: str, sql: str, params: Sequence[Any] = ()) -> None:
+        prepared = _prepared.setdefault(self.raw.connection, set())
+        if name in prepared:
+            prepared_hits.inc()
+        else:
+            prepared_misses.inc()
+            await self.raw.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+
+        if params:
+            placeholders = ", ".join(["%s"] * len(params))
+            await self.raw.execute(f"EXECUTE {name}({placeholders})", tuple(params))
+        else:
+            await self.raw.execute(f"EXECUTE {name}")
+
+    async def fetchone(self) -> Optional[Row]:
+        return await self.raw.fetchone()
+
+    async def fetchall(self) -> list[Row]:
+        return await self.raw.fetchall()
+
+
+class AiopgConnection(DriverConnection):
+
+    def __init__(self, conn: aiopg.Connection):
+        self.raw = conn
+
+    @asynccontextmanager
+    async def cursor(self) -> AsyncIterator[AiopgCursor]:
+        async with self.raw.cursor() as cur:
+            yield AiopgCursor(cur)
+
+    async def stream(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+                     chunk_size: int) -> AsyncIterator[list[Row]]:
+        # psycopg2 does not support named cursors in asynchronous mode: declare it in SQL
+        name = f"cooloc_stream_{next(_cursor_ids)}"
+        async with self.raw.cursor() as cur:
+            await cur.execute(f"DECLARE {name} NO SCROLL CURSOR FOR {sql}", params)
+            while True:
+                await cur.execute(f"FETCH FORWARD {int(chunk_size)} FROM {name}")
+                rows = await cur.fetchall()
+                if not rows:
+                    break
+                yield rows
+            await cur.execute(f"CLOSE {name}")
+
+    async def copy_to_csv(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+                          chunk_size: int) -> AsyncIterator[bytes]:
+        # No COPY TO STDOUT in asynchronous mode either: format the rows of a server-side cursor like COPY does
+        name = f"cooloc_stream_{next(_cursor_ids)}"
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        async with self.raw.cursor() as cur:
+            await cur.execute(f"DECLARE {name} NO SCROLL CURSOR FOR {sql}", params)
+            header_written = False
+            while True:
+                await cur.execute(f"FETCH FORWARD {int(chunk_size)} FROM {name}")
+                rows = await cur.fetchall()
+                if not header_written:
+                    writer.writerow(column.name for column in cur.description)
+                    header_written = True
+                writer.writerows([_csv_value(value) for value in row.values()] for row in rows)
+                if buffer.tell():
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if not rows:
+                    break
+            await cur.execute(f"CLOSE {name}")
+
+    async def copy_records(self, table: str, columns: Sequence[str], records: Sequence[Sequence[Any]]) -> None:
+        # psycopg2 does not support COPY in asynchronous mode: send the batch as one JSON document
+        column_list = ", ".join(columns)
+        sql = f"""
+              INSERT INTO {table} ({column_list})
+              SELECT {column_list} FROM json_populate_recordset(NULL::{table}, %s::json)
+              """
+        payload = json.dumps([dict(zip(columns, record)) for record in records], default=str)
+        async with self.raw.cursor() as cur:
+            await cur.execute(sql, (payload,))
+
+
+class AiopgDriver(Driver):
+    """
+    Driver historique : psycopg2 en mode asynchrone, protocole texte, lignes RealDictRow.
+    """
+    name = "aiopg"
+
+    def __init__(self, pool: aiopg.Pool):
+        self.pool = pool
+
+    @classmethod
+    async def create(cls, conf: Settings) -> "AiopgDriver":
+        options = {}
+        if conf.STATEMENT_TIMEOUT_MS > 0:
+            options["options"] = f"-c statement_timeout={conf.STATEMENT_TIMEOUT_MS}"
+
+        pool = await aiopg.create_pool(
+            minsize=conf.POOL_MIN_SIZE,
+            maxsize=conf.POOL_MAX_SIZE,
+            timeout=conf.POOL_TIMEOUT,
+            pool_recycle=conf.POOL_RECYCLE,
+            **{
+                "host": conf.HOST,
+                "port": int(conf.PORT),
+                "database": conf.DB_NAME,
+                "user": conf.USER,
+                "password": conf.PASSWORD.get_secret_value(),
+                "cursor_factory": RealDictCursor,
+                **options,
+            })
+        return cls(pool)
+
+    async def acquire(self) -> AiopgConnection:
+        return AiopgConnection(await self.pool.acquire())
+
+    async def release(self, conn: AiopgConnection) -> None:
+        await self.pool.release(conn.raw)
+
+    async def close(self) -> None:
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    async def listen(self, channel: str, callback: Callable[[str], None],
+                     on_listening: Optional[Callable[[], None]] = None) -> None:
+        conn = await self.pool.acquire()
+        try:
+            async with conn.cursor() as cur:
+                await cur.execute(f"LISTEN {channel}")
+            if on_listening is not None:
+                on_listening()
+            while True:
+                notify = await conn.notifies.get()
+                callback(notify.payload)
+        finally:
+            # Never hand a LISTENing connection back to the pool: close it, the pool drops closed connections
+            await conn.close()
+            await self.pool.release(conn)
+
+    @property
+    def size(self) -> int:
+        return self.pool.size
+
+    @property
+    def freesize(self) -> int:
+        return self.pool.freesize
+
+    @property
+    def maxsize(self) -> int:
+        return self.pool.maxsize
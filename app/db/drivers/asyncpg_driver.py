@@ -0,0 +1,237 @@
+"""
+asyncpg implementation of the database driver: binary protocol, native prepared
+statements and Record rows.
+"""
+import asyncio
+import json
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, Sequence
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+from app.core.config import Settings
+from app.db.drivers.base import Driver, DriverConnection, DriverCursor, Row
+from app.db.statements import prepared_hits, prepared_misses
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+@lru_cache(maxsize=512)
+def translate_query(sql: str) -> tuple[str, tuple[str, ...] | int]:
+    """
+    Traduit une requête aux paramètres psycopg (`%(name)s` ou `%s`) en requête asyncpg (`$1`, `$2`, ...).
+    Retourne la requête traduite et l'ordre des paramètres nommés (ou le nombre de paramètres positionnels).
+    """
+    names: list[str] = []
+    positional = 0
+
+    def substitute(match: re.Match) -> str:
+        nonlocal positional
+        if match.group(0) == "%%":
+            return "%"
+        if match.group(1) is None:
+            positional += 1
+            return f"${positional}"
+        if match.group(1) not in names:
+            names.append(match.group(1))
+        return f"${names.index(match.group(1)) + 1}"
+
+    translated = _PLACEHOLDER.sub(substitute, sql)
+    if names and positional:
+        raise ValueError("Cannot mix named and positional parameters in the same query")
+    return translated, tuple(names) if names else positional
+
+
+def _adapt(value: Any) -> Any:
+    # psycopg2 sends aware datetimes as text and PostgreSQL drops the offset for TIMESTAMP columns
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def bind_params(sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]]) -> tuple[str, list[Any]]:
+    """
+    Traduit la requête et ordonne ses paramètres pour asyncpg.
+    """
+    translated, order = translate_query(sql)
+    if params is None:
+        return translated, []
+    if isinstance(order, tuple):
+        return translated, [_adapt(params[name]) for name in order]
+    return translated, [_adapt(value) for value in params]
+
+
+class CoolocConnection(asyncpg.Connection):
+    """
+    Connexion asyncpg portant le registre de ses requêtes préparées nommées.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: dict[str, PreparedStatement] = {}
+
+
+class AsyncpgCursor(DriverCursor):
+
+    def __init__(self, conn: CoolocConnection):
+        self.conn = conn
+        self.rows: list[asyncpg.Record] = []
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]] = None) -> None:
+        query, args = bind_params(sql, params)
+        self.rows = await self.conn.fetch(query, *args)
+
+    async def execute_prepared(self, name: str, sql: str, params: Sequence[Any] = ()) -> None:
+        statement = self.conn.prepared_statements.get(name)
+        if statement is not None:
+            prepared_hits.inc()
+        else:
+            prepared_misses.inc()
+            statement = await self.conn.prepare(sql, name=name)
+            self.conn.prepared_statements[name] = statement
+        self.rows = await statement.fetch(*(_adapt(value) for value in params))
+
+    async def fetchone(self) -> Optional[Row]:
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self) -> list[Row]:
+        return self.rows
+
+
+class AsyncpgConnection(DriverConnection):
+
+    def __init__(self, conn: CoolocConnection):
+        self.raw = conn
+
+    @asynccontextmanager
+    async def cursor(self) -> AsyncIterator[AsyncpgCursor]:
+        yield AsyncpgCursor(self.raw)
+
+    async def stream(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+                     chunk_size: int) -> AsyncIterator[list[Row]]:
+        query, args = bind_params(sql, params)
+        cursor = await self.raw.cursor(query, *args)
+        while True:
+            rows = await cursor.fetch(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+    async def copy_to_csv(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+                          chunk_size: int) -> AsyncIterator[bytes]:
+        # COPY TO STDOUT pushes its data to a callback: hand it over through a small bounded queue
+        # so that a slow client slows the COPY down instead of buffering the whole result
+        query, args = bind_params(sql, params)
+        chunks: asyncio.Queue[bytes | BaseException | None] = asyncio.Queue(maxsize=4)
+
+        async def copy() -> None:
+            try:
+                await self.raw.copy_from_query(query, *args, output=chunks.put, format="csv", header=True)
+            except Exception as e:
+                await chunks.put(e)
+            else:
+                await chunks.put(None)
+
+        task = asyncio.create_task(copy())
+        try:
+            while (chunk := await chunks.get()) is not None:
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                yield chunk
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    async def copy_records(self, table: str, columns: Sequence[str], records: Sequence[Sequence[Any]]) -> None:
+        await self.raw.copy_records_to_table(table, columns=list(columns),
+                                             records=[[_adapt(value) for value in record] for record in records])
+
+
+async def _init_connection(conn: CoolocConnection) -> None:
+    # ULIDs are exchanged as text, JSON columns are decoded like psycopg2 does
+    await conn.set_type_codec("ulid", encoder=str, decoder=str, schema="public", format="text")
+    await conn.set_type_codec("json", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+class AsyncpgDriver(Driver):
+    """
+    Driver asyncpg : protocole binaire, requêtes préparées natives, lignes Record.
+    """
+    name = "asyncpg"
+
+    def __init__(self, pool: asyncpg.Pool, acquire_timeout: float):
+        self.pool = pool
+        self.acquire_timeout = acquire_timeout
+
+    @classmethod
+    async def create(cls, conf: Settings) -> "AsyncpgDriver":
+        server_settings = {}
+        if conf.STATEMENT_TIMEOUT_MS > 0:
+            server_settings["statement_timeout"] = str(conf.STATEMENT_TIMEOUT_MS)
+
+        pool = await asyncpg.create_pool(
+            min_size=conf.POOL_MIN_SIZE,
+            max_size=conf.POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=conf.POOL_RECYCLE,
+            timeout=conf.POOL_TIMEOUT,
+            connection_class=CoolocConnection,
+            init=_init_connection,
+            server_settings=server_settings,
+            host=conf.HOST,
+            port=int(conf.PORT),
+            database=conf.DB_NAME,
+            user=conf.USER,
+            password=conf.PASSWORD.get_secret_value(),
+        )
+        return cls(pool, conf.POOL_TIMEOUT)
+
+    async def acquire(self) -> AsyncpgConnection:
+        return AsyncpgConnection(await self.pool.acquire(timeout=self.acquire_timeout))
+
+    async def release(self, conn: AsyncpgConnection) -> None:
+        await self.pool.release(conn.raw)
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def listen(self, channel: str, callback: Callable[[str], None],
+                     on_listening: Optional[Callable[[], None]] = None) -> None:
+        conn = await self.pool.acquire(timeout=self.acquire_timeout)
+        terminated = asyncio.get_running_loop().create_future()
+
+        def on_notification(_conn: CoolocConnection, _pid: int, _channel: str, payload: str) -> None:
+            callback(payload)
+
+        def on_termination(_conn: CoolocConnection) -> None:
+            if not terminated.done():
+                terminated.set_result(None)
+
+        conn.add_termination_listener(on_termination)
+        try:
+            await conn.add_listener(channel, on_notification)
+            if on_listening is not None:
+                on_listening()
+            await terminated
+            raise ConnectionError(f"LISTEN connection on {channel} lost")
+        finally:
+            conn.remove_termination_listener(on_termination)
+            # Releasing resets the connection, listeners included (UNLISTEN *)
+            await self.pool.release(conn)
+
+    @property
+    def size(self) -> int:
+        return self.pool.get_size()
+
+    @property
+    def freesize(self) -> int:
+        return self.pool.get_idle_size()
+
+    @property
+    def maxsize(self) -> int:
+        return self.pool.get_max_size()
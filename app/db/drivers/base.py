@@ -0,0 +1,126 @@
+"""
+Minimal database driver interface the DAO layer is written against.
+
+A driver owns a connection pool and hands out connections whose cursors follow the
+DB-API shape used throughout app/dao: `execute(sql, params)` with psycopg-style
+`%(name)s` / `%s` placeholders, then `fetchone()` / `fetchall()`.
+"""
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, Sequence
+
+from app.core.config import Settings
+
+# A row returned by a driver: a dict-like RealDictRow (aiopg) or a Record (asyncpg)
+Row = Mapping[str, Any]
+
+
+class DriverCursor(ABC):
+    """
+    Curseur : exécute une requête puis expose ses lignes.
+    """
+
+    @abstractmethod
+    async def execute(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def execute_prepared(self, name: str, sql: str, params: Sequence[Any] = ()) -> None:
+        """
+        Exécute une requête préparée côté serveur (paramètres `$1`, `$2`, ...),
+        préparée au premier appel sur la connexion puis réutilisée.
+        """
+
+    @abstractmethod
+    async def fetchone(self) -> Optional[Row]:
+        ...
+
+    @abstractmethod
+    async def fetchall(self) -> list[Row]:
+        ...
+
+
+class DriverConnection(ABC):
+    """
+    Connexion empruntée au pool du driver.
+    """
+
+    @abstractmethod
+    def cursor(self) -> AbstractAsyncContextManager[DriverCursor]:
+        ...
+
+    @abstractmethod
+    def stream(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+               chunk_size: int) -> AsyncIterator[list[Row]]:
+        """
+        Parcourt le résultat d'une requête par lots de `chunk_size` lignes via un curseur
+        côté serveur, sans charger tout le résultat en mémoire. Doit être appelé dans une transaction.
+        """
+
+    @abstractmethod
+    async def copy_records(self, table: str, columns: Sequence[str], records: Sequence[Sequence[Any]]) -> None:
+        """
+        Charge en masse des lignes dans une table.
+        """
+
+    @abstractmethod
+    def copy_to_csv(self, sql: str, params: Optional[Sequence[Any] | Mapping[str, Any]],
+                    chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Exporte le résultat d'une requête en CSV (avec en-tête) par morceaux, à la manière de
+        `COPY (...) TO STDOUT`, sans charger tout le résultat en mémoire. Doit être appelé dans une transaction.
+        """
+
+
+class Driver(ABC):
+    """
+    Pool de connexions PostgreSQL.
+    """
+    name: str
+
+    @classmethod
+    @abstractmethod
+    async def create(cls, conf: Settings) -> "Driver":
+        ...
+
+    @abstractmethod
+    async def acquire(self) -> DriverConnection:
+        ...
+
+    @abstractmethod
+    async def release(self, conn: DriverConnection) -> None:
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        ...
+
+    @abstractmethod
+    async def listen(self, channel: str, callback: Callable[[str], None],
+                     on_listening: Optional[Callable[[], None]] = None) -> None:
+        """
+        Écoute un canal NOTIFY sur une connexion dédiée du pool et passe chaque payload à `callback`.
+        `on_listening` est appelé une fois le LISTEN actif. Tourne jusqu'à annulation ;
+        lève une exception si la connexion est perdue.
+        """
+
+    @property
+    @abstractmethod
+    def size(self) -> int:
+        """
+        Nombre de connexions ouvertes.
+        """
+
+    @property
+    @abstractmethod
+    def freesize(self) -> int:
+        """
+        Nombre de connexions libres.
+        """
+
+    @property
+    @abstractmethod
+    def maxsize(self) -> int:
+        """
+        Nombre maximal de connexions.
+        """
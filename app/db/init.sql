@@ -24,6 +24,7 @@ CREATE TABLE IF NOT EXISTS groups (
     agency_phone VARCHAR(15),
     starting_at TIMESTAMP,
     ending_at TIMESTAMP,
+    base_currency VARCHAR(3) NOT NULL DEFAULT 'EUR', -- summaries and settlements are converted to it
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     deleted_at TIMESTAMP DEFAULT NULL
 );
@@ -43,9 +44,14 @@ CREATE TABLE IF NOT EXISTS spendings (
     id ULID PRIMARY KEY DEFAULT gen_ulid(),
     name VARCHAR(255) NOT NULL,
     description TEXT,
-    amount DECIMAL(10, 2) NOT NULL,
+    amount BIGINT NOT NULL, -- in minor units of the currency (cents)
     currency VARCHAR(3) NOT NULL,
-    is_reimbursed BOOLEAN DEFAULT FALSE,
+    is_reimbursed BOOLEAN NOT NULL DEFAULT TRUE, -- unpaid_count = 0, maintained by the unpaid_count trigger
+    unpaid_count INT NOT NULL DEFAULT 0,
+    split_strategy VARCHAR(10) NOT NULL DEFAULT 'equal',
+    split_values JSONB,
+    category VARCHAR(50) NOT NULL DEFAULT 'other',
+    spent_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     deleted_at TIMESTAMP DEFAULT NULL,
     owner_id ULID REFERENCES users(id) ON DELETE CASCADE,
@@ -67,7 +73,7 @@ CREATE TABLE IF NOT EXISTS users_documents (
 CREATE TABLE IF NOT EXISTS spending_reimbursements (
     spending_id ULID REFERENCES spendings(id) ON DELETE CASCADE,
     user_id ULID REFERENCES users(id) ON DELETE CASCADE,
-    reimbursement_amount DECIMAL(10, 2) NOT NULL,
+    reimbursement_amount BIGINT NOT NULL, -- in minor units of the currency (cents)
     reimbursed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (spending_id, user_id)
 );
@@ -99,3 +105,284 @@ CREATE TRIGGER spendings_set_updated_at
 BEFORE UPDATE ON spendings
 FOR EACH ROW
 EXECUTE FUNCTION update_updated_at_column();
+
+-- Cache invalidation bus: every worker LISTENs on 'cache_invalidation' and evicts the cached
+-- entity named by the payload ('user:<id>', 'group:<id>'). Notifications are only delivered on
+-- commit, and duplicates within a transaction are folded into one by PostgreSQL.
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('cache_invalidation', TG_ARGV[0] || ':' || OLD.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_cache_invalidation
+AFTER UPDATE OR DELETE ON users
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation('user');
+
+CREATE TRIGGER groups_cache_invalidation
+AFTER UPDATE OR DELETE ON groups
+FOR EACH ROW
+EXECUTE FUNCTION notify_cache_invalidation('group');
+
+-- Keyset pagination indexes (ORDER BY id DESC with a cursor on the ULID)
+CREATE INDEX IF NOT EXISTS spendings_group_id_id_idx ON spendings (group_id, id);
+CREATE INDEX IF NOT EXISTS documents_group_id_id_idx ON documents (group_id, id);
+CREATE INDEX IF NOT EXISTS documents_owner_id_id_idx ON documents (owner_id, id);
+CREATE INDEX IF NOT EXISTS spending_reimbursements_user_id_spending_id_idx ON spending_reimbursements (user_id, spending_id);
+
+-- Outstanding balances between members of a group: what debtor still owes creditor for the
+-- unpaid shares of non-deleted spendings. Maintained by the triggers below, so that balance
+-- reads never rescan spending_reimbursements (check it with `python -m app.jobs.verify_balances`).
+CREATE TABLE IF NOT EXISTS balances (
+    group_id ULID REFERENCES groups(id) ON DELETE CASCADE,
+    debtor_id ULID REFERENCES users(id) ON DELETE CASCADE,
+    creditor_id ULID REFERENCES users(id) ON DELETE CASCADE,
+    currency VARCHAR(3) NOT NULL, -- currency of the spendings, converted on read
+    amount BIGINT NOT NULL DEFAULT 0, -- in minor units of the currency (cents)
+    PRIMARY KEY (group_id, debtor_id, creditor_id, currency)
+);
+
+CREATE INDEX IF NOT EXISTS balances_debtor_id_idx ON balances (debtor_id);
+CREATE INDEX IF NOT EXISTS balances_creditor_id_idx ON balances (creditor_id);
+
+-- Amounts are added with an upsert and removed with a plain UPDATE: a removal can come from a
+-- cascade (group or user deleted) whose balances rows are already gone and must not be recreated.
+-- Statement-level, so that a bulk insert of reimbursements updates each balance once.
+CREATE OR REPLACE FUNCTION balances_apply_reimbursement_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE balances b
+        SET amount = b.amount - removed.amount
+        FROM (SELECT s.group_id, o.user_id, s.owner_id, s.currency, SUM(o.reimbursement_amount) AS amount
+              FROM old_rows o
+              JOIN spendings s ON s.id = o.spending_id
+              WHERE o.reimbursed_at IS NULL AND s.deleted_at IS NULL
+              GROUP BY s.group_id, o.user_id, s.owner_id, s.currency) removed
+        WHERE b.group_id = removed.group_id
+          AND b.debtor_id = removed.user_id
+          AND b.creditor_id = removed.owner_id
+          AND b.currency = removed.currency;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO balances (group_id, debtor_id, creditor_id, currency, amount)
+        SELECT s.group_id, n.user_id, s.owner_id, s.currency, SUM(n.reimbursement_amount)
+        FROM new_rows n
+        JOIN spendings s ON s.id = n.spending_id
+        WHERE n.reimbursed_at IS NULL AND s.deleted_at IS NULL
+        GROUP BY s.group_id, n.user_id, s.owner_id, s.currency
+        ON CONFLICT (group_id, debtor_id, creditor_id, currency) DO UPDATE SET amount = balances.amount + EXCLUDED.amount;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER spending_reimbursements_balances_insert
+AFTER INSERT ON spending_reimbursements
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION balances_apply_reimbursement_changes();
+
+CREATE TRIGGER spending_reimbursements_balances_update
+AFTER UPDATE ON spending_reimbursements
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION balances_apply_reimbursement_changes();
+
+CREATE TRIGGER spending_reimbursements_balances_delete
+AFTER DELETE ON spending_reimbursements
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION balances_apply_reimbursement_changes();
+
+-- A spending that is (soft) deleted, restored, moved or changes currency takes its unpaid shares with it
+CREATE OR REPLACE FUNCTION balances_apply_spending_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        UPDATE balances b
+        SET amount = b.amount - removed.amount
+        FROM (SELECT sr.user_id, SUM(sr.reimbursement_amount) AS amount
+              FROM spending_reimbursements sr
+              WHERE sr.spending_id = OLD.id AND sr.reimbursed_at IS NULL
+              GROUP BY sr.user_id) removed
+        WHERE b.group_id = OLD.group_id
+          AND b.debtor_id = removed.user_id
+          AND b.creditor_id = OLD.owner_id
+          AND b.currency = OLD.currency;
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.deleted_at IS NULL THEN
+        INSERT INTO balances (group_id, debtor_id, creditor_id, currency, amount)
+        SELECT NEW.group_id, sr.user_id, NEW.owner_id, NEW.currency, SUM(sr.reimbursement_amount)
+        FROM spending_reimbursements sr
+        WHERE sr.spending_id = NEW.id AND sr.reimbursed_at IS NULL
+        GROUP BY sr.user_id
+        ON CONFLICT (group_id, debtor_id, creditor_id, currency) DO UPDATE SET amount = balances.amount + EXCLUDED.amount;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER spendings_balances_update
+AFTER UPDATE OF deleted_at, group_id, owner_id, currency ON spendings
+FOR EACH ROW
+WHEN (OLD.deleted_at IS DISTINCT FROM NEW.deleted_at
+      OR OLD.group_id IS DISTINCT FROM NEW.group_id
+      OR OLD.owner_id IS DISTINCT FROM NEW.owner_id
+      OR OLD.currency IS DISTINCT FROM NEW.currency)
+EXECUTE FUNCTION balances_apply_spending_changes();
+
+-- Before the cascade removes the reimbursements, while their spending can still be joined
+CREATE TRIGGER spendings_balances_delete
+BEFORE DELETE ON spendings
+FOR EACH ROW
+EXECUTE FUNCTION balances_apply_spending_changes();
+
+-- Number of unpaid shares of each spending, kept in step with spending_reimbursements so that
+-- paying a share flips spendings.is_reimbursed within the same statement
+CREATE OR REPLACE FUNCTION spendings_apply_unpaid_count_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE spendings s
+        SET unpaid_count = s.unpaid_count + changes.delta,
+            is_reimbursed = s.unpaid_count + changes.delta = 0
+        FROM (SELECT spending_id, COUNT(*) AS delta
+              FROM new_rows
+              WHERE reimbursed_at IS NULL
+              GROUP BY spending_id) changes
+        WHERE s.id = changes.spending_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE spendings s
+        SET unpaid_count = s.unpaid_count - changes.delta,
+            is_reimbursed = s.unpaid_count - changes.delta = 0
+        FROM (SELECT spending_id, COUNT(*) AS delta
+              FROM old_rows
+              WHERE reimbursed_at IS NULL
+              GROUP BY spending_id) changes
+        WHERE s.id = changes.spending_id;
+    ELSE
+        UPDATE spendings s
+        SET unpaid_count = s.unpaid_count + changes.delta,
+            is_reimbursed = s.unpaid_count + changes.delta = 0
+        FROM (SELECT spending_id, SUM(delta) AS delta
+              FROM (SELECT spending_id, 1 AS delta FROM new_rows WHERE reimbursed_at IS NULL
+                    UNION ALL
+                    SELECT spending_id, -1 FROM old_rows WHERE reimbursed_at IS NULL) unpaid
+              GROUP BY spending_id
+              HAVING SUM(delta) <> 0) changes
+        WHERE s.id = changes.spending_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER spending_reimbursements_unpaid_count_insert
+AFTER INSERT ON spending_reimbursements
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spendings_apply_unpaid_count_changes();
+
+CREATE TRIGGER spending_reimbursements_unpaid_count_update
+AFTER UPDATE ON spending_reimbursements
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spendings_apply_unpaid_count_changes();
+
+CREATE TRIGGER spending_reimbursements_unpaid_count_delete
+AFTER DELETE ON spending_reimbursements
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spendings_apply_unpaid_count_changes();
+
+-- Spending totals of each group per day and per month, payer, category and currency, so that
+-- group statistics read a number of buckets instead of the whole spending history.
+-- Maintained by the triggers below (rebuild it with `python -m app.jobs.backfill_spending_rollups`).
+CREATE TABLE IF NOT EXISTS spending_rollups (
+    group_id ULID REFERENCES groups(id) ON DELETE CASCADE,
+    period VARCHAR(5) NOT NULL, -- 'day' or 'month'
+    bucket DATE NOT NULL, -- first day of the period
+    owner_id ULID REFERENCES users(id) ON DELETE CASCADE,
+    category VARCHAR(50) NOT NULL,
+    currency VARCHAR(3) NOT NULL,
+    amount BIGINT NOT NULL DEFAULT 0, -- in minor units of the currency (cents)
+    spendings_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (group_id, period, bucket, owner_id, category, currency)
+);
+
+-- Same rule as balances: additions are upserted, removals are plain UPDATEs so that a cascade
+-- does not recreate the rows of a deleted group or user. On UPDATE, old and new rows are netted
+-- out first, so that updates which do not touch the rollups (unpaid_count, name...) write nothing.
+CREATE OR REPLACE FUNCTION spending_rollups_apply_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO spending_rollups (group_id, period, bucket, owner_id, category, currency, amount, spendings_count)
+        SELECT n.group_id, p.period, date_trunc(p.period, n.spent_at)::date, n.owner_id, n.category, n.currency,
+               SUM(n.amount), COUNT(*)
+        FROM new_rows n
+        CROSS JOIN (VALUES ('day'), ('month')) AS p(period)
+        WHERE n.deleted_at IS NULL
+        GROUP BY 1, 2, 3, 4, 5, 6
+        ON CONFLICT (group_id, period, bucket, owner_id, category, currency) DO UPDATE
+        SET amount = spending_rollups.amount + EXCLUDED.amount,
+            spendings_count = spending_rollups.spendings_count + EXCLUDED.spendings_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE spending_rollups r
+        SET amount = r.amount - removed.amount,
+            spendings_count = r.spendings_count - removed.spendings_count
+        FROM (SELECT o.group_id, p.period, date_trunc(p.period, o.spent_at)::date AS bucket, o.owner_id,
+                     o.category, o.currency, SUM(o.amount) AS amount, COUNT(*) AS spendings_count
+              FROM old_rows o
+              CROSS JOIN (VALUES ('day'), ('month')) AS p(period)
+              WHERE o.deleted_at IS NULL
+              GROUP BY 1, 2, 3, 4, 5, 6) removed
+        WHERE r.group_id = removed.group_id
+          AND r.period = removed.period
+          AND r.bucket = removed.bucket
+          AND r.owner_id = removed.owner_id
+          AND r.category = removed.category
+          AND r.currency = removed.currency;
+    ELSE
+        INSERT INTO spending_rollups (group_id, period, bucket, owner_id, category, currency, amount, spendings_count)
+        SELECT changes.group_id, p.period, date_trunc(p.period, changes.spent_at)::date, changes.owner_id,
+               changes.category, changes.currency, SUM(changes.amount), SUM(changes.spendings_count)
+        FROM (SELECT group_id, spent_at, owner_id, category, currency, amount, 1 AS spendings_count
+              FROM new_rows WHERE deleted_at IS NULL
+              UNION ALL
+              SELECT group_id, spent_at, owner_id, category, currency, -amount, -1
+              FROM old_rows WHERE deleted_at IS NULL) changes
+        CROSS JOIN (VALUES ('day'), ('month')) AS p(period)
+        GROUP BY 1, 2, 3, 4, 5, 6
+        HAVING SUM(changes.amount) <> 0 OR SUM(changes.spendings_count) <> 0
+        ON CONFLICT (group_id, period, bucket, owner_id, category, currency) DO UPDATE
+        SET amount = spending_rollups.amount + EXCLUDED.amount,
+            spendings_count = spending_rollups.spendings_count + EXCLUDED.spendings_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER spendings_rollups_insert
+AFTER INSERT ON spendings
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spending_rollups_apply_changes();
+
+CREATE TRIGGER spendings_rollups_update
+AFTER UPDATE ON spendings
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spending_rollups_apply_changes();
+
+CREATE TRIGGER spendings_rollups_delete
+AFTER DELETE ON spendings
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION spending_rollups_apply_changes();
@@ -1,40 +1,202 @@
+import asyncio
 import logging
-from typing import AsyncContextManager
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable
 
-import aiopg
 import logger
-from aiopg import Connection
-from psycopg2.extras import RealDictCursor
 
+from app.core import metrics
+from app.core.cache import apply_invalidation, clear_invalidation_targets
 from app.core.config import Settings
+from app.db.drivers import Driver, DriverConnection, get_driver_class
 
 logger = logging.getLogger(__name__)
 
+POOL: Driver | None = None
+
+# NOTIFY channel of the cache invalidation triggers (see init.sql)
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+# Delay before listening again after the LISTEN connection was lost
+CACHE_INVALIDATION_RETRY_INTERVAL = 5
+
+# Connection bound to the current request/transaction, shared by every DAO call
+_scoped_connection: ContextVar[DriverConnection | None] = ContextVar("scoped_connection", default=None)
+# Callbacks to run once the current transaction has committed
+_after_commit: ContextVar[list[Callable[[], None]] | None] = ContextVar("after_commit", default=None)
+
+pool_waiters = metrics.gauge("db_pool_waiters", "Number of coroutines waiting for a PostgreSQL connection")
+pool_acquire_wait = metrics.histogram("db_pool_acquire_wait_seconds", "Time spent waiting for a PostgreSQL connection")
+pool_acquire_timeouts = metrics.counter("db_pool_acquire_timeouts_total", "Number of connection acquisitions that timed out")
+metrics.gauge("db_pool_size", "Number of open PostgreSQL connections", lambda: POOL.size if POOL else 0)
+metrics.gauge("db_pool_idle", "Number of idle PostgreSQL connections", lambda: POOL.freesize if POOL else 0)
+metrics.gauge("db_pool_in_use", "Number of PostgreSQL connections in use",
+              lambda: POOL.size - POOL.freesize if POOL else 0)
+metrics.gauge("db_pool_max_size", "Maximum number of PostgreSQL connections", lambda: POOL.maxsize if POOL else 0)
+
+
 async def initialize_postgres_pool():
     conf = Settings()
     global POOL
 
-    POOL = await aiopg.create_pool(
-        minsize=0,
-        maxsize=5,
-        timeout=60,
-        pool_recycle=15,
-        **{
-            "host": conf.HOST,
-            "port": int(conf.PORT),
-            "database": conf.DB_NAME,
-            "user": conf.USER,
-            "password": conf.PASSWORD.get_secret_value(),
-            "cursor_factory": RealDictCursor
-        })
-    logger.info("Pool de connexions à PostgreSQL initialisé")
+    POOL = await get_driver_class(conf.DRIVER).create(conf)
+    logger.info("Pool de connexions à PostgreSQL initialisé (driver=%s, min=%s, max=%s, recycle=%ss)",
+                POOL.name, conf.POOL_MIN_SIZE, conf.POOL_MAX_SIZE, conf.POOL_RECYCLE)
+
+    if conf.POOL_WARMUP:
+        await warm_up_postgres_pool(conf.POOL_MIN_SIZE)
+
+
+async def warm_up_postgres_pool(size: int) -> None:
+    """
+    Ouvre et vérifie `size` connexions pour éviter un démarrage à froid.
+    """
+
+    async def ping():
+        async with connection_async() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
+
+    size = min(size, POOL.maxsize)
+    if size > 0:
+        await asyncio.gather(*(ping() for _ in range(size)))
+    logger.info("Pool de connexions à PostgreSQL préchauffé (%s connexions)", POOL.size)
 
 
 async def close_postgres_pool():
     if POOL:
-        POOL.close()
-        await POOL.wait_closed()
+        await POOL.close()
     logger.info("Pool de connexions à PostgreSQL fermé")
 
-def connection_async() -> AsyncContextManager[Connection]:
-    return POOL.acquire()
\ No newline at end of file
+
+def log_postgres_pool_stats() -> None:
+    """
+    Journalise l'état courant du pool de connexions.
+    """
+    if not POOL:
+        return
+    logger.info(
+        "Pool PostgreSQL: taille=%s, utilisées=%s, libres=%s, en attente=%s, attente moyenne=%.4fs",
+        POOL.size,
+        POOL.size - POOL.freesize,
+        POOL.freesize,
+        pool_waiters.get(),
+        pool_acquire_wait.sum / pool_acquire_wait.count if pool_acquire_wait.count else 0.0,
+    )
+
+
+async def report_postgres_pool_stats(interval: float) -> None:
+    """
+    Journalise périodiquement l'état du pool de connexions.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        log_postgres_pool_stats()
+
+
+async def listen_cache_invalidations() -> None:
+    """
+    Écoute les invalidations de cache émises par PostgreSQL sur une connexion dédiée du pool
+    et retire les entités modifiées des caches du processus, jusqu'à annulation.
+    Les notifications émises pendant une coupure sont perdues : les caches sont vidés à chaque reconnexion.
+    """
+    while True:
+        try:
+            await POOL.listen(CACHE_INVALIDATION_CHANNEL, apply_invalidation, clear_invalidation_targets)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Écoute des invalidations de cache interrompue, reprise dans %ss",
+                             CACHE_INVALIDATION_RETRY_INTERVAL)
+        clear_invalidation_targets()
+        await asyncio.sleep(CACHE_INVALIDATION_RETRY_INTERVAL)
+
+
+@asynccontextmanager
+async def connection_async() -> AsyncIterator[DriverConnection]:
+    """
+    Fournit la connexion de la transaction en cours si elle existe, sinon une connexion du pool.
+    """
+    conn = _scoped_connection.get()
+    if conn is not None:
+        yield conn
+        return
+
+    started_at = time.perf_counter()
+    pool_waiters.inc()
+    try:
+        conn = await POOL.acquire()
+    except asyncio.TimeoutError:
+        pool_acquire_timeouts.inc()
+        raise
+    finally:
+        pool_waiters.dec()
+        pool_acquire_wait.observe(time.perf_counter() - started_at)
+    try:
+        yield conn
+    finally:
+        await POOL.release(conn)
+
+
+@asynccontextmanager
+async def transaction_async() -> AsyncIterator[DriverConnection]:
+    """
+    Ouvre une transaction sur une seule connexion, partagée par tous les appels DAO
+    du contexte courant. Valide à la sortie, annule en cas d'erreur.
+    Une transaction déjà ouverte dans le contexte est réutilisée telle quelle.
+    """
+    conn = _scoped_connection.get()
+    if conn is not None:
+        yield conn
+        return
+
+    async with connection_async() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("BEGIN")
+        token = _scoped_connection.set(conn)
+        callbacks: list[Callable[[], None]] = []
+        callbacks_token = _after_commit.set(callbacks)
+        try:
+            yield conn
+        except BaseException:
+            async with conn.cursor() as cur:
+                await cur.execute("ROLLBACK")
+            raise
+        else:
+            async with conn.cursor() as cur:
+                await cur.execute("COMMIT")
+        finally:
+            _after_commit.reset(callbacks_token)
+            _scoped_connection.reset(token)
+        for callback in callbacks:
+            callback()
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """
+    Exécute `callback` une fois la transaction en cours validée (jamais si elle est annulée),
+    ou tout de suite hors transaction. Sert à invalider les caches sans qu'une requête concurrente
+    ne puisse y remettre la version d'avant la validation.
+    """
+    callbacks = _after_commit.get()
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+@asynccontextmanager
+async def detached_transaction_async() -> AsyncIterator[DriverConnection]:
+    """
+    Ouvre une transaction sur une connexion dédiée, indépendante de la transaction de la requête.
+    Utilisée par les réponses en streaming, consommées après la fin de l'endpoint.
+    """
+    token = _scoped_connection.set(None)
+    callbacks_token = _after_commit.set(None)
+    try:
+        async with transaction_async() as conn:
+            yield conn
+    finally:
+        _after_commit.reset(callbacks_token)
+        _scoped_connection.reset(token)
@@ -0,0 +1,38 @@
+"""
+Registry of server-side prepared statements.
+
+Each pooled connection prepares a statement lazily the first time it is executed
+and then reuses it for the rest of its life, so PostgreSQL parses and plans the
+hottest queries only once per connection. How a statement is prepared depends on
+the driver (`PREPARE`/`EXECUTE` with aiopg, native prepared statements with asyncpg).
+"""
+from typing import Any, Dict, Sequence
+
+from app.core import metrics
+from app.db.drivers.base import DriverCursor
+
+# Known statements: {name: sql}
+statements: Dict[str, str] = {}
+
+prepared_hits = metrics.counter("db_prepared_statements_hits_total",
+                                "Number of executions reusing a statement already prepared on the connection")
+prepared_misses = metrics.counter("db_prepared_statements_misses_total",
+                                  "Number of executions that had to prepare the statement first")
+
+
+def register_statement(name: str, sql: str) -> None:
+    """
+    Enregistre une requête préparée, en vérifiant qu'un nom ne désigne qu'une seule requête.
+    """
+    registered = statements.setdefault(name, sql)
+    if registered != sql:
+        raise ValueError(f"Prepared statement {name} is already registered with another query")
+
+
+async def execute_prepared(cur: DriverCursor, name: str, sql: str, params: Sequence[Any] = ()) -> None:
+    """
+    Exécute une requête préparée (paramètres `$1`, `$2`, ...) sur la connexion du curseur,
+    en la préparant au premier appel sur cette connexion.
+    """
+    register_statement(name, sql)
+    await cur.execute_prepared(name, sql, params)
@@ -1,27 +1,56 @@
+import hashlib
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 
-from app.core.config import SettingsAuth
+from app.core.cache import TTLCache
+from app.core.config import SettingsCache, get_settings_auth, on_settings_reload
 from app.schemas.auth import TokenData
+from app.services.users import fetch_user_by_email
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    config = SettingsAuth()
+# Identités des jetons déjà vérifiés, par empreinte du jeton, jusqu'à leur expiration
+verified_tokens: TTLCache[str, TokenData] = TTLCache("verified_tokens", SettingsCache().TOKENS_MAX_ENTRIES, 0)
+on_settings_reload(verified_tokens.clear)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """
+    Résout l'identité de l'utilisateur connecté à partir de son jeton, sans requête : l'identifiant
+    est porté par le jeton (claim `uid`). FastAPI ne résout la dépendance qu'une fois par requête,
+    les services reçoivent donc tous la même identité. Seuls les jetons émis avant l'ajout du claim
+    sont résolus par email.
+    Un jeton déjà vérifié est servi depuis le cache jusqu'à son expiration, sans revérifier sa signature.
+    """
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    identity = verified_tokens.get(token_hash)
+    if identity is not None:
+        return identity
+
+    config = get_settings_auth()
     try:
         payload = jwt.decode(token, config.SECRET_KEY, algorithms=[config.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return TokenData(email=email)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    email: str = payload.get("sub")
+    user_id: str = payload.get("uid")
+    if email is not None and user_id is None:
+        user = await fetch_user_by_email(email)
+        user_id = str(user.id) if user else None
+    if email is None or user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    identity = TokenData(id=user_id, email=email)
+    if isinstance(payload.get("exp"), (int, float)):
+        verified_tokens.set(token_hash, identity, ttl=payload["exp"] - time.time())
+    return identity
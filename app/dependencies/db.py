@@ -0,0 +1,13 @@
+from typing import AsyncIterator
+
+from app.db.drivers import DriverConnection
+from app.db.settings import transaction_async
+
+
+async def get_db_transaction() -> AsyncIterator[DriverConnection]:
+    """
+    Ouvre une transaction pour toute la durée de la requête : la requête n'acquiert
+    qu'une seule connexion du pool et ses écritures sont validées de façon atomique.
+    """
+    async with transaction_async() as conn:
+        yield conn
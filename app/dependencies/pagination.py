@@ -0,0 +1,16 @@
+from typing import Optional
+
+from fastapi import Query
+from pydantic_extra_types.ulid import ULID
+
+from app.schemas.pagination import PageParams, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def get_page_params(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return"),
+        after: Optional[ULID] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+) -> PageParams:
+    """
+    Paramètres de pagination par curseur (keyset) sur l'ULID.
+    """
+    return PageParams(limit=limit, after=after)
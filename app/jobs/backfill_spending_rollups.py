@@ -0,0 +1,42 @@
+"""
+Recalcule les agrégats journaliers et mensuels des dépenses (table spending_rollups) depuis
+les dépenses, pour tous les groupes ou pour un seul. À lancer après la création de la table.
+
+    python -m app.jobs.backfill_spending_rollups [--group GROUP_ID]
+"""
+import argparse
+import asyncio
+import logging
+from typing import Optional
+
+from app.dao.stats import rebuild_spending_rollups
+from app.db.settings import initialize_postgres_pool, close_postgres_pool, transaction_async
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_spending_rollups(group_id: Optional[str] = None) -> int:
+    """
+    Reconstruit les agrégats et retourne le nombre de lignes écrites.
+    """
+    async with transaction_async():
+        rows_count = await rebuild_spending_rollups(group_id)
+    logger.info("Agrégats de dépenses reconstruits: %s lignes", rows_count)
+    return rows_count
+
+
+async def main(group_id: Optional[str]) -> int:
+    await initialize_postgres_pool()
+    try:
+        return await backfill_spending_rollups(group_id)
+    finally:
+        await close_postgres_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruit les agrégats de dépenses")
+    parser.add_argument("--group", help="ne reconstruit que les agrégats de ce groupe")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(args.group))
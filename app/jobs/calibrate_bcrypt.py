@@ -0,0 +1,22 @@
+"""
+Mesure le coût bcrypt le plus élevé qui tient dans un temps cible sur cette machine,
+à reporter dans PASSWORD_BCRYPT_ROUNDS. Les hashes existants sont mis à niveau à la connexion.
+
+    python -m app.jobs.calibrate_bcrypt [--target-ms 250]
+"""
+import argparse
+import logging
+
+from app.utils.security import calibrate_bcrypt_rounds
+
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibre le coût bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250, help="durée maximale d'un hash, en millisecondes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rounds = calibrate_bcrypt_rounds(args.target_ms / 1000)
+    logger.info("PASSWORD_BCRYPT_ROUNDS=%s", rounds)
@@ -0,0 +1,52 @@
+"""
+Vérifie la table balances en recalculant tous les soldes depuis les remboursements,
+et signale les écarts. Avec --fix, la table est reconstruite.
+
+    python -m app.jobs.verify_balances [--fix]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.dao.balances import select_balance_drift, rebuild_balances
+from app.db.settings import initialize_postgres_pool, close_postgres_pool, transaction_async
+
+logger = logging.getLogger(__name__)
+
+
+async def verify_balances(fix: bool = False) -> int:
+    """
+    Journalise les soldes qui divergent du recalcul et retourne leur nombre.
+    """
+    async with transaction_async():
+        drift = await select_balance_drift()
+        for row in drift:
+            logger.warning("Écart de solde: groupe=%s, débiteur=%s, créancier=%s, devise=%s, attendu=%s, stocké=%s",
+                           row["group_id"], row["debtor_id"], row["creditor_id"], row["currency"],
+                           row["expected_amount"], row["stored_amount"])
+        if drift and fix:
+            await rebuild_balances()
+            logger.info("Table balances reconstruite")
+
+    if not drift:
+        logger.info("Aucun écart de solde")
+    return len(drift)
+
+
+async def main(fix: bool) -> int:
+    await initialize_postgres_pool()
+    try:
+        return await verify_balances(fix)
+    finally:
+        await close_postgres_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vérifie la table balances")
+    parser.add_argument("--fix", action="store_true", help="reconstruit la table en cas d'écart")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    drift_count = asyncio.run(main(args.fix))
+    sys.exit(1 if drift_count and not args.fix else 0)
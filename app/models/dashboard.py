@@ -0,0 +1,24 @@
+from app.db.drivers import Row
+from app.models.groups import format_groups_from_raw
+from app.models.reimbursements import format_spending_reimbursements_from_raw
+from app.models.spendings import format_spendings_from_raw
+from app.models.users import format_user_from_raw
+from app.schemas.dashboard import Dashboard
+from app.schemas.reimbursements import ReimbursementSummary
+
+# Colonnes agrégées en JSON par la requête du tableau de bord, en plus de celles de l'utilisateur
+DASHBOARD_AGGREGATES = ("groups", "unpaid_reimbursements", "balances", "recent_spendings")
+
+
+def format_dashboard_from_raw(raw_dashboard: Row, summary: ReimbursementSummary) -> Dashboard:
+    """
+    Formate le tableau de bord brut (l'utilisateur et ses listes agrégées en JSON) en objet Dashboard.
+    """
+    return Dashboard(
+        user=format_user_from_raw({key: value for key, value in raw_dashboard.items()
+                                   if key not in DASHBOARD_AGGREGATES}),
+        groups=format_groups_from_raw(raw_dashboard["groups"]),
+        unpaid_reimbursements=format_spending_reimbursements_from_raw(raw_dashboard["unpaid_reimbursements"]),
+        summary=summary,
+        recent_spendings=format_spendings_from_raw(raw_dashboard["recent_spendings"]),
+    )
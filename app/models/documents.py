@@ -1,11 +1,10 @@
 from pathlib import WindowsPath, Path
 
-from psycopg2.extras import RealDictRow
-
+from app.db.drivers import Row
 from app.schemas.documents import Document
 
 
-def format_document_from_raw(raw_document: RealDictRow) -> Document | None:
+def format_document_from_raw(raw_document: Row) -> Document | None:
     """
     Formate un document brut en objet Document.
     """
@@ -17,7 +16,7 @@ def format_document_from_raw(raw_document: RealDictRow) -> Document | None:
     return Document(**raw_document)
 
 
-def format_documents_from_raw(raw_documents: list[RealDictRow]) -> list[Document]:
+def format_documents_from_raw(raw_documents: list[Row]) -> list[Document]:
     """
     Formate les documents bruts en objets Document.
     """
@@ -1,16 +1,15 @@
-from psycopg2.extras import RealDictRow
-
+from app.db.drivers import Row
 from app.schemas.groups import Group
 
 
-def format_group_from_raw(raw_group: RealDictRow) -> Group:
+def format_group_from_raw(raw_group: Row) -> Group:
     """
     Formate les groupes bruts en objets Group.
     """
-    return Group(**raw_group)
+    return Group(**raw_group) if raw_group else None
 
 
-def format_groups_from_raw(raw_groups: list[RealDictRow]) -> list[Group]:
+def format_groups_from_raw(raw_groups: list[Row]) -> list[Group]:
     """
     Formate les groupes bruts en objets Group.
     """
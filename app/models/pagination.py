@@ -0,0 +1,24 @@
+from typing import Any, Callable, TypeVar
+
+from app.schemas.pagination import Page, PageParams, MAX_ULID
+from app.utils.schemas import get_ulid_to_string
+
+T = TypeVar("T")
+
+
+def get_page_cursor(page: PageParams) -> str:
+    """
+    Curseur à transmettre à la requête : le curseur demandé, ou le plus grand ULID pour la première page.
+    """
+    return get_ulid_to_string(page.after) or MAX_ULID
+
+
+def format_page(items: list[T], page: PageParams, cursor: Callable[[T], Any]) -> Page[T]:
+    """
+    Construit une page à partir des `limit + 1` éléments lus : l'élément en trop indique
+    qu'une page suivante existe, dont le curseur est la clé du dernier élément retourné.
+    """
+    has_more = len(items) > page.limit
+    items = items[:page.limit]
+    next_cursor = str(cursor(items[-1])) if has_more and items else None
+    return Page(items=items, next_cursor=next_cursor)
@@ -1,16 +1,32 @@
-from psycopg2.extras import RealDictRow
-from app.schemas.reimbursements import SpendingReimbursement
+from app.db.drivers import Row
+from app.schemas.reimbursements import SpendingReimbursement, GroupBalance
 
 
-def format_spending_reimbursement_from_raw(raw_reimbursement: RealDictRow) -> SpendingReimbursement:
+def format_spending_reimbursement_from_raw(raw_reimbursement: Row) -> SpendingReimbursement:
     """
     Formate un remboursement brut en objet SpendingReimbursement.
     """
     return SpendingReimbursement(**raw_reimbursement)
 
 
-def format_spending_reimbursements_from_raw(raw_reimbursements: list[RealDictRow]) -> list[SpendingReimbursement]:
+def format_spending_reimbursements_from_raw(raw_reimbursements: list[Row]) -> list[SpendingReimbursement]:
     """
     Formate les remboursements bruts en objets SpendingReimbursement.
     """
     return [format_spending_reimbursement_from_raw(raw_reimbursement) for raw_reimbursement in raw_reimbursements]
+
+
+def format_group_balances_from_raw(raw_balances: list[Row]) -> list[GroupBalance]:
+    """
+    Formate les soldes bruts par groupe en objets GroupBalance.
+    """
+    return [
+        GroupBalance(
+            group_id=raw_balance["group_id"],
+            currency=raw_balance["currency"],
+            owed_by=int(raw_balance["owed_by"]),
+            owed_to=int(raw_balance["owed_to"]),
+            balance=int(raw_balance["owed_to"] - raw_balance["owed_by"]),
+        )
+        for raw_balance in raw_balances
+    ]
@@ -1,19 +1,28 @@
 from pathlib import WindowsPath, Path
 
-from psycopg2.extras import RealDictRow
+from app.db.drivers import Row
+from app.models.reimbursements import format_spending_reimbursements_from_raw
+from app.schemas.spendings import Spending, SpendingWithReimbursements
 
-from app.schemas.spendings import Spending
 
-
-def format_spending_from_raw(raw_spending: RealDictRow) -> Spending:
+def format_spending_from_raw(raw_spending: Row) -> Spending:
     for key in raw_spending:
         if isinstance(raw_spending[key], WindowsPath):
             raw_spending[key] = Path(raw_spending[key])
     return Spending(**raw_spending)
 
 
-def format_spendings_from_raw(raw_spendings: list[RealDictRow]) -> list[Spending]:
+def format_spendings_from_raw(raw_spendings: list[Row]) -> list[Spending]:
     """
     Formate les dépenses bruts en objets Spending.
     """
     return [format_spending_from_raw(raw_spending) for raw_spending in raw_spendings]
+
+
+def format_spending_with_reimbursements_from_raw(raw_spending: Row) -> SpendingWithReimbursements:
+    """
+    Formate une dépense brute et ses remboursements en objet SpendingWithReimbursements.
+    """
+    spending = format_spending_from_raw({key: value for key, value in raw_spending.items() if key != "reimbursements"})
+    reimbursements = format_spending_reimbursements_from_raw(raw_spending["reimbursements"])
+    return SpendingWithReimbursements(**spending.model_dump(), reimbursements=reimbursements)
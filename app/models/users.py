@@ -1,16 +1,15 @@
-from psycopg2.extras import RealDictRow
-
+from app.db.drivers import Row
 from app.schemas.users import User
 
 
-def format_user_from_raw(raw_user: RealDictRow) -> User:
+def format_user_from_raw(raw_user: Row) -> User:
     """
     Formate les utilisateurs bruts en objets User.
     """
     return User(**raw_user) if raw_user else None
 
 
-def format_users_from_raw(raw_users: list[RealDictRow]) -> list[User]:
+def format_users_from_raw(raw_users: list[Row]) -> list[User]:
     """
     Formate les utilisateurs bruts en objets User.
     """
@@ -8,6 +8,7 @@ class Token(BaseModel):
 
 
 class TokenData(BaseModel):
+    id: str | None = None
     firstname: str | None = None
     lastname: str | None = None
     email: str | None = None
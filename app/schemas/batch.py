@@ -0,0 +1,26 @@
+from typing import Any, Literal, Optional
+
+from pydantic import Field
+
+from app.schemas.custom import BaseModelCustom
+
+MAX_BATCH_OPERATIONS = 20
+
+
+class BatchOperation(BaseModelCustom):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = Field("GET", title="Method",
+                                                                     description="HTTP method of the operation",
+                                                                     examples=["GET"])
+    path: str = Field(..., title="Path", description="Path of a v1 route, with an optional query string",
+                      examples=["/groups/01F8MECHZX3TBDSZ7XK4F8G5J6/members"])
+    body: Optional[Any] = Field(None, title="Body", description="JSON body of the operation")
+
+
+class BatchRequest(BaseModelCustom):
+    operations: list[BatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS,
+                                             title="Operations", description="Operations to execute")
+
+
+class BatchResult(BaseModelCustom):
+    status: int = Field(..., title="Status", description="HTTP status code of the operation", examples=[200])
+    body: Optional[Any] = Field(None, title="Body", description="Response body of the operation")
@@ -4,6 +4,9 @@ from pathlib import WindowsPath
 from pydantic import BaseModel, Field
 from pydantic_extra_types.ulid import ULID
 
+# Montant en unités mineures de la devise (centimes) : sommes et répartitions restent exactes
+Cents = int
+
 
 class BaseModelCustom(BaseModel):
     class Config:
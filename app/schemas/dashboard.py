@@ -0,0 +1,18 @@
+from pydantic import Field
+
+from app.schemas.custom import BaseModelCustom
+from app.schemas.groups import Group
+from app.schemas.reimbursements import ReimbursementSummary, SpendingReimbursement
+from app.schemas.spendings import Spending
+from app.schemas.users import User
+
+
+class Dashboard(BaseModelCustom):
+    user: User = Field(..., title="User", description="Connected user")
+    groups: list[Group] = Field([], title="Groups", description="Most recent groups of the user")
+    unpaid_reimbursements: list[SpendingReimbursement] = Field([], title="Unpaid Reimbursements",
+                                                               description="Most recent shares the user still owes")
+    summary: ReimbursementSummary = Field(..., title="Summary",
+                                          description="Balance of the user, in total and per group")
+    recent_spendings: list[Spending] = Field([], title="Recent Spendings",
+                                             description="Most recent spendings of the groups of the user")
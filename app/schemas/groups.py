@@ -30,6 +30,9 @@ class GroupCreate(BaseModelCustom):
                                   examples=["2023-01-01T00:00:00Z"])
     ending_at: Optional[datetime] = Field(None, title="Ending At", description="Ending date of the group",
                                           examples=["2023-12-31T23:59:59Z"])
+    base_currency: str = Field("EUR", title="Base Currency", max_length=3,
+                               description="Currency in which balances and settlements of the group are converted",
+                               examples=["EUR"])
 
 
 class Group(GroupCreate):
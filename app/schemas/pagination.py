@@ -0,0 +1,26 @@
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+from pydantic_extra_types.ulid import ULID
+
+from app.schemas.custom import BaseModelCustom
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Bornes des ULID, utilisées comme curseur quand aucun curseur n'est fourni
+MAX_ULID = "7ZZZZZZZZZZZZZZZZZZZZZZZZZ"
+
+
+class PageParams(BaseModel):
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items to return")
+    after: Optional[ULID] = Field(None, description="Cursor returned as next_cursor by the previous page")
+
+
+class Page(BaseModelCustom, Generic[T]):
+    items: list[T] = Field(..., title="Items", description="Items of the page")
+    next_cursor: Optional[str] = Field(None, title="Next Cursor",
+                                       description="Cursor of the next page, null on the last page",
+                                       examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
@@ -4,7 +4,7 @@ from typing import Optional
 from pydantic import BaseModel, Field
 from pydantic_extra_types.ulid import ULID
 
-from app.schemas.custom import BaseModelCustom
+from app.schemas.custom import BaseModelCustom, Cents
 
 
 class SpendingReimbursementCreate(BaseModelCustom):
@@ -13,20 +13,62 @@ class SpendingReimbursementCreate(BaseModelCustom):
 
 
 class SpendingReimbursement(SpendingReimbursementCreate):
-    reimbursement_amount: float = Field(..., title="Reimbursement Amount", ge=0, 
-                                       description="Amount to be reimbursed by this user", 
-                                       examples=[25.50])
+    reimbursement_amount: Cents = Field(..., title="Reimbursement Amount", ge=0,
+                                       description="Amount to be reimbursed by this user, in cents",
+                                       examples=[2550])
     reimbursed_at: Optional[datetime] = Field(None, title="Reimbursed At", description="When the reimbursement was made")
     user_id: ULID = Field(..., title="User ID", description="ID of the user being reimbursed",
                           examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
 
+
+class GroupBalance(BaseModelCustom):
+    group_id: ULID = Field(..., title="Group ID", description="ID of the group",
+                           examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    currency: str = Field(..., title="Currency", max_length=3, description="Base currency of the group",
+                          examples=["EUR"])
+    owed_by: Cents = Field(..., title="Owed By", ge=0, description="Amount owed by the user in this group, in cents",
+                           examples=[4000])
+    owed_to: Cents = Field(..., title="Owed To", ge=0, description="Amount owed to the user in this group, in cents",
+                           examples=[1250])
+    balance: Cents = Field(..., title="Balance", description="Net balance of the user in this group, in cents",
+                           examples=[-2750])
+
+
 class ReimbursementSummary(BaseModelCustom):
-    total_owed_by: float = Field(..., title="Total Owed By", ge=0, 
-                                description="Total amount owed by the user", 
-                                examples=[150.75])
-    total_owed_to: float = Field(..., title="Total Owed To", ge=0, 
-                               description="Total amount owed to the user", 
-                               examples=[75.25])
-    balance: float = Field(..., title="Balance", 
-                         description="Net balance (positive means user is owed money, negative means user owes money)", 
-                         examples=[-75.50])
+    currency: str = Field(..., title="Currency", max_length=3, description="Reference currency of the totals",
+                          examples=["EUR"])
+    total_owed_by: Cents = Field(..., title="Total Owed By", ge=0,
+                                description="Total amount owed by the user, in cents",
+                                examples=[15075])
+    total_owed_to: Cents = Field(..., title="Total Owed To", ge=0,
+                               description="Total amount owed to the user, in cents",
+                               examples=[7525])
+    balance: Cents = Field(..., title="Balance",
+                         description="Net balance in cents (positive means user is owed money, "
+                                     "negative means user owes money)",
+                         examples=[-7550])
+    groups: list[GroupBalance] = Field([], title="Groups", description="Balance of the user in each group")
+
+
+class SettleUpRequest(BaseModelCustom):
+    group_id: Optional[ULID] = Field(None, title="Group ID",
+                                     description="Group in which the debtor settles up with the creditor",
+                                     examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    debtor_id: Optional[ULID] = Field(None, title="Debtor ID", description="ID of the user who pays",
+                                      examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    creditor_id: Optional[ULID] = Field(None, title="Creditor ID", description="ID of the user who is paid",
+                                        examples=["01F8MECHZX3TBDSZ7XK4F8G5J7"])
+    spending_ids: Optional[list[ULID]] = Field(None, title="Spending IDs",
+                                               description="Spendings whose unpaid shares are settled, "
+                                                           "instead of a group, debtor and creditor",
+                                               examples=[["01F8MECHZX3TBDSZ7XK4F8G5J6"]])
+
+
+class SettleUpResult(BaseModelCustom):
+    reimbursements: int = Field(..., title="Reimbursements", description="Number of shares marked as paid",
+                                examples=[12])
+    spendings: int = Field(..., title="Spendings", description="Number of spendings concerned", examples=[9])
+    currency: str = Field(..., title="Currency", max_length=3, description="Currency of the total amount",
+                          examples=["EUR"])
+    total_amount: Cents = Field(..., title="Total Amount", ge=0, description="Total amount settled, in cents",
+                                examples=[31240])
@@ -0,0 +1,32 @@
+from pydantic import Field
+from pydantic_extra_types.ulid import ULID
+
+from app.schemas.custom import BaseModelCustom, Cents
+
+
+class MemberBalance(BaseModelCustom):
+    user_id: ULID = Field(..., title="User ID", description="ID of the member",
+                          examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    balance: Cents = Field(..., title="Balance",
+                           description="Net balance in cents (positive means the member is owed money, "
+                                       "negative means they owe money)",
+                           examples=[-4250])
+
+
+class SettlementTransfer(BaseModelCustom):
+    debtor_id: ULID = Field(..., title="Debtor ID", description="ID of the member who pays",
+                            examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    creditor_id: ULID = Field(..., title="Creditor ID", description="ID of the member who is paid",
+                              examples=["01F8MECHZX3TBDSZ7XK4F8G5J7"])
+    amount: Cents = Field(..., title="Amount", gt=0, description="Amount to transfer, in cents", examples=[4250])
+
+
+class GroupSettlement(BaseModelCustom):
+    group_id: ULID = Field(..., title="Group ID", description="ID of the group",
+                           examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    currency: str = Field(..., title="Currency", max_length=3,
+                          description="Base currency of the group, in which every amount is converted",
+                          examples=["EUR"])
+    balances: list[MemberBalance] = Field([], title="Balances", description="Net balance of each member")
+    transfers: list[SettlementTransfer] = Field([], title="Transfers",
+                                                description="Transfers that settle every unpaid debt of the group")
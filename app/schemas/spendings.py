@@ -1,26 +1,68 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 
 from pydantic import Field
 from pydantic_extra_types.ulid import ULID
 
-from app.schemas.custom import BaseModelCustom
+from app.schemas.custom import BaseModelCustom, Cents
+from app.schemas.reimbursements import SpendingReimbursement
+
+
+class SplitStrategy(str, Enum):
+    EQUAL = "equal"
+    SHARES = "shares"
+    PERCENT = "percent"
+    EXACT = "exact"
 
 
 class SpendingCreate(BaseModelCustom):
     name: str = Field(..., title="Name", max_length=50, description="Name of the spending", examples=["Groceries"])
     description: Optional[str] = Field(None, title="Description", max_length=255,
                                        description="Description of the spending", examples=["Weekly groceries"])
-    amount: float = Field(..., title="Amount", ge=0, description="Amount of the spending", examples=[100.50])
+    amount: Cents = Field(..., title="Amount", ge=0, description="Amount of the spending, in cents", examples=[10050])
     currency: str = Field(..., title="Currency", max_length=3, description="Currency of the spending", examples=["EUR"])
-    is_reimbursed: bool = Field(False, title="Is Reimbursed", description="Whether the spending has been reimbursed")
+    category: str = Field("other", title="Category", max_length=50, description="Category of the spending",
+                          examples=["groceries"])
+    spent_at: Optional[datetime] = Field(None, title="Spent At",
+                                         description="When the money was spent, now if not given",
+                                         examples=["2024-03-14T18:30:00Z"])
     group_id: ULID = Field(None, title="Group ID", description="ID of the group associated with the spending",
                            examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    split_strategy: SplitStrategy = Field(SplitStrategy.EQUAL, title="Split Strategy",
+                                          description="How the amount is split between the members of the group: "
+                                                      "equal parts, weighted shares, percentages or exact amounts")
+    split_values: Optional[dict[ULID, float]] = Field(None, title="Split Values",
+                                                      description="Share, percentage or exact amount (in cents) "
+                                                                  "of each member, members left out take no part",
+                                                      examples=[{"01F8MECHZX3TBDSZ7XK4F8G5J6": 2,
+                                                                 "01F8MECHZX3TBDSZ7XK4F8G5J7": 1}])
 
 
 class Spending(SpendingCreate):
     id: ULID
+    is_reimbursed: bool = Field(..., title="Is Reimbursed",
+                                description="Whether every share of the spending has been paid, set by the server")
     updated_at: datetime
     deleted_at: Optional[datetime] = None
     owner_id: ULID = Field(..., title="Owner ID", description="ID of the user who owns the spending",
                            examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+
+
+class SpendingWithReimbursements(Spending):
+    reimbursements: list[SpendingReimbursement] = Field([], title="Reimbursements",
+                                                        description="Reimbursements generated for the spending")
+
+
+class SpendingImportError(BaseModelCustom):
+    row: int = Field(..., title="Row", description="Number of the data row in the imported file, starting at 1",
+                     examples=[3])
+    errors: list[str] = Field(..., title="Errors", description="Reasons why the row was rejected",
+                              examples=[["amount: Input should be greater than or equal to 0"]])
+
+
+class SpendingImportReport(BaseModelCustom):
+    imported: int = Field(..., title="Imported", description="Number of spendings created", examples=[120])
+    reimbursements: int = Field(..., title="Reimbursements", description="Number of reimbursements created",
+                                examples=[360])
+    errors: list[SpendingImportError] = Field([], title="Errors", description="Rejected rows")
@@ -0,0 +1,47 @@
+from datetime import date
+from enum import Enum
+
+from pydantic import Field
+from pydantic_extra_types.ulid import ULID
+
+from app.schemas.custom import BaseModelCustom, Cents
+
+
+class StatsPeriod(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+
+
+class PeriodStats(BaseModelCustom):
+    bucket: date = Field(..., title="Bucket", description="First day of the period", examples=["2024-03-01"])
+    amount: Cents = Field(..., title="Amount", description="Amount spent over the period, in cents",
+                          examples=[125000])
+    spendings: int = Field(..., title="Spendings", description="Number of spendings over the period", examples=[42])
+
+
+class MemberStats(BaseModelCustom):
+    user_id: ULID = Field(..., title="User ID", description="ID of the member who paid",
+                          examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    amount: Cents = Field(..., title="Amount", description="Amount paid by the member, in cents", examples=[48000])
+    spendings: int = Field(..., title="Spendings", description="Number of spendings paid by the member",
+                           examples=[15])
+
+
+class CategoryStats(BaseModelCustom):
+    category: str = Field(..., title="Category", description="Category of the spendings", examples=["groceries"])
+    amount: Cents = Field(..., title="Amount", description="Amount spent in the category, in cents",
+                          examples=[36000])
+    spendings: int = Field(..., title="Spendings", description="Number of spendings in the category",
+                           examples=[20])
+
+
+class GroupStats(BaseModelCustom):
+    group_id: ULID = Field(..., title="Group ID", description="ID of the group",
+                           examples=["01F8MECHZX3TBDSZ7XK4F8G5J6"])
+    currency: str = Field(..., title="Currency", max_length=3,
+                          description="Base currency of the group, in which every amount is converted",
+                          examples=["EUR"])
+    period: StatsPeriod = Field(..., title="Period", description="Size of the buckets")
+    periods: list[PeriodStats] = Field([], title="Periods", description="Spending per period, oldest first")
+    members: list[MemberStats] = Field([], title="Members", description="Spending per paying member")
+    categories: list[CategoryStats] = Field([], title="Categories", description="Spending per category")
@@ -2,20 +2,29 @@ from datetime import datetime, timedelta
 
 from jose import jwt
 
-from app.core.config import SettingsAuth
-from app.services.users import fetch_user_by_email
+from app.core.config import get_settings_auth
+from app.schemas.users import User
+from app.services.users import edit_user_password_hash, fetch_user_by_email
 from app.utils.security import verify_password
 
 
+def get_token_claims(user: User) -> dict:
+    """
+    Revendications portées par les jetons d'un utilisateur : son email et son identifiant,
+    pour que les requêtes authentifiées n'aient pas à le relire en base.
+    """
+    return {"sub": user.email, "uid": str(user.id)}
+
+
 def create_refresh_token(data: dict):
-    config = SettingsAuth()
+    config = get_settings_auth()
     expire = datetime.utcnow() + timedelta(days=7)
     data.update({"exp": expire})
     return jwt.encode(data, config.SECRET_KEY, algorithm=config.ALGORITHM)
 
 
 def create_access_token(data: dict):
-    config = SettingsAuth()
+    config = get_settings_auth()
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=config.EXPIRATION_TIME)
     to_encode.update({"exp": expire})
@@ -26,6 +35,10 @@ async def authenticate_user(email: str, password: str):
     user = await fetch_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.password):
+    valid, new_hash = await verify_password(password, user.password)
+    if not valid:
         return None
+    if new_hash:
+        # Hash computed with a legacy cost: upgrade it now that the plain password is known
+        await edit_user_password_hash(str(user.id), new_hash)
     return user
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Scope
+
+from app.schemas.batch import BatchOperation, BatchResult
+
+logger = logging.getLogger(__name__)
+
+# Routes v1 accessibles depuis un batch
+BATCH_ALLOWED_PREFIXES = ("/users", "/documents", "/groups", "/spendings", "/reimbursements")
+
+# En-têtes de la requête batch transmis à chaque opération
+BATCH_FORWARDED_HEADERS = (b"authorization", b"accept-language")
+
+# Nombre d'opérations d'un même batch exécutées en parallèle, chacune tenant une connexion du pool
+BATCH_MAX_CONCURRENCY = 4
+
+
+def is_batch_path_allowed(path: str) -> bool:
+    path = path.partition("?")[0]
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in BATCH_ALLOWED_PREFIXES)
+
+
+async def run_batch_operation(app: ASGIApp, parent_scope: Scope, operation: BatchOperation) -> BatchResult:
+    """
+    Exécute une opération du batch en appelant directement l'application ASGI, sans passer par le réseau.
+    """
+    if not is_batch_path_allowed(operation.path):
+        return BatchResult(status=404, body={"detail": f"Path {operation.path} is not available in a batch"})
+
+    path, _, query_string = operation.path.partition("?")
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+    headers = [(name, value) for name, value in parent_scope["headers"] if name in BATCH_FORWARDED_HEADERS]
+    headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        **{key: parent_scope[key] for key in ("asgi", "http_version", "scheme", "server", "client", "state")
+           if key in parent_scope},
+        "type": "http",
+        "method": operation.method,
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": parent_scope.get("root_path", ""),
+        "query_string": query_string.encode(),
+        "headers": headers,
+    }
+
+    body_sent = False
+    response_complete = asyncio.Event()
+    status = 500
+    content_type = ""
+    chunks: list[bytes] = []
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                if name.lower() == b"content-type":
+                    content_type = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("Erreur lors de l'opération %s %s du batch", operation.method, operation.path)
+        return BatchResult(status=500, body={"detail": "Internal Server Error"})
+    finally:
+        response_complete.set()
+
+    return BatchResult(status=status, body=_decode_body(b"".join(chunks), content_type))
+
+
+def _decode_body(content: bytes, content_type: str) -> Any:
+    if not content:
+        return None
+    if content_type.startswith("application/json"):
+        return json.loads(content)
+    return content.decode(errors="replace")
+
+
+async def run_batch(app: ASGIApp, parent_scope: Scope, operations: list[BatchOperation]) -> list[BatchResult]:
+    """
+    Exécute les opérations d'un batch en parallèle (au plus BATCH_MAX_CONCURRENCY à la fois)
+    et retourne leurs résultats dans l'ordre des opérations.
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+    async def run(operation: BatchOperation) -> BatchResult:
+        async with semaphore:
+            return await run_batch_operation(app, parent_scope, operation)
+
+    return list(await asyncio.gather(*(run(operation) for operation in operations)))
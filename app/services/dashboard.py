@@ -0,0 +1,33 @@
+from app.core.cache import TTLCache
+from app.core.config import SettingsCache
+from app.dao.dashboard import select_dashboard_by_user_id
+from app.models.dashboard import format_dashboard_from_raw
+from app.schemas.auth import TokenData
+from app.schemas.dashboard import Dashboard
+from app.schemas.reimbursements import ReimbursementSummary
+from app.services.reimbursements import summarize_group_balances
+
+# Nombre d'éléments de chaque liste du tableau de bord
+DASHBOARD_LIMIT = 10
+
+_conf = SettingsCache()
+dashboard_cache: TTLCache[str, Dashboard] = TTLCache("dashboard", _conf.DASHBOARD_MAX_ENTRIES, _conf.DASHBOARD_TTL)
+
+
+async def fetch_dashboard(current_user: TokenData) -> Dashboard:
+    """
+    Construit l'écran d'accueil de l'utilisateur courant en une seule requête.
+    Le résultat est gardé quelques secondes en cache par utilisateur : une écriture peut n'y apparaître
+    qu'à l'expiration de l'entrée.
+    """
+    dashboard = dashboard_cache.get(current_user.id)
+    if dashboard is not None:
+        return dashboard
+
+    raw_dashboard = await select_dashboard_by_user_id(current_user.id, DASHBOARD_LIMIT)
+    if not raw_dashboard:
+        raise ValueError(f"User {current_user.id} not found")
+    summary = ReimbursementSummary(**summarize_group_balances(raw_dashboard["balances"]))
+    dashboard = format_dashboard_from_raw(raw_dashboard, summary)
+    dashboard_cache.set(current_user.id, dashboard)
+    return dashboard
@@ -1,7 +1,9 @@
 from app.dao.documents import select_documents_by_group, select_document_by_id, select_documents_by_user, \
     insert_document, soft_delete_document_by_id
 from app.models.documents import format_documents_from_raw, format_document_from_raw
+from app.models.pagination import format_page, get_page_cursor
 from app.schemas.documents import Document, DocumentCreate
+from app.schemas.pagination import Page, PageParams
 
 
 async def fetch_document_by_id(document_id: str) -> Document | None:
@@ -13,22 +15,22 @@ async def fetch_document_by_id(document_id: str) -> Document | None:
     return document
 
 
-async def fetch_documents_by_group(group_id: str) -> list[Document]:
+async def fetch_documents_by_group(group_id: str, page: PageParams) -> Page[Document]:
     """
-    Affiche les documents par groupe stockés dans la BDD.
+    Affiche une page des documents par groupe stockés dans la BDD.
     """
-    raw_documents = await select_documents_by_group(group_id)
+    raw_documents = await select_documents_by_group(group_id, get_page_cursor(page), page.limit + 1)
     documents = format_documents_from_raw(raw_documents)
-    return documents
+    return format_page(documents, page, lambda document: document.id)
 
 
-async def fetch_documents_by_user(user_id: str) -> list[Document]:
+async def fetch_documents_by_user(user_id: str, page: PageParams) -> Page[Document]:
     """
-    Affiche les documents par utilisateur stockés dans la BDD.
+    Affiche une page des documents par utilisateur stockés dans la BDD.
     """
-    raw_documents = await select_documents_by_user(user_id)
+    raw_documents = await select_documents_by_user(user_id, get_page_cursor(page), page.limit + 1)
     documents = format_documents_from_raw(raw_documents)
-    return documents
+    return format_page(documents, page, lambda document: document.id)
 
 
 async def create_document(document: DocumentCreate) -> Document | None:
@@ -1,32 +1,79 @@
 from datetime import datetime, timedelta
-from typing import Optional
-
-from app.core.cache import store_invitation_code, get_group_id_by_invitation_code, remove_invitation_code
-from app.dao.groups import insert_group, select_group_by_id, soft_delete_group, update_group
+from typing import AsyncIterator, Optional
+
+from app.core.cache import TTLCache, register_invalidation, store_invitation_code, get_group_id_by_invitation_code, \
+    remove_invitation_code
+from app.core.config import SettingsCache
+from app.core.fx import get_fx_rates
+from app.dao.groups import insert_group, select_group_by_id, select_group_currencies, soft_delete_group, \
+    update_group, stream_group_ledger, copy_group_ledger_csv
 from app.dao.users_groups import add_user_to_group, get_groups_for_user, get_users_in_group
+from app.db.settings import after_commit, transaction_async
 from app.models.groups import format_groups_from_raw, format_group_from_raw
+from app.models.pagination import format_page, get_page_cursor
 from app.models.users import format_users_from_raw
 from app.schemas.auth import TokenData
 from app.schemas.groups import Group, GroupCreate, GroupInvitation
+from app.schemas.pagination import Page, PageParams
 from app.schemas.users import User
-from app.services.users import fetch_user_by_email
+from app.services.splits import resplit_group_open_spendings
+from app.utils.exports import ExportFormat, EXPORT_CHUNK_SIZE, encode_parquet
+
+# Colonnes du grand livre exporté et leur type Parquet
+LEDGER_COLUMNS = {
+    "spending_id": "string",
+    "spending_name": "string",
+    "spending_description": "string",
+    "amount": "int64",
+    "currency": "string",
+    "is_reimbursed": "bool",
+    "spending_updated_at": "timestamp",
+    "owner_id": "string",
+    "owner_name": "string",
+    "owner_email": "string",
+    "debtor_id": "string",
+    "debtor_name": "string",
+    "debtor_email": "string",
+    "reimbursement_amount": "int64",
+    "reimbursed_at": "timestamp",
+    "base_currency": "string",
+    "base_amount": "int64",
+    "base_reimbursement_amount": "int64",
+}
+
+
+_conf = SettingsCache()
+group_cache: TTLCache[str, Group] = TTLCache("groups", _conf.ENTITY_MAX_ENTRIES, _conf.ENTITY_TTL, _conf.ENTITY_ENABLED)
+register_invalidation("group", group_cache)
+
+
+def invalidate_group(group_id: str) -> None:
+    """
+    Retire un groupe du cache après une écriture, une fois la transaction en cours validée.
+    """
+    after_commit(lambda: group_cache.delete(group_id))
 
 
 async def fetch_group_by_id(group_id: str) -> Group:
     """
     Affiche un groupe stocké dans la BDD.
     """
+    group = group_cache.get(group_id)
+    if group is not None:
+        return group
     raw_group = await select_group_by_id(group_id)
-    return format_group_from_raw(raw_group)
+    group = format_group_from_raw(raw_group)
+    if group:
+        group_cache.set(group_id, group)
+    return group
 
 
-async def fetch_groups_for_user(current_user: TokenData) -> list[Group]:
+async def fetch_groups_for_user(current_user: TokenData, page: PageParams) -> Page[Group]:
     """
-    Récupère tous les groupes dont l'utilisateur courant est membre.
+    Récupère une page des groupes dont l'utilisateur courant est membre.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    raw_groups = await get_groups_for_user(owner.id)
-    return format_groups_from_raw(raw_groups)
+    raw_groups = await get_groups_for_user(current_user.id, get_page_cursor(page), page.limit + 1)
+    return format_page(format_groups_from_raw(raw_groups), page, lambda group: group.id)
 
 
 async def fetch_group_members(group_id: str) -> list[User]:
@@ -44,11 +91,12 @@ async def create_group(group: GroupCreate, current_user: TokenData) -> Group:
     """
     Crée un groupe dans la BDD et y ajoute automatiquement le créateur.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    raw_group = await insert_group(group)
-    group_obj = format_group_from_raw(raw_group)
+    group = group.model_copy(update={"base_currency": get_fx_rates().check_currency(group.base_currency)})
+    async with transaction_async():
+        raw_group = await insert_group(group)
+        group_obj = format_group_from_raw(raw_group)
 
-    await add_user_to_group(owner.id, str(group_obj.id))
+        await add_user_to_group(current_user.id, str(group_obj.id))
 
     return group_obj
 
@@ -57,7 +105,9 @@ async def edit_group(group_id: str, group: GroupCreate) -> Group:
     """
     Modifie un groupe dans la BDD.
     """
+    group = group.model_copy(update={"base_currency": get_fx_rates().check_currency(group.base_currency)})
     raw_group = await update_group(group_id, group)
+    invalidate_group(group_id)
     return format_group_from_raw(raw_group)
 
 
@@ -65,9 +115,10 @@ async def remove_group(group_id: str) -> str:
     """
     Supprime un groupe dans la BDD.
     """
-    group = await select_group_by_id(group_id)
+    group = await fetch_group_by_id(group_id)
     if group:
         await soft_delete_group(group_id)
+        invalidate_group(group_id)
         return f"Group {group_id} deleted"
     return f"Group {group_id} not found"
 
@@ -76,7 +127,7 @@ async def create_group_invitation(group_id: str, expiration_minutes: int = 60 *
     """
     Crée une invitation pour un groupe avec un code à 8 chiffres.
     """
-    group = await select_group_by_id(group_id)
+    group = await fetch_group_by_id(group_id)
     if not group:
         raise ValueError(f"Group {group_id} not found")
 
@@ -109,10 +160,34 @@ async def validate_group_invitation(invitation_code: str) -> Optional[Group]:
 async def join_group_by_invitation(invitation_code: str, current_user: TokenData) -> Optional[Group]:
     """
     Rejoint un groupe en utilisant un code d'invitation.
+    Les parts non payées des dépenses non remboursées du groupe sont recalculées avec le nouveau membre.
     """
-    owner = await fetch_user_by_email(current_user.email)
     group = await validate_group_invitation(invitation_code)
     if not group:
         return None
-    await add_user_to_group(owner.id, str(group.id))
+    async with transaction_async():
+        await add_user_to_group(current_user.id, str(group.id))
+        await resplit_group_open_spendings(str(group.id))
     return group
+
+
+async def export_group_ledger(group_id: str, export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """
+    Exporte le grand livre complet d'un groupe (dépenses, parts de remboursement et membres)
+    en CSV ou Parquet, au fil de l'eau et sans le charger en mémoire.
+    Les montants sont aussi convertis dans la devise du groupe, par la requête d'export elle-même.
+    Lève une UnknownCurrencyError avant tout envoi si une devise du groupe n'a pas de taux.
+    """
+    group = await fetch_group_by_id(group_id)
+    if not group:
+        raise ValueError(f"Group {group_id} not found")
+
+    fx_rates = get_fx_rates()
+    # The export joins every row to its rates: check them all before the first byte is sent
+    for currency in [group.base_currency, *await select_group_currencies(group_id)]:
+        fx_rates.check_currency(currency)
+    fx_currencies, fx_values = fx_rates.currencies.tolist(), fx_rates.rates.tolist()
+    if export_format == ExportFormat.PARQUET:
+        return encode_parquet(stream_group_ledger(group_id, fx_currencies, fx_values, EXPORT_CHUNK_SIZE),
+                              LEDGER_COLUMNS)
+    return copy_group_ledger_csv(group_id, fx_currencies, fx_values, EXPORT_CHUNK_SIZE)
@@ -1,15 +1,26 @@
+from typing import AsyncIterator
+
+import numpy as np
 from pydantic_extra_types.ulid import ULID
 
+from app.core.fx import get_fx_rates
+
 from app.dao.reimbursements import (
-    select_reimbursements_by_spending, select_reimbursements_by_user, insert_reimbursement, delete_reimbursement,
-    select_total_reimbursements_owed_by_user, select_total_reimbursements_owed_to_user
-)
-from app.models.reimbursements import (
-    format_spending_reimbursement_from_raw, format_spending_reimbursements_from_raw
+    select_reimbursements_by_spending, select_reimbursements_by_user, insert_reimbursements,
+    select_split_context_by_spending,
+    delete_reimbursement, stream_reimbursements_by_user, update_reimbursements_paid_between_users,
+    update_reimbursements_paid_for_spendings
 )
+from app.dao.balances import select_balances_by_user, select_total_owed_by_user, select_total_owed_to_user
+from app.db.drivers import Row
+from app.models.pagination import format_page, get_page_cursor
+from app.models.reimbursements import format_spending_reimbursements_from_raw, format_group_balances_from_raw
 from app.schemas.auth import TokenData
-from app.schemas.reimbursements import SpendingReimbursement, SpendingReimbursementCreate
-from app.services.users import fetch_user_by_email, fetch_user_by_id
+from app.schemas.pagination import Page, PageParams
+from app.schemas.reimbursements import SpendingReimbursement, SpendingReimbursementCreate, SettleUpRequest, \
+    SettleUpResult
+from app.services.groups import fetch_group_by_id
+from app.services.splits import allocate_spending_splits
 from app.utils.schemas import get_ulid_to_string
 
 
@@ -22,56 +33,40 @@ async def fetch_reimbursements_by_spending(spending_id: str) -> list[SpendingRei
     return reimbursements
 
 
-async def fetch_reimbursements_by_user(current_user: TokenData) -> list[SpendingReimbursement]:
+async def fetch_reimbursements_by_user(current_user: TokenData, page: PageParams) -> Page[SpendingReimbursement]:
     """
-    Affiche les remboursements pour un utilisateur.
+    Affiche une page des remboursements pour un utilisateur.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    raw_reimbursements = await select_reimbursements_by_user(owner.id)
+    raw_reimbursements = await select_reimbursements_by_user(current_user.id, get_page_cursor(page), page.limit + 1)
     reimbursements = format_spending_reimbursements_from_raw(raw_reimbursements)
-    return reimbursements
+    return format_page(reimbursements, page, lambda reimbursement: reimbursement.spending_id)
+
+
+async def fetch_reimbursements_stream_by_user(current_user: TokenData,
+                                              chunk_size: int) -> AsyncIterator[list[SpendingReimbursement]]:
+    """
+    Parcourt tous les remboursements d'un utilisateur par lots, sans les charger en mémoire.
+    """
+    async for raw_reimbursements in stream_reimbursements_by_user(current_user.id, chunk_size):
+        yield format_spending_reimbursements_from_raw(raw_reimbursements)
 
 
 async def create_reimbursement(reimbursement: SpendingReimbursementCreate,
                                current_user: TokenData) -> list[SpendingReimbursement]:
     """
-    Crée un remboursement pour chaque utilisateur du groupe (hors owner).
+    Crée un remboursement pour chaque utilisateur du groupe (hors owner),
+    selon la stratégie de répartition de la dépense.
     """
-    from app.dao.spendings import select_spending_by_id
-    from app.dao.users_groups import get_users_in_group
-
-    owner = await fetch_user_by_email(current_user.email)
     spending_id_str = get_ulid_to_string(reimbursement.spending_id)
-    spending = await select_spending_by_id(spending_id_str)
-
-    if not spending:
+    raw_spendings = await select_split_context_by_spending(spending_id_str)
+    if not raw_spendings:
         raise ValueError(f"Spending {spending_id_str} not found")
+    if not raw_spendings[0]["member_ids"]:
+        raise ValueError(f"No users found in the group of spending {spending_id_str}")
 
-    group_users = await get_users_in_group(spending["group_id"])
-    if not group_users:
-        raise ValueError(f"No users found in group {spending['group_id']}")
+    raw_reimbursements = await insert_reimbursements(allocate_spending_splits(raw_spendings))
 
-    total_users_count = len(group_users)
-    if total_users_count > 1:
-        per_person_amount = float(spending["amount"]) / total_users_count
-    else:
-        per_person_amount = 0.0
-
-    from app.dao.reimbursements import insert_reimbursement
-
-    reimbursements = []
-    for user in group_users:
-        if user["id"] == spending["owner_id"]:
-            continue
-        raw_reimbursement = await insert_reimbursement(
-            spending_id_str,
-            user["id"],
-            per_person_amount
-        )
-        formatted = format_spending_reimbursement_from_raw(raw_reimbursement)
-        reimbursements.append(formatted)
-
-    return reimbursements
+    return format_spending_reimbursements_from_raw(raw_reimbursements)
 
 
 async def remove_reimbursement(spending_id: str, user_id: str) -> str:
@@ -95,38 +90,102 @@ async def fetch_unpaid_reimbursements_by_user(current_user: TokenData) -> list[S
     Récupère tous les remboursements non payés pour l'utilisateur courant.
     """
     from app.dao.reimbursements import select_unpaid_reimbursements_by_user
-    owner = await fetch_user_by_email(current_user.email)
-    raws = await select_unpaid_reimbursements_by_user(owner.id)
+    raws = await select_unpaid_reimbursements_by_user(current_user.id)
     return format_spending_reimbursements_from_raw(raws)
 
 
-async def fetch_total_reimbursements_owed_by_user(user_id: str) -> float:
+async def fetch_total_reimbursements_owed_by_user(user_id: str) -> int:
+    """
+    Récupère le montant total des remboursements non payés dus par un utilisateur,
+    converti dans la devise de référence.
+    """
+    raw_totals = await select_total_owed_by_user(user_id)
+    fx_rates = get_fx_rates()
+    return int(fx_rates.convert([raw["total_owed"] for raw in raw_totals], [raw["currency"] for raw in raw_totals],
+                                fx_rates.reference).sum())
+
+
+async def fetch_total_reimbursements_owed_to_user(user_id: str) -> int:
     """
-    Calcule le montant total des remboursements dus par un utilisateur.
+    Récupère le montant total des remboursements non payés dus à un utilisateur,
+    converti dans la devise de référence.
     """
-    owner = await fetch_user_by_id(user_id)
-    return await select_total_reimbursements_owed_by_user(owner.id)
+    raw_totals = await select_total_owed_to_user(user_id)
+    fx_rates = get_fx_rates()
+    return int(fx_rates.convert([raw["total_owed"] for raw in raw_totals], [raw["currency"] for raw in raw_totals],
+                                fx_rates.reference).sum())
 
 
-async def fetch_total_reimbursements_owed_to_user(user_id: str) -> float:
+async def fetch_reimbursement_summary(user_id: str) -> dict:
     """
-    Calcule le montant total des remboursements dus à un utilisateur.
+    Calcule le résumé des remboursements non payés pour un utilisateur, en une seule lecture de la table
+    des soldes : par groupe dans la devise du groupe, et au total dans la devise de référence.
     """
-    owner = await fetch_user_by_id(user_id)
-    return await select_total_reimbursements_owed_to_user(owner.id)
+    return summarize_group_balances(await select_balances_by_user(user_id))
 
 
-async def fetch_reimbursement_summary(current_user: TokenData) -> dict:
+def summarize_group_balances(raw_balances: list[Row]) -> dict:
     """
-    Calcule le résumé des remboursements pour un utilisateur.
+    Résume les soldes bruts d'un utilisateur par groupe et devise : par groupe dans la devise du groupe,
+    et au total dans la devise de référence.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    total_owed_by = await fetch_total_reimbursements_owed_by_user(str(owner.id))
-    total_owed_to = await fetch_total_reimbursements_owed_to_user(str(owner.id))
-    balance = total_owed_to - total_owed_by
+    fx_rates = get_fx_rates()
+
+    # Convert every (group, currency) row to its group's currency at once, then sum per group
+    group_ids, indices = np.unique([str(raw["group_id"]) for raw in raw_balances], return_inverse=True)
+    base_currencies = [raw["base_currency"] for raw in raw_balances]
+    currencies = [raw["currency"] for raw in raw_balances]
+    owed_by = np.bincount(indices, minlength=len(group_ids),
+                          weights=fx_rates.convert([raw["owed_by"] for raw in raw_balances], currencies,
+                                                   base_currencies)).astype(np.int64)
+    owed_to = np.bincount(indices, minlength=len(group_ids),
+                          weights=fx_rates.convert([raw["owed_to"] for raw in raw_balances], currencies,
+                                                   base_currencies)).astype(np.int64)
+    group_currencies = np.empty(len(group_ids), dtype=object)
+    group_currencies[indices] = base_currencies
+    groups = format_group_balances_from_raw([
+        {"group_id": group_id, "currency": currency, "owed_by": by, "owed_to": to}
+        for group_id, currency, by, to in zip(group_ids.tolist(), group_currencies.tolist(), owed_by.tolist(),
+                                              owed_to.tolist())
+    ])
 
+    total_owed_by = int(fx_rates.convert(owed_by, group_currencies.astype(str), fx_rates.reference).sum())
+    total_owed_to = int(fx_rates.convert(owed_to, group_currencies.astype(str), fx_rates.reference).sum())
     return {
+        "currency": fx_rates.reference,
         "total_owed_by": total_owed_by,
         "total_owed_to": total_owed_to,
-        "balance": balance
+        "balance": total_owed_to - total_owed_by,
+        "groups": groups
     }
+
+
+async def settle_up(settlement: SettleUpRequest, paid_at) -> SettleUpResult:
+    """
+    Marque comme payées toutes les parts non payées d'un débiteur envers un créancier dans un groupe,
+    ou toutes celles d'une liste de dépenses, et retourne les totaux réglés, convertis dans la devise
+    du groupe (ou dans la devise de référence pour une liste de dépenses).
+    Les dépenses entièrement remboursées et les soldes sont mis à jour par la même requête.
+    """
+    fx_rates = get_fx_rates()
+    if settlement.spending_ids:
+        currency = fx_rates.reference
+        raw_result = await update_reimbursements_paid_for_spendings(
+            [get_ulid_to_string(spending_id) for spending_id in settlement.spending_ids], paid_at)
+    elif settlement.group_id and settlement.debtor_id and settlement.creditor_id:
+        group = await fetch_group_by_id(get_ulid_to_string(settlement.group_id))
+        if not group:
+            raise ValueError(f"Group {settlement.group_id} not found")
+        currency = group.base_currency
+        raw_result = await update_reimbursements_paid_between_users(
+            get_ulid_to_string(settlement.group_id), get_ulid_to_string(settlement.debtor_id),
+            get_ulid_to_string(settlement.creditor_id), paid_at)
+    else:
+        raise ValueError("Either spending_ids or group_id, debtor_id and creditor_id are required")
+
+    return SettleUpResult(
+        reimbursements=raw_result["reimbursements_count"],
+        spendings=raw_result["spendings_count"],
+        currency=currency,
+        total_amount=int(fx_rates.convert(raw_result["amounts"], raw_result["currencies"], currency).sum())
+    )
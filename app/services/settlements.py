@@ -0,0 +1,79 @@
+import heapq
+from typing import Sequence
+
+import numpy as np
+
+from app.core.fx import get_fx_rates
+from app.dao.balances import select_balances_by_group
+from app.schemas.settlements import GroupSettlement, MemberBalance, SettlementTransfer
+from app.services.groups import fetch_group_by_id
+
+
+def compute_net_balances(debtor_ids: Sequence[str], creditor_ids: Sequence[str],
+                         amounts: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcule en une passe vectorisée le solde net de chaque membre à partir de dettes en centimes
+    (positif si on lui doit de l'argent, négatif s'il en doit).
+    Retourne les identifiants des membres et leurs soldes, dans le même ordre.
+    """
+    if len(amounts) == 0:
+        return np.array([], dtype=str), np.array([], dtype=np.int64)
+
+    members, indices = np.unique(np.concatenate([np.asarray(debtor_ids, dtype=str),
+                                                 np.asarray(creditor_ids, dtype=str)]), return_inverse=True)
+    debtor_indices, creditor_indices = np.split(indices, 2)
+    # bincount accumulates in float64, which stays exact for integer sums below 2**53 cents
+    cents = np.asarray(amounts, dtype=np.int64)
+    net = (np.bincount(creditor_indices, weights=cents, minlength=len(members))
+           - np.bincount(debtor_indices, weights=cents, minlength=len(members)))
+    return members, net.astype(np.int64)
+
+
+def simplify_debts(members: np.ndarray, net_cents: np.ndarray) -> list[tuple[str, str, int]]:
+    """
+    Réduit les dettes d'un groupe à un petit nombre de virements (algorithme glouton de flux minimal) :
+    le plus gros débiteur rembourse le plus gros créancier, jusqu'à ce que tous les soldes soient nuls.
+    Retourne des virements (débiteur, créancier, montant en centimes).
+    """
+    creditors = [(-int(amount), str(member)) for member, amount in zip(members, net_cents) if amount > 0]
+    debtors = [(int(amount), str(member)) for member, amount in zip(members, net_cents) if amount < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return transfers
+
+
+async def fetch_group_settlement(group_id: str) -> GroupSettlement:
+    """
+    Calcule le solde net de chaque membre d'un groupe et le plus petit ensemble de virements
+    qui solde toutes les dettes non payées du groupe, dans la devise du groupe.
+    """
+    group = await fetch_group_by_id(group_id)
+    if not group:
+        raise ValueError(f"Group {group_id} not found")
+
+    raw_balances = await select_balances_by_group(group_id)
+    amounts = get_fx_rates().convert([raw["amount"] for raw in raw_balances], [raw["currency"] for raw in raw_balances],
+                                     group.base_currency)
+    members, net_cents = compute_net_balances([raw["debtor_id"] for raw in raw_balances],
+                                              [raw["creditor_id"] for raw in raw_balances], amounts)
+    transfers = simplify_debts(members, net_cents)
+
+    return GroupSettlement(
+        group_id=group_id,
+        currency=group.base_currency,
+        balances=[MemberBalance(user_id=str(member), balance=int(amount))
+                  for member, amount in zip(members, net_cents) if amount != 0],
+        transfers=[SettlementTransfer(debtor_id=debtor, creditor_id=creditor, amount=amount)
+                   for debtor, creditor, amount in transfers],
+    )
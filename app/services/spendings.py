@@ -1,13 +1,27 @@
-from app.dao.reimbursements import insert_reimbursement
-from app.dao.spendings import select_spendings_by_group, select_spending_by_id, insert_spending, update_spending_by_id, \
-    select_spendings_by_user
-from app.dao.users import select_users_by_group
-from app.models.reimbursements import format_spending_reimbursement_from_raw
-from app.models.spendings import format_spendings_from_raw, format_spending_from_raw
+from typing import AsyncIterator, BinaryIO
+
+from pydantic import ValidationError
+
+from app.core.fx import get_fx_rates
+from app.dao.spendings import select_spendings_by_group, select_spending_by_id, update_spending_by_id, \
+    select_spendings_by_user, insert_spending_with_reimbursements, stream_spendings_by_group, \
+    create_spendings_import_table, copy_spendings_to_import_table, delete_imported_spendings_with_unknown_group, \
+    insert_spendings_from_import_table
+from app.dao.users_groups import select_group_member_ids
+from app.db.settings import transaction_async
+from app.models.pagination import format_page, get_page_cursor
+from app.models.spendings import format_spendings_from_raw, format_spending_from_raw, \
+    format_spending_with_reimbursements_from_raw
 from app.schemas.auth import TokenData
-from app.schemas.reimbursements import SpendingReimbursementCreate
-from app.schemas.spendings import Spending, SpendingCreate
-from app.services.users import fetch_user_by_email
+from app.schemas.pagination import Page, PageParams
+from app.schemas.spendings import Spending, SpendingCreate, SpendingWithReimbursements, SpendingImportError, \
+    SpendingImportReport, SplitStrategy
+from app.services.splits import allocate_spending_splits, resplit_spending
+from app.utils.imports import ImportFormat, iter_import_rows
+from app.utils.schemas import get_ulid_to_string, get_ulid_keys_to_string
+
+# Nombre de lignes validées chargées par COPY
+IMPORT_BATCH_SIZE = 5000
 
 
 async def fetch_spending_by_id(spending_id) -> Spending:
@@ -23,51 +37,118 @@ async def fetch_spendings_by_user_id(current_user: TokenData) -> list[Spending]:
     """
     Affiche la/les dépense(s) de l'utilisateur connecté.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    raw_spendings = await select_spendings_by_user(owner.id)
+    raw_spendings = await select_spendings_by_user(current_user.id)
     spendings = format_spendings_from_raw(raw_spendings)
     return spendings
 
 
-async def fetch_spendings_by_group(group_id: str) -> list[Spending]:
+async def fetch_spendings_by_group(group_id: str, page: PageParams) -> Page[Spending]:
     """
-    Affiche les dépenses stockées dans la BDD.
+    Affiche une page des dépenses d'un groupe.
     """
-    raw_spendings = await select_spendings_by_group(group_id)
+    raw_spendings = await select_spendings_by_group(group_id, get_page_cursor(page), page.limit + 1)
     spendings = format_spendings_from_raw(raw_spendings)
-    return spendings
+    return format_page(spendings, page, lambda spending: spending.id)
 
 
-async def create_spending(spending: SpendingCreate, current_user: TokenData) -> Spending:
+async def fetch_spendings_stream_by_group(group_id: str, chunk_size: int) -> AsyncIterator[list[Spending]]:
     """
-    Crée une dépense dans la BDD et génère automatiquement des remboursements
-    pour tous les utilisateurs du groupe (sauf le propriétaire).
-    Le montant du remboursement est calculé en divisant le montant de la dépense
-    par le nombre de personnes dans le groupe (excluant le propriétaire).
+    Parcourt toutes les dépenses d'un groupe par lots, sans les charger en mémoire.
     """
-    owner = await fetch_user_by_email(current_user.email)
-    raw_spending = await insert_spending(spending, owner.id)
-    spending = format_spending_from_raw(raw_spending)
-    group_users_raw = await select_users_by_group(spending.group_id)
-    total_users_count = len(group_users_raw)
-
-    if total_users_count > 0:
-        per_person_amount = float(spending.amount) / total_users_count
-        reimbursement_amount = per_person_amount
-    else:
-        reimbursement_amount = 0.0
+    async for raw_spendings in stream_spendings_by_group(group_id, chunk_size):
+        yield format_spendings_from_raw(raw_spendings)
 
-    for group_user in group_users_raw:
-        if group_user["user_id"] != str(owner.id):
-            await insert_reimbursement(str(spending.id), group_user["user_id"], reimbursement_amount)
 
-    return spending
+async def create_spending(spending: SpendingCreate, current_user: TokenData) -> SpendingWithReimbursements:
+    """
+    Crée une dépense dans la BDD et génère automatiquement des remboursements
+    pour les membres du groupe (sauf le propriétaire), selon la stratégie de répartition
+    de la dépense, au centime près.
+    La dépense et ses remboursements sont créés en une seule requête.
+    """
+    spending = spending.model_copy(update={"currency": get_fx_rates().check_currency(spending.currency)})
+    async with transaction_async():
+        member_ids = await select_group_member_ids(get_ulid_to_string(spending.group_id))
+        allocations = allocate_spending_splits([{
+            "id": None,
+            "owner_id": current_user.id,
+            "amount": spending.amount,
+            "split_strategy": spending.split_strategy,
+            "split_values": get_ulid_keys_to_string(spending.split_values),
+            "member_ids": member_ids,
+        }])
+        raw_spending = await insert_spending_with_reimbursements(
+            spending, current_user.id, [(user_id, amount) for _, user_id, amount in allocations])
+    return format_spending_with_reimbursements_from_raw(raw_spending)
 
 
 async def edit_spending(spending_id: str, spending: SpendingCreate) -> Spending:
     """
-    Modifie une dépense dans la BDD.
+    Modifie une dépense dans la BDD et recalcule ses parts non payées selon sa stratégie de répartition.
+    Les parts déjà payées ne sont pas modifiées. Le statut remboursé est tenu par la base, pas par le client.
     """
-    raw_spending = await update_spending_by_id(spending_id, spending)
+    spending = spending.model_copy(update={"currency": get_fx_rates().check_currency(spending.currency)})
+    async with transaction_async():
+        raw_spending = await update_spending_by_id(spending_id, spending)
+        if raw_spending:
+            await resplit_spending(spending_id)
+            # Re-read once the re-split triggers have updated unpaid_count and is_reimbursed
+            raw_spending = await select_spending_by_id(spending_id)
     spending = format_spending_from_raw(raw_spending)
     return spending
+
+
+async def import_spendings(file: BinaryIO, import_format: ImportFormat, current_user: TokenData) -> SpendingImportReport:
+    """
+    Importe en masse des dépenses depuis un fichier CSV ou NDJSON lu au fil de l'eau.
+    Chaque ligne est validée comme une SpendingCreate, les lignes valides sont chargées par lots (COPY)
+    dans une table temporaire, puis toutes les dépenses et leurs remboursements sont créés en une seule requête.
+    Les dépenses importées sont réparties à parts égales : les lignes avec une autre stratégie sont rejetées.
+    Les lignes rejetées sont retournées avec leurs erreurs.
+    Lève une ValueError, sans rien importer, si le fichier est illisible.
+    """
+    errors = []
+    fx_rates = get_fx_rates()
+    async with transaction_async():
+        await create_spendings_import_table()
+
+        batch = []
+        for row_number, row in iter_import_rows(file, import_format):
+            if isinstance(row, str):
+                errors.append(SpendingImportError(row=row_number, errors=[row]))
+                continue
+            try:
+                spending = SpendingCreate.model_validate(row)
+            except ValidationError as e:
+                messages = [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+                errors.append(SpendingImportError(row=row_number, errors=messages))
+                continue
+            if spending.group_id is None:
+                errors.append(SpendingImportError(row=row_number, errors=["group_id: Field required"]))
+                continue
+            if spending.split_strategy != SplitStrategy.EQUAL:
+                errors.append(SpendingImportError(
+                    row=row_number, errors=["split_strategy: Only the equal split is supported by the import"]))
+                continue
+            try:
+                currency = fx_rates.check_currency(spending.currency)
+            except ValueError as e:
+                errors.append(SpendingImportError(row=row_number, errors=[f"currency: {e}"]))
+                continue
+
+            batch.append((row_number, spending.name, spending.description, spending.amount, currency,
+                          spending.category, spending.spent_at, str(spending.group_id)))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await copy_spendings_to_import_table(batch)
+                batch = []
+        if batch:
+            await copy_spendings_to_import_table(batch)
+
+        for raw_row in await delete_imported_spendings_with_unknown_group():
+            errors.append(SpendingImportError(row=raw_row["row_number"],
+                                              errors=[f"group_id: Group {raw_row['group_id']} not found"]))
+        counts = await insert_spendings_from_import_table(current_user.id)
+
+    errors.sort(key=lambda error: error.row)
+    return SpendingImportReport(imported=counts["spendings_count"], reimbursements=counts["reimbursements_count"],
+                                errors=errors)
@@ -0,0 +1,123 @@
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.dao.reimbursements import select_split_context_by_spending, select_split_context_by_group, \
+    update_reimbursements_split
+from app.schemas.spendings import SplitStrategy
+
+# Part allouée : (dépense, membre, montant)
+Allocation = tuple[Optional[str], str, int]
+
+
+def split_weights(strategy: SplitStrategy, member_ids: Sequence[str], values: Optional[Mapping[str, float]],
+                  total_cents: int) -> np.ndarray:
+    """
+    Calcule le poids de chaque membre dans la répartition d'une dépense selon sa stratégie :
+    parts égales, parts pondérées, pourcentages ou montants exacts.
+    Lève une ValueError si les valeurs de répartition sont incohérentes.
+    """
+    if strategy == SplitStrategy.EQUAL:
+        return np.ones(len(member_ids), dtype=np.float64)
+
+    if not values:
+        raise ValueError(f"split_values are required for the {strategy.value} split")
+    unknown = set(values) - set(member_ids)
+    if unknown:
+        raise ValueError(f"Users {', '.join(sorted(unknown))} are not members of the group")
+
+    weights = np.array([values.get(member_id, 0.0) for member_id in member_ids], dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError("split_values must be positive")
+    if strategy == SplitStrategy.SHARES and weights.sum() <= 0:
+        raise ValueError("At least one share is required")
+    if strategy == SplitStrategy.PERCENT and not np.isclose(weights.sum(), 100):
+        raise ValueError(f"Percentages must add up to 100, got {weights.sum():g}")
+    if strategy == SplitStrategy.EXACT:
+        if not np.array_equal(weights, np.rint(weights)):
+            raise ValueError("Exact amounts must be whole numbers of cents")
+        if int(weights.sum()) != total_cents:
+            raise ValueError(f"Exact amounts must add up to {total_cents} cents, got {int(weights.sum())}")
+    return weights
+
+
+def allocate_cents(segments: np.ndarray, totals: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Répartit en une passe vectorisée le montant `totals[k]` (en centimes) entre les lignes du segment k,
+    proportionnellement à leurs poids, par la méthode du plus fort reste : chaque segment tombe
+    exactement sur son total, les centimes restants vont aux plus grandes parties fractionnaires
+    (à égalité, à la première ligne).
+    """
+    weight_sums = np.bincount(segments, weights=weights, minlength=len(totals))
+    raw = totals[segments] * weights / weight_sums[segments]
+    cents = np.floor(raw).astype(np.int64)
+    remainders = totals - np.rint(np.bincount(segments, weights=cents, minlength=len(totals))).astype(np.int64)
+
+    # Rank of each line within its segment, by decreasing fractional part
+    order = np.lexsort((np.arange(len(raw)), cents - raw, segments))
+    starts = np.searchsorted(segments[order], np.arange(len(totals)))
+    ranks = np.empty(len(raw), dtype=np.int64)
+    ranks[order] = np.arange(len(raw)) - starts[segments[order]]
+    return cents + (ranks < remainders[segments])
+
+
+def allocate_spending_splits(raw_spendings: Sequence[Mapping[str, Any]]) -> list[Allocation]:
+    """
+    Calcule en une seule passe les parts de plusieurs dépenses (colonnes id, owner_id, amount,
+    split_strategy, split_values et member_ids, les membres triés par identifiant).
+    Pour une répartition existante, les colonnes paid_user_ids et paid_amount donnent les parts déjà payées :
+    elles restent figées et seul le reste du montant est réparti entre les membres qui n'ont pas payé.
+    Le propriétaire participe à la répartition mais sa propre part n'est pas retournée,
+    pas plus que celles des membres de poids nul.
+    """
+    segments, member_ids, weights, totals, segment_spendings = [], [], [], [], []
+    for raw_spending in raw_spendings:
+        total_cents = int(raw_spending["amount"])
+        spending_weights = split_weights(SplitStrategy(raw_spending["split_strategy"]), raw_spending["member_ids"],
+                                         raw_spending["split_values"], total_cents)
+        paid_user_ids = set(raw_spending.get("paid_user_ids") or ())
+        remaining_cents = total_cents - int(raw_spending.get("paid_amount") or 0)
+        if remaining_cents < 0:
+            raise ValueError(f"Amount {total_cents} is lower than the {total_cents - remaining_cents} cents "
+                             f"already paid back")
+        unpaid = np.array([member_id not in paid_user_ids for member_id in raw_spending["member_ids"]], dtype=bool)
+        if not spending_weights[unpaid].sum() > 0:
+            # Nobody left to share the rest with: it stays with the owner
+            continue
+        segments.extend([len(totals)] * int(unpaid.sum()))
+        member_ids.extend(member_id for member_id, keep in zip(raw_spending["member_ids"], unpaid) if keep)
+        weights.append(spending_weights[unpaid])
+        totals.append(remaining_cents)
+        segment_spendings.append(raw_spending)
+    if not member_ids:
+        return []
+
+    weights = np.concatenate(weights)
+    segments = np.array(segments, dtype=np.int64)
+    cents = allocate_cents(segments, np.array(totals, dtype=np.int64), weights)
+
+    allocations = []
+    for segment, member_id, weight, amount in zip(segments.tolist(), member_ids, weights.tolist(), cents.tolist()):
+        raw_spending = segment_spendings[segment]
+        if weight > 0 and member_id != str(raw_spending["owner_id"]):
+            allocations.append((raw_spending["id"], member_id, amount))
+    return allocations
+
+
+async def resplit_spending(spending_id: str) -> None:
+    """
+    Recalcule en une seule requête les parts non payées d'une dépense selon sa stratégie de répartition :
+    le montant restant après les parts payées est réparti entre les membres qui n'ont pas payé.
+    """
+    raw_spendings = await select_split_context_by_spending(spending_id)
+    await update_reimbursements_split([raw_spending["id"] for raw_spending in raw_spendings],
+                                      allocate_spending_splits(raw_spendings))
+
+
+async def resplit_group_open_spendings(group_id: str) -> None:
+    """
+    Recalcule en une seule requête les parts non payées de toutes les dépenses non remboursées d'un groupe.
+    """
+    raw_spendings = await select_split_context_by_group(group_id)
+    await update_reimbursements_split([raw_spending["id"] for raw_spending in raw_spendings],
+                                      allocate_spending_splits(raw_spendings))
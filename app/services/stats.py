@@ -0,0 +1,58 @@
+from datetime import date
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.fx import get_fx_rates
+from app.dao.stats import select_group_stats
+from app.schemas.stats import CategoryStats, GroupStats, MemberStats, PeriodStats, StatsPeriod
+from app.services.groups import fetch_group_by_id
+
+
+def sum_by_key(keys: Sequence[str], amounts: np.ndarray, counts: np.ndarray) -> list[tuple[str, int, int]]:
+    """
+    Additionne en une passe vectorisée les montants et les nombres de dépenses de chaque clé
+    (les lignes d'une même clé dans plusieurs devises). Retourne (clé, montant, nombre) triés par clé.
+    """
+    if len(keys) == 0:
+        return []
+    unique_keys, indices = np.unique(np.asarray(keys, dtype=str), return_inverse=True)
+    key_amounts = np.bincount(indices, weights=amounts, minlength=len(unique_keys)).astype(np.int64)
+    key_counts = np.bincount(indices, weights=counts, minlength=len(unique_keys)).astype(np.int64)
+    return list(zip(unique_keys.tolist(), key_amounts.tolist(), key_counts.tolist()))
+
+
+async def fetch_group_stats(group_id: str, period: StatsPeriod, since: Optional[date],
+                            until: Optional[date]) -> GroupStats:
+    """
+    Calcule les dépenses d'un groupe par période, par payeur et par catégorie, dans la devise du groupe,
+    à partir des agrégats journaliers ou mensuels.
+    """
+    group = await fetch_group_by_id(group_id)
+    if not group:
+        raise ValueError(f"Group {group_id} not found")
+
+    raw_stats = await select_group_stats(group_id, period.value, since, until)
+    amounts = get_fx_rates().convert([raw["amount"] for raw in raw_stats], [raw["currency"] for raw in raw_stats],
+                                     group.base_currency)
+    counts = np.array([raw["spendings_count"] for raw in raw_stats], dtype=np.int64)
+    dimensions = np.array([raw["dimension"] for raw in raw_stats], dtype=str)
+
+    def totals(dimension: str, column: str) -> list[tuple[str, int, int]]:
+        mask = dimensions == dimension
+        keys = [str(raw[column]) for raw, selected in zip(raw_stats, mask) if selected]
+        return sum_by_key(keys, amounts[mask], counts[mask])
+
+    return GroupStats(
+        group_id=group_id,
+        currency=group.base_currency,
+        period=period,
+        periods=[PeriodStats(bucket=bucket, amount=amount, spendings=spendings)
+                 for bucket, amount, spendings in totals("period", "bucket")],
+        members=sorted((MemberStats(user_id=user_id, amount=amount, spendings=spendings)
+                        for user_id, amount, spendings in totals("member", "owner_id")),
+                       key=lambda member: member.amount, reverse=True),
+        categories=sorted((CategoryStats(category=category, amount=amount, spendings=spendings)
+                           for category, amount, spendings in totals("category", "category")),
+                          key=lambda category: category.amount, reverse=True),
+    )
@@ -1,26 +1,59 @@
+from typing import Optional
+
+from app.core.cache import TTLCache, register_invalidation
+from app.core.config import SettingsCache
 from app.dao.users import insert_user, select_user_by_id, select_user_by_email, \
-    update_user
+    update_user, update_user_password
+from app.db.settings import after_commit
 from app.models.users import format_user_from_raw
 from app.schemas.users import User, UserCreate
 from app.utils.security import get_password_hash
 
+_conf = SettingsCache()
+# Utilisateurs par identifiant, et identifiant par email : un changement d'email n'a qu'une entrée à invalider
+user_cache: TTLCache[str, User] = TTLCache("users", _conf.ENTITY_MAX_ENTRIES, _conf.ENTITY_TTL, _conf.ENTITY_ENABLED)
+user_id_by_email_cache: TTLCache[str, str] = TTLCache("user_ids_by_email", _conf.ENTITY_MAX_ENTRIES, _conf.ENTITY_TTL,
+                                                      _conf.ENTITY_ENABLED)
+# The email index needs no invalidation: an entry is only trusted if the cached user still has that email
+register_invalidation("user", user_cache)
+
+
+def _cache_user(user: Optional[User]) -> Optional[User]:
+    if user:
+        user_cache.set(str(user.id), user)
+        user_id_by_email_cache.set(user.email, str(user.id))
+    return user
+
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Retire un utilisateur du cache après une écriture, une fois la transaction en cours validée.
+    """
+    after_commit(lambda: user_cache.delete(user_id))
+
 
 async def fetch_user_by_id(user_id: str) -> User:
     """
     Affiche un utilisateur stocké dans la BDD.
     """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
     raw_user = await select_user_by_id(user_id)
-    user = format_user_from_raw(raw_user)
-    return user
+    return _cache_user(format_user_from_raw(raw_user))
 
 
 async def fetch_user_by_email(email: str) -> User:
     """
     Affiche un utilisateur stocké dans la BDD.
     """
+    user_id = user_id_by_email_cache.get(email)
+    user = user_cache.get(user_id) if user_id is not None else None
+    # The email index may outlive an email change: trust it only if the user still has this email
+    if user is not None and user.email == email:
+        return user
     raw_user = await select_user_by_email(email)
-    user = format_user_from_raw(raw_user)
-    return user
+    return _cache_user(format_user_from_raw(raw_user))
 
 
 async def create_user(user: UserCreate) -> User:
@@ -31,7 +64,7 @@ async def create_user(user: UserCreate) -> User:
     user_dict = user.model_dump()
     # Hash the password
     password = user.password.get_secret_value()
-    user_dict["password"] = get_password_hash(password)
+    user_dict["password"] = await get_password_hash(password)
     # Create a new UserCreate object with the hashed password
     user_with_hashed_password = UserCreate(**user_dict)
     # Insert the user with the hashed password
@@ -48,10 +81,19 @@ async def edit_user(user_id: str, user: UserCreate) -> User:
     user_dict = user.model_dump()
     # Hash the password
     password = user.password.get_secret_value()
-    user_dict["password"] = get_password_hash(password)
+    user_dict["password"] = await get_password_hash(password)
     # Create a new UserCreate object with the hashed password
     user_with_hashed_password = UserCreate(**user_dict)
     # Update the user with the hashed password
     raw_user = await update_user(user_id, user_with_hashed_password)
+    invalidate_user(user_id)
     user = format_user_from_raw(raw_user)
     return user
+
+
+async def edit_user_password_hash(user_id: str, password_hash: str) -> None:
+    """
+    Enregistre un nouveau hash du mot de passe d'un utilisateur (changement du coût bcrypt).
+    """
+    await update_user_password(user_id, password_hash)
+    invalidate_user(user_id)
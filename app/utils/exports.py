@@ -0,0 +1,95 @@
+import io
+from enum import Enum
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from app.db.drivers import Row
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency, install it with the "parquet" extra
+    pyarrow = None
+
+# Nombre de lignes par row group Parquet (et par aller-retour avec le curseur côté serveur)
+EXPORT_CHUNK_SIZE = 10_000
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def is_parquet_available() -> bool:
+    return pyarrow is not None
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Fichier en écriture seule qui garde les octets écrits jusqu'à ce qu'ils soient envoyés au client.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parts: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _parquet_type(kind: str) -> "pyarrow.DataType":
+    return {
+        "string": pyarrow.string(),
+        "int64": pyarrow.int64(),
+        "bool": pyarrow.bool_(),
+        "timestamp": pyarrow.timestamp("us"),
+    }[kind]
+
+
+async def encode_parquet(chunks: AsyncIterator[list[Row]], columns: dict[str, str]) -> AsyncIterator[bytes]:
+    """
+    Encode des lignes au fil de l'eau en un fichier Parquet, un row group par lot.
+    `columns` associe chaque colonne à son type : string, int64, bool ou timestamp.
+    """
+    schema = pyarrow.schema([(name, _parquet_type(kind)) for name, kind in columns.items()])
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+        async for rows in chunks:
+            if rows:
+                writer.write_table(pyarrow.table({name: [row[name] for row in rows] for name in columns},
+                                                 schema=schema))
+                yield sink.drain()
+    yield sink.drain()
+
+
+def export_response(content: AsyncIterator[bytes], export_format: ExportFormat, filename: str) -> StreamingResponse:
+    """
+    Construit une réponse en streaming téléchargée comme un fichier.
+    """
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
@@ -0,0 +1,54 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Any, BinaryIO, Iterator, Optional
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> Optional[ImportFormat]:
+    """
+    Détermine le format d'un fichier importé à partir de son extension ou de son type MIME.
+    """
+    filename = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if filename.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return ImportFormat.CSV
+    if filename.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return ImportFormat.NDJSON
+    return None
+
+
+def iter_import_rows(file: BinaryIO, import_format: ImportFormat) -> Iterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Lit un fichier CSV (avec en-tête) ou NDJSON ligne par ligne, sans le charger en mémoire.
+    Retourne le numéro de chaque ligne de données et son contenu, ou un message si la ligne est illisible.
+    Les valeurs CSV vides sont considérées comme absentes.
+    Lève une ValueError si le fichier n'est pas du texte UTF-8 ou un CSV lisible.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    row_number = 0
+    try:
+        if import_format == ImportFormat.CSV:
+            for row_number, row in enumerate(csv.DictReader(text), start=1):
+                yield row_number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        else:
+            for row_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield row_number, f"Invalid JSON: {e.msg}"
+                    continue
+                yield row_number, row if isinstance(row, dict) else "Expected a JSON object"
+    except UnicodeDecodeError as e:
+        raise ValueError(f"The file is not valid UTF-8 text (after row {row_number})") from e
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV after row {row_number}: {e}") from e
+    finally:
+        text.detach()
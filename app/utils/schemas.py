@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic_extra_types.ulid import ULID
 
@@ -7,4 +7,11 @@ def get_ulid_to_string(entry: Optional[ULID]) -> str | None:
     """
     Convertit un champ de type Field en chaîne de caractères.
     """
-    return str(entry) if entry else None
\ No newline at end of file
+    return str(entry) if entry else None
+
+
+def get_ulid_keys_to_string(entry: Optional[dict[ULID, Any]]) -> dict[str, Any] | None:
+    """
+    Convertit les clés ULID d'un dictionnaire en chaînes de caractères.
+    """
+    return {str(key): value for key, value in entry.items()} if entry is not None else None
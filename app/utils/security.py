@@ -1,12 +1,77 @@
+"""
+Password hashing with bcrypt, run off the event loop.
+
+bcrypt is deliberately slow (~100-300 ms per call): it runs in a dedicated thread pool
+(bcrypt releases the GIL) behind a semaphore, so that a burst of logins queues up instead
+of stalling every other request of the worker.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 from pydantic import SecretStr
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core import metrics
+from app.core.config import SettingsPassword
+
+_conf = SettingsPassword()
+
+# Hashes below the configured cost are verified then rehashed at the next login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__default_rounds=_conf.BCRYPT_ROUNDS, bcrypt__min_rounds=_conf.BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=_conf.HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+_semaphore = asyncio.Semaphore(_conf.HASH_CONCURRENCY)
+
+hash_waiting = metrics.gauge("password_hash_waiting", "Password hashes waiting for a bcrypt thread")
+hash_in_flight = metrics.gauge("password_hash_in_flight", "Password hashes running in a bcrypt thread")
+hash_wait_seconds = metrics.histogram("password_hash_wait_seconds", "Time spent waiting for a bcrypt thread")
+hash_seconds = metrics.histogram("password_hash_seconds", "Time spent hashing or verifying a password")
+
+
+async def _run_bcrypt(func, *args):
+    queued_at = time.perf_counter()
+    hash_waiting.inc()
+    try:
+        await _semaphore.acquire()
+    finally:
+        hash_waiting.dec()
+    try:
+        started_at = time.perf_counter()
+        hash_wait_seconds.observe(started_at - queued_at)
+        hash_in_flight.inc()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+        finally:
+            hash_in_flight.dec()
+            hash_seconds.observe(time.perf_counter() - started_at)
+    finally:
+        _semaphore.release()
+
+
+async def verify_password(plain_password: str, hashed_password: SecretStr) -> tuple[bool, Optional[str]]:
+    """
+    Vérifie un mot de passe. Si le hash a été calculé avec un coût obsolète, retourne aussi
+    le nouveau hash à enregistrer.
+    """
+    return await _run_bcrypt(pwd_context.verify_and_update, plain_password, hashed_password.get_secret_value())
 
 
-def verify_password(plain_password: str, hashed_password: SecretStr):
-    return pwd_context.verify(plain_password, hashed_password.get_secret_value())
+async def get_password_hash(password: str) -> str:
+    return await _run_bcrypt(pwd_context.hash, password)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def calibrate_bcrypt_rounds(target_seconds: float) -> int:
+    """
+    Retourne le coût bcrypt le plus élevé dont un hash prend au plus `target_seconds` sur cette machine.
+    """
+    rounds = 10
+    while rounds < 16:
+        started_at = time.perf_counter()
+        pwd_context.hash("calibration", rounds=rounds + 1)
+        if time.perf_counter() - started_at > target_seconds:
+            break
+        rounds += 1
+    return rounds
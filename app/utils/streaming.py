@@ -0,0 +1,44 @@
+from enum import Enum
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+# Nombre de lignes lues par aller-retour avec le curseur côté serveur
+STREAM_CHUNK_SIZE = 500
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+async def encode_ndjson(chunks: AsyncIterator[list[BaseModel]]) -> AsyncIterator[bytes]:
+    """
+    Encode les objets au fil de l'eau, un document JSON par ligne.
+    """
+    async for chunk in chunks:
+        if chunk:
+            yield "".join(item.model_dump_json() + "\n" for item in chunk).encode()
+
+
+async def encode_json_array(chunks: AsyncIterator[list[BaseModel]]) -> AsyncIterator[bytes]:
+    """
+    Encode les objets au fil de l'eau en un unique tableau JSON.
+    """
+    yield b"["
+    separator = ""
+    async for chunk in chunks:
+        if chunk:
+            yield (separator + ",".join(item.model_dump_json() for item in chunk)).encode()
+            separator = ","
+    yield b"]"
+
+
+def stream_models(chunks: AsyncIterator[list[BaseModel]], stream_format: StreamFormat) -> StreamingResponse:
+    """
+    Construit une réponse en streaming NDJSON ou JSON, à mémoire constante quelle que soit la taille du résultat.
+    """
+    if stream_format == StreamFormat.JSON:
+        return StreamingResponse(encode_json_array(chunks), media_type="application/json")
+    return StreamingResponse(encode_ndjson(chunks), media_type="application/x-ndjson")
@@ -0,0 +1,65 @@
+"""
+Benchmark du calcul de règlement d'un groupe sur des groupes synthétiques de taille croissante.
+
+Compare l'accumulation des soldes en Python pur à la passe vectorisée NumPy, puis mesure
+la simplification des dettes. Ne nécessite pas de base de données.
+
+    python -m benchmarks.bench_settlement
+"""
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from app.services.settlements import compute_net_balances, simplify_debts
+
+# (membres, dettes non soldées)
+GROUP_SIZES = ((5, 100), (10, 1_000), (30, 10_000), (100, 100_000), (1_000, 1_000_000))
+ITERATIONS = 5
+
+
+def make_group(members: int, debts: int) -> tuple[list[str], list[str], list[int]]:
+    rng = random.Random(members)
+    member_ids = [f"{index:026d}" for index in range(members)]
+    debtor_ids, creditor_ids, amounts = [], [], []
+    for _ in range(debts):
+        debtor, creditor = rng.sample(member_ids, 2)
+        debtor_ids.append(debtor)
+        creditor_ids.append(creditor)
+        amounts.append(rng.randint(100, 20_000))
+    return debtor_ids, creditor_ids, amounts
+
+
+def python_net_balances(debtor_ids: list[str], creditor_ids: list[str], amounts: list[int]) -> dict[str, int]:
+    net = defaultdict(int)
+    for debtor, creditor, amount in zip(debtor_ids, creditor_ids, amounts):
+        net[debtor] -= amount
+        net[creditor] += amount
+    return net
+
+
+def measure(func, *args) -> float:
+    timings = []
+    for _ in range(ITERATIONS):
+        started_at = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    print(f"{'members':>8} {'debts':>10} {'python p50 (ms)':>16} {'numpy p50 (ms)':>15} "
+          f"{'simplify p50 (ms)':>18} {'transfers':>10}")
+    for members, debts in GROUP_SIZES:
+        debtor_ids, creditor_ids, amounts = make_group(members, debts)
+        python = measure(python_net_balances, debtor_ids, creditor_ids, amounts)
+        vectorized = measure(compute_net_balances, debtor_ids, creditor_ids, amounts)
+        member_ids, net_cents = compute_net_balances(debtor_ids, creditor_ids, amounts)
+        simplify = measure(simplify_debts, member_ids, net_cents)
+        transfers = len(simplify_debts(member_ids, net_cents))
+        print(f"{members:>8} {debts:>10} {python * 1000:>16.2f} {vectorized * 1000:>15.2f} "
+              f"{simplify * 1000:>18.2f} {transfers:>10}")
+
+
+if __name__ == "__main__":
+    main()
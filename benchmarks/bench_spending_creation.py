@@ -0,0 +1,94 @@
+"""
+Benchmark de la création d'une dépense et de ses remboursements selon la taille du groupe.
+
+Compare l'ancienne boucle (1 insertion par membre) à la requête ensembliste unique.
+Nécessite une base PostgreSQL configurée via les variables POSTGRES_* ; toutes les
+données créées sont annulées en fin de mesure.
+
+    python -m benchmarks.bench_spending_creation
+"""
+import asyncio
+import statistics
+import time
+
+from app.dao.groups import insert_group
+from app.dao.reimbursements import insert_reimbursement
+from app.dao.spendings import insert_spending, insert_spending_with_reimbursements
+from app.dao.users import insert_user, select_users_by_group
+from app.dao.users_groups import add_user_to_group, select_group_member_ids
+from app.db.settings import initialize_postgres_pool, close_postgres_pool, transaction_async
+from app.schemas.groups import GroupCreate
+from app.schemas.spendings import SpendingCreate
+from app.schemas.users import UserCreate
+from app.services.splits import allocate_spending_splits
+
+GROUP_SIZES = (2, 5, 10, 30, 100)
+ITERATIONS = 50
+
+
+class Rollback(Exception):
+    pass
+
+
+async def create_group_of_size(size: int) -> tuple[str, str]:
+    raw_group = await insert_group(GroupCreate(name=f"bench-{size}", city="Rennes", postal_code="35000",
+                                               country="France", contact_email="bench@example.com",
+                                               starting_at="2024-01-01T00:00:00"))
+    member_ids = []
+    for index in range(size):
+        raw_user = await insert_user(UserCreate(firstname="Bench", lastname=str(index), password="password123",
+                                                address="1 rue du test",
+                                                email=f"bench-{size}-{index}-{time.time_ns()}@example.com"))
+        await add_user_to_group(raw_user["id"], raw_group["id"])
+        member_ids.append(raw_user["id"])
+    return raw_group["id"], member_ids[0]
+
+
+async def legacy_create(spending: SpendingCreate, owner_id: str) -> None:
+    raw_spending = await insert_spending(spending, owner_id)
+    members = await select_users_by_group(spending.group_id)
+    amount = raw_spending["amount"] // len(members)
+    for member in members:
+        if member["user_id"] != owner_id:
+            await insert_reimbursement(str(raw_spending["id"]), member["user_id"], amount)
+
+
+async def set_based_create(spending: SpendingCreate, owner_id: str) -> None:
+    member_ids = await select_group_member_ids(spending.group_id)
+    allocations = allocate_spending_splits([{"id": None, "owner_id": owner_id, "amount": spending.amount,
+                                             "split_strategy": spending.split_strategy, "split_values": None,
+                                             "member_ids": member_ids}])
+    await insert_spending_with_reimbursements(spending, owner_id,
+                                              [(user_id, amount) for _, user_id, amount in allocations])
+
+
+async def measure(create, spending: SpendingCreate, owner_id: str) -> list[float]:
+    timings = []
+    for _ in range(ITERATIONS):
+        started_at = time.perf_counter()
+        await create(spending, owner_id)
+        timings.append(time.perf_counter() - started_at)
+    return timings
+
+
+async def main() -> None:
+    await initialize_postgres_pool()
+    print(f"{'members':>8} {'legacy p50 (ms)':>16} {'set-based p50 (ms)':>19} {'speedup':>8}")
+    try:
+        for size in GROUP_SIZES:
+            try:
+                async with transaction_async():
+                    group_id, owner_id = await create_group_of_size(size)
+                    spending = SpendingCreate(name="bench", amount=10_000, currency="EUR", group_id=group_id)
+                    legacy = statistics.median(await measure(legacy_create, spending, owner_id))
+                    set_based = statistics.median(await measure(set_based_create, spending, owner_id))
+                    print(f"{size:>8} {legacy * 1000:>16.2f} {set_based * 1000:>19.2f} {legacy / set_based:>7.1f}x")
+                    raise Rollback
+            except Rollback:
+                pass
+    finally:
+        await close_postgres_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+import asyncio
+import os
+
+import pytest
+
+# DAO tests need a database created from app/db/init-ulid.sql and app/db/init.sql (see compose.yml),
+# configured through the usual POSTGRES_* variables. They are skipped without POSTGRES_HOST.
+DATABASE_CONFIGURED = bool(os.environ.get("POSTGRES_HOST"))
+
+# The settings are read at import time: give the unit tests a configuration that needs no database
+for name, value in {
+    "POSTGRES_USER": "cooloc",
+    "POSTGRES_PASSWORD": "cooloc",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB_NAME": "cooloc",
+    "JWT_SECRET_KEY": "test",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_EXPIRATION_TIME": "30",
+}.items():
+    os.environ.setdefault(name, value)
+
+DRIVERS = ["aiopg", "asyncpg"]
+
+
+class Rollback(Exception):
+    """
+    Raised at the end of a database test to roll its transaction back.
+    """
+
+
+@pytest.fixture(params=DRIVERS)
+def driver_name(request, monkeypatch) -> str:
+    """
+    Runs the test once per database driver, with POSTGRES_DRIVER set accordingly.
+    """
+    pytest.importorskip(request.param)
+    monkeypatch.setenv("POSTGRES_DRIVER", request.param)
+    return request.param
+
+
+@pytest.fixture
+def run_in_database(driver_name):
+    """
+    Runs a coroutine function against the database with the driver under test, inside a transaction
+    that is rolled back afterwards, and returns its result.
+    """
+    if not DATABASE_CONFIGURED:
+        pytest.skip("POSTGRES_HOST is not set")
+    from app.db.settings import close_postgres_pool, initialize_postgres_pool, transaction_async
+
+    def run(scenario):
+        async def main():
+            await initialize_postgres_pool()
+            try:
+                async with transaction_async():
+                    raise Rollback(await scenario())
+            except Rollback as rollback:
+                return rollback.args[0]
+            finally:
+                await close_postgres_pool()
+
+        return asyncio.run(main())
+
+    return run
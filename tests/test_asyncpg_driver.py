@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from app.db.drivers.asyncpg_driver import bind_params, translate_query  # noqa: E402
+
+
+def test_translate_query_numbers_named_parameters_once():
+    sql, order = translate_query("SELECT * FROM users WHERE id = %(id)s OR owner_id = %(owner)s OR %(id)s IS NULL")
+    assert sql == "SELECT * FROM users WHERE id = $1 OR owner_id = $2 OR $1 IS NULL"
+    assert order == ("id", "owner")
+
+
+def test_translate_query_counts_positional_parameters():
+    sql, order = translate_query("UPDATE groups SET deleted_at = NOW() WHERE id = %s AND name = %s")
+    assert sql == "UPDATE groups SET deleted_at = NOW() WHERE id = $1 AND name = $2"
+    assert order == 2
+
+
+def test_translate_query_keeps_escaped_percent():
+    sql, order = translate_query("SELECT 'a%%' WHERE name LIKE %(pattern)s")
+    assert sql == "SELECT 'a%' WHERE name LIKE $1"
+    assert order == ("pattern",)
+
+
+def test_translate_query_rejects_mixed_parameters():
+    with pytest.raises(ValueError):
+        translate_query("SELECT %(a)s, %s")
+
+
+def test_bind_params_orders_named_parameters():
+    sql, args = bind_params("SELECT %(b)s, %(a)s, %(b)s", {"a": 1, "b": 2, "unused": 3})
+    assert sql == "SELECT $1, $2, $1"
+    assert args == [2, 1]
+
+
+def test_bind_params_without_parameters():
+    assert bind_params("SELECT 1", None) == ("SELECT 1", [])
+
+
+def test_bind_params_sends_aware_datetimes_as_utc():
+    paris = timezone(timedelta(hours=2))
+    _, args = bind_params("SELECT %s, %s", (datetime(2024, 3, 14, 20, 30, tzinfo=paris), datetime(2024, 3, 14)))
+    assert args == [datetime(2024, 3, 14, 18, 30), datetime(2024, 3, 14)]
@@ -0,0 +1,54 @@
+from app.core import cache
+from app.core.cache import TTLCache, apply_invalidation, clear_invalidation_targets, register_invalidation
+
+
+def test_get_and_set():
+    users = TTLCache("test_get_and_set", max_entries=10, ttl=60)
+    assert users.get("a") is None
+    users.set("a", 1)
+    assert users.get("a") == 1
+    assert (users.hits.value, users.misses.value) == (1, 1)
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    users = TTLCache("test_entries_expire", max_entries=10, ttl=60)
+    users.set("a", 1)
+    users.set("b", 2, ttl=120)
+    now[0] += 90
+    assert users.get("a") is None
+    assert users.get("b") == 2
+    assert "a" not in users.entries
+
+
+def test_least_recently_used_entries_are_evicted():
+    users = TTLCache("test_lru", max_entries=2, ttl=60)
+    users.set("a", 1)
+    users.set("b", 2)
+    users.get("a")
+    users.set("c", 3)
+    assert list(users.entries) == ["a", "c"]
+    assert users.evictions.value == 1
+
+
+def test_disabled_cache_stores_nothing():
+    users = TTLCache("test_disabled", max_entries=10, ttl=60, enabled=False)
+    users.set("a", 1)
+    assert users.get("a") is None
+
+
+def test_invalidation_messages_evict_registered_caches():
+    users = TTLCache("test_invalidation_users", max_entries=10, ttl=60)
+    groups = TTLCache("test_invalidation_groups", max_entries=10, ttl=60)
+    register_invalidation("test_user", users)
+    register_invalidation("test_group", groups)
+    users.set("01A", 1)
+    users.set("01B", 2)
+    groups.set("01A", 3)
+
+    apply_invalidation("test_user:01A")
+    assert (users.get("01A"), users.get("01B"), groups.get("01A")) == (None, 2, 3)
+
+    clear_invalidation_targets()
+    assert not users.entries and not groups.entries
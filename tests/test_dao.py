@@ -0,0 +1,125 @@
+"""
+DAO round trips, run against every database driver (see the run_in_database fixture).
+"""
+from datetime import datetime
+
+from app.dao.groups import insert_group, select_group_by_id, soft_delete_group, update_group
+from app.dao.reimbursements import select_reimbursements_by_spending
+from app.dao.spendings import copy_spendings_to_import_table, create_spendings_import_table, \
+    delete_imported_spendings_with_unknown_group, insert_spending_with_reimbursements, \
+    insert_spendings_from_import_table, select_spending_by_id, select_spendings_by_user, update_spending_by_id
+from app.dao.users import insert_user, select_user_by_email, select_user_by_id, update_user_password
+from app.dao.users_groups import add_user_to_group
+from app.services.splits import resplit_group_open_spendings, resplit_spending
+from app.schemas.groups import GroupCreate
+from app.schemas.spendings import SpendingCreate
+from app.schemas.users import UserCreate
+
+USER = UserCreate(firstname="John", lastname="Doe", password="not-a-real-hash", year_of_birth=1990, address="1 rue de Paris",
+                  email="dao-tests@example.com")
+GROUP = GroupCreate(name="Roommates", city="Rennes", postal_code="35000", country="France",
+                    starting_at=datetime(2024, 1, 1))
+
+
+def test_user_round_trip(run_in_database):
+    async def scenario():
+        user = await insert_user(USER)
+        # Run the prepared statements twice: prepared on the first call, reused on the second
+        by_id = [await select_user_by_id(str(user["id"])) for _ in range(2)]
+        by_email = [await select_user_by_email(USER.email) for _ in range(2)]
+        await update_user_password(str(user["id"]), "new-hash")
+        return user, by_id, by_email, await select_user_by_id(str(user["id"]))
+
+    user, by_id, by_email, updated = run_in_database(scenario)
+    assert [str(row["id"]) for row in by_id + by_email] == [str(user["id"])] * 4
+    assert by_id[0]["email"] == USER.email
+    assert updated["password"] == "new-hash"
+
+
+def test_missing_user(run_in_database):
+    async def scenario():
+        return await select_user_by_email("nobody@example.com")
+
+    assert run_in_database(scenario) is None
+
+
+def test_group_round_trip(run_in_database):
+    async def scenario():
+        group = await insert_group(GROUP)
+        group_id = str(group["id"])
+        updated = await update_group(group_id, GROUP.model_copy(update={"name": "Flatmates", "base_currency": "USD"}))
+        await soft_delete_group(group_id)
+        return updated, await select_group_by_id(group_id)
+
+    updated, deleted = run_in_database(scenario)
+    assert updated["name"] == "Flatmates"
+    assert updated["base_currency"] == "USD"
+    assert deleted["deleted_at"] is not None
+
+
+async def insert_group_with_members(members_count: int) -> tuple[dict, str]:
+    """
+    Creates a group of `members_count` users and returns its first member and its id.
+    """
+    group_id = str((await insert_group(GROUP))["id"])
+    users = [await insert_user(USER.model_copy(update={"email": f"dao-tests-{i}@example.com"}))
+             for i in range(members_count)]
+    for user in users:
+        await add_user_to_group(str(user["id"]), group_id)
+    return users[0], group_id
+
+
+def test_spendings_import_round_trip(run_in_database):
+    async def scenario():
+        owner, group_id = await insert_group_with_members(3)
+        await create_spendings_import_table()
+        await copy_spendings_to_import_table([
+            (1, "Rent", None, 1000, "EUR", "rent", None, group_id),
+            (2, "Lost", None, 500, "EUR", "other", None, "01F8MECHZX3TBDSZ7XK4F8G5J6"),
+        ])
+        rejected = await delete_imported_spendings_with_unknown_group()
+        counts = await insert_spendings_from_import_table(str(owner["id"]))
+        spendings = await select_spendings_by_user(str(owner["id"]))
+        return rejected, counts, await select_reimbursements_by_spending(str(spendings[0]["id"]))
+
+    rejected, counts, reimbursements = run_in_database(scenario)
+    assert [row["row_number"] for row in rejected] == [2]
+    assert (counts["spendings_count"], counts["reimbursements_count"]) == (1, 2)
+    # 1000 cents over three members: the owner keeps their share, the others owe 333 or 334
+    assert sorted(row["reimbursement_amount"] for row in reimbursements) in ([333, 333], [333, 334])
+
+
+def test_edit_spending_amount_resplits_unpaid_shares(run_in_database):
+    async def scenario():
+        owner, group_id = await insert_group_with_members(3)
+        spending = SpendingCreate(name="Rent", amount=900, currency="EUR", group_id=group_id)
+        raw_spending = await insert_spending_with_reimbursements(spending, str(owner["id"]), [])
+        spending_id = str(raw_spending["id"])
+        await resplit_spending(spending_id)
+
+        updated = await update_spending_by_id(spending_id, spending.model_copy(update={"amount": 1200}))
+        await resplit_spending(spending_id)
+        return owner, updated, await select_reimbursements_by_spending(spending_id)
+
+    owner, updated, reimbursements = run_in_database(scenario)
+    assert updated["amount"] == 1200
+    assert str(updated["owner_id"]) == str(owner["id"])
+    assert [row["reimbursement_amount"] for row in reimbursements] == [400, 400]
+
+
+def test_members_joining_split_spendings_without_shares(run_in_database):
+    async def scenario():
+        owner, group_id = await insert_group_with_members(1)
+        spending = SpendingCreate(name="Rent", amount=1000, currency="EUR", group_id=group_id)
+        spending_id = str((await insert_spending_with_reimbursements(spending, str(owner["id"]), []))["id"])
+        before = await select_spending_by_id(spending_id)
+
+        member = await insert_user(USER.model_copy(update={"email": "dao-tests-new@example.com"}))
+        await add_user_to_group(str(member["id"]), group_id)
+        await resplit_group_open_spendings(group_id)
+        return before, await select_spending_by_id(spending_id), await select_reimbursements_by_spending(spending_id)
+
+    before, after, reimbursements = run_in_database(scenario)
+    assert before["is_reimbursed"]
+    assert not after["is_reimbursed"]
+    assert [row["reimbursement_amount"] for row in reimbursements] == [500]
@@ -0,0 +1,35 @@
+import pytest
+
+from app.core.fx import FxRates, UnknownCurrencyError
+
+RATES = FxRates("EUR", {"USD": 1.25, "GBP": 0.8}, "EUR", expires_at=0)
+
+
+def test_convert_to_one_target():
+    assert RATES.convert([1000, 1000, 1000], ["EUR", "USD", "GBP"], "EUR").tolist() == [1000, 800, 1250]
+
+
+def test_convert_to_target_per_row():
+    assert RATES.convert([1000, 1000], ["EUR", "USD"], ["USD", "GBP"]).tolist() == [1250, 640]
+
+
+def test_convert_rounds_to_the_cent():
+    assert RATES.convert([1], ["EUR"], "USD").tolist() == [1]
+    assert RATES.convert([3], ["USD"], "EUR").tolist() == [2]
+
+
+def test_convert_nothing():
+    assert RATES.convert([], [], "EUR").tolist() == []
+
+
+def test_currencies_are_normalized():
+    assert RATES.convert([1000, 1000], ["eur", " usd "], "Gbp").tolist() == [800, 640]
+    assert RATES.check_currency("usd") == "USD"
+    assert FxRates("eur", {"usd": 1.25}, "eur", expires_at=0).convert([1000], ["USD"], "EUR").tolist() == [800]
+
+
+def test_unknown_currency():
+    with pytest.raises(UnknownCurrencyError):
+        RATES.check_currency("JPY")
+    with pytest.raises(UnknownCurrencyError):
+        RATES.convert([1000], ["JPY"], "EUR")
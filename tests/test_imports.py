@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from app.utils.imports import ImportFormat, detect_import_format, iter_import_rows
+
+
+def test_detect_import_format():
+    assert detect_import_format("spendings.CSV", None) == ImportFormat.CSV
+    assert detect_import_format(None, "application/x-ndjson") == ImportFormat.NDJSON
+    assert detect_import_format("spendings.xlsx", "application/octet-stream") is None
+
+
+def test_csv_rows_drop_empty_values():
+    file = io.BytesIO("﻿name,amount,description\nRent,1000,\n".encode())
+    assert list(iter_import_rows(file, ImportFormat.CSV)) == [(1, {"name": "Rent", "amount": "1000"})]
+
+
+def test_ndjson_reports_unreadable_lines():
+    file = io.BytesIO(b'{"name": "Rent"}\n\n[1]\n{oops\n')
+    rows = list(iter_import_rows(file, ImportFormat.NDJSON))
+    assert rows[0] == (1, {"name": "Rent"})
+    assert rows[1] == (3, "Expected a JSON object")
+    assert rows[2][0] == 4 and rows[2][1].startswith("Invalid JSON")
+
+
+@pytest.mark.parametrize("import_format", list(ImportFormat))
+def test_non_utf8_file_is_rejected(import_format):
+    file = io.BytesIO("name\nLoyer payé\n".encode("latin-1"))
+    with pytest.raises(ValueError, match="UTF-8"):
+        list(iter_import_rows(file, import_format))
+
+
+def test_malformed_csv_is_rejected():
+    file = io.BytesIO(b"name\n" + b"x" * 200_000 + b"\n")
+    with pytest.raises(ValueError, match="Invalid CSV"):
+        list(iter_import_rows(file, ImportFormat.CSV))
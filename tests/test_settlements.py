@@ -0,0 +1,31 @@
+import numpy as np
+
+from app.services.settlements import compute_net_balances, simplify_debts
+
+
+def test_compute_net_balances():
+    members, net = compute_net_balances(["B", "C", "A"], ["A", "A", "B"], [300, 200, 50])
+    assert dict(zip(members.tolist(), net.tolist())) == {"A": 450, "B": -250, "C": -200}
+
+
+def test_compute_net_balances_without_debts():
+    members, net = compute_net_balances([], [], [])
+    assert members.tolist() == [] and net.tolist() == []
+
+
+def test_simplify_debts_settles_every_balance():
+    rng = np.random.default_rng(7)
+    debtors = rng.choice(list("ABCDEFGH"), size=200).tolist()
+    creditors = rng.choice(list("ABCDEFGH"), size=200).tolist()
+    members, net = compute_net_balances(debtors, creditors, rng.integers(1, 10_000, size=200).tolist())
+
+    transfers = simplify_debts(members, net)
+
+    balances = dict(zip(members.tolist(), net.tolist()))
+    for debtor, creditor, amount in transfers:
+        assert amount > 0
+        balances[debtor] += amount
+        balances[creditor] -= amount
+    assert set(balances.values()) == {0}
+    # Greedy matching zeroes at least one member per transfer
+    assert len(transfers) < len(members)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from app.schemas.spendings import SplitStrategy
+from app.services.splits import allocate_cents, allocate_spending_splits, split_weights
+
+MEMBERS = ["01A", "01B", "01C"]
+
+
+def test_allocate_cents_gives_leftover_cents_to_largest_remainders():
+    cents = allocate_cents(np.zeros(3, dtype=np.int64), np.array([100]), np.ones(3))
+    assert cents.tolist() == [34, 33, 33]
+
+
+def test_allocate_cents_hits_each_total_exactly():
+    rng = np.random.default_rng(42)
+    segments = np.sort(rng.integers(0, 50, size=1_000))
+    totals = rng.integers(0, 1_000_000, size=50)
+    weights = rng.random(1_000) + 0.01
+    cents = allocate_cents(segments, totals, weights)
+    present = np.unique(segments)
+    assert np.bincount(segments, weights=cents, minlength=50)[present].astype(np.int64).tolist() \
+        == totals[present].tolist()
+    assert (cents >= 0).all()
+
+
+def test_split_weights_equal():
+    assert split_weights(SplitStrategy.EQUAL, MEMBERS, None, 1000).tolist() == [1, 1, 1]
+
+
+def test_split_weights_leaves_out_missing_members():
+    weights = split_weights(SplitStrategy.SHARES, MEMBERS, {"01A": 2, "01C": 1}, 1000)
+    assert weights.tolist() == [2, 0, 1]
+
+
+@pytest.mark.parametrize("strategy, values", [
+    (SplitStrategy.SHARES, None),
+    (SplitStrategy.SHARES, {"01Z": 1}),
+    (SplitStrategy.SHARES, {"01A": -1, "01B": 2}),
+    (SplitStrategy.PERCENT, {"01A": 50, "01B": 40}),
+    (SplitStrategy.EXACT, {"01A": 500, "01B": 400}),
+    (SplitStrategy.EXACT, {"01A": 500.5, "01B": 499.5}),
+])
+def test_split_weights_rejects_inconsistent_values(strategy, values):
+    with pytest.raises(ValueError):
+        split_weights(strategy, MEMBERS, values, 1000)
+
+
+def test_allocate_spending_splits_leaves_out_owner_and_zero_weights():
+    allocations = allocate_spending_splits([
+        {"id": "s1", "owner_id": "01A", "amount": 1000, "split_strategy": "equal", "split_values": None,
+         "member_ids": MEMBERS},
+        {"id": "s2", "owner_id": "01B", "amount": 999, "split_strategy": "percent",
+         "split_values": {"01A": 50, "01B": 50}, "member_ids": MEMBERS},
+    ])
+    assert allocations == [("s1", "01B", 333), ("s1", "01C", 333), ("s2", "01A", 500)]
+
+
+def test_resplit_only_shares_what_is_left_after_paid_shares():
+    # 10000 owned by A: B paid 3333, then D joins. A, C and D share the 6667 left
+    spending = {"id": "s1", "owner_id": "01A", "amount": 10000, "split_strategy": "equal", "split_values": None,
+                "member_ids": ["01A", "01B", "01C", "01D"], "paid_user_ids": ["01B"], "paid_amount": 3333}
+    allocations = allocate_spending_splits([spending])
+    assert allocations == [("s1", "01C", 2222), ("s1", "01D", 2222)]
+
+
+@pytest.mark.parametrize("strategy, values", [
+    ("equal", None),
+    ("shares", {"01A": 1, "01B": 2, "01C": 3, "01D": 1}),
+    ("percent", {"01A": 10, "01B": 30, "01C": 35, "01D": 25}),
+])
+def test_resplit_shares_add_up_to_the_amount(strategy, values):
+    spending = {"id": "s1", "owner_id": "01A", "amount": 12345, "split_strategy": strategy, "split_values": values,
+                "member_ids": ["01A", "01B", "01C", "01D"], "paid_user_ids": ["01B"], "paid_amount": 4321}
+    allocations = allocate_spending_splits([spending])
+    # With an owner outside the group, the owner's own share is returned too
+    all_shares = allocate_spending_splits([{**spending, "owner_id": "01Z"}])
+
+    assert [member_id for _, member_id, _ in allocations] == ["01C", "01D"]
+    assert allocations == [share for share in all_shares if share[1] != "01A"]
+    assert 4321 + sum(amount for _, _, amount in all_shares) == 12345
+
+
+def test_resplit_rejects_an_amount_below_the_paid_shares():
+    spending = {"id": "s1", "owner_id": "01A", "amount": 1000, "split_strategy": "equal", "split_values": None,
+                "member_ids": ["01A", "01B"], "paid_user_ids": ["01B"], "paid_amount": 1500}
+    with pytest.raises(ValueError):
+        allocate_spending_splits([spending])
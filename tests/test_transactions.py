@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.db import settings
+from app.db.settings import after_commit, transaction_async
+
+
+class FakeCursor:
+
+    def __init__(self, statements: list[str]):
+        self.statements = statements
+
+    async def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.statements = []
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield FakeCursor(self.statements)
+
+
+class FakePool:
+
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    async def acquire(self):
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch) -> FakePool:
+    pool = FakePool()
+    monkeypatch.setattr(settings, "POOL", pool)
+    return pool
+
+
+def test_after_commit_runs_once_the_transaction_is_committed(pool):
+    calls = []
+
+    async def scenario():
+        async with transaction_async():
+            after_commit(lambda: calls.append(list(pool.conn.statements)))
+            async with transaction_async():
+                after_commit(lambda: calls.append("nested"))
+            assert calls == []
+
+    asyncio.run(scenario())
+    assert calls == [["BEGIN", "COMMIT"], "nested"]
+
+
+def test_after_commit_is_dropped_on_rollback(pool):
+    calls = []
+
+    async def scenario():
+        async with transaction_async():
+            after_commit(lambda: calls.append("committed"))
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
+    assert calls == []
+    assert pool.conn.statements == ["BEGIN", "ROLLBACK"]
+
+
+def test_after_commit_runs_at_once_outside_a_transaction():
+    calls = []
+    after_commit(lambda: calls.append("now"))
+    assert calls == ["now"]